@@ -55,6 +55,32 @@ class SettingsResponse(BaseModel):
 class UpdateSettingRequest(BaseModel):
     settings: Dict[str, Any]
 
+class HttpPoolStats(BaseModel):
+    open: bool
+    limit: int
+    limit_per_host: int
+    in_use: int = 0
+    idle: int = 0
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    dns_cache_hits: int = 0
+    dns_cache_misses: int = 0
+    http2_requests: int = 0
+
+class SharedPoolStats(BaseModel):
+    capacity: int
+    in_use: int = 0
+    waiting: int = 0
+    granted: Dict[str, int] = {}  # scan id -> slots granted
+
+class SchedulerStats(BaseModel):
+    max_running_scans: int
+    running: Dict[str, str] = {}  # scan id -> priority
+    queued: int = 0  # jobs waiting in the job queue, across all workers
+    fetch: SharedPoolStats
+    parse: SharedPoolStats
+
 class TestConfig(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     description: Optional[str] = None
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, HttpUrl, Field, field_validator
 from typing import Dict, List, Optional, Any, Union
 from enum import Enum
+import re
 import uuid
 from datetime import datetime
 
@@ -10,13 +11,16 @@ class ScanMode(str, Enum):
     SINGLE = "single"
     PATH = "path"
     REGEX = "regex"
+    INCREMENTAL = "incremental"
 
 class ScanStatus(str, Enum):
     PENDING = "pending"
+    QUEUED = "queued"
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
+    PAUSED = "paused"
 
 class SeverityLevel(str, Enum):
     INFO = "info"
@@ -42,20 +46,56 @@ class ResourceStatus(str, Enum):
     TIMEOUT = "timeout"
     BLOCKED = "blocked"
 
+class ScanPriority(str, Enum):
+    LOW = "low"
+    NORMAL = "normal"
+    HIGH = "high"
+
+class SeenSetBackend(str, Enum):
+    EXACT = "exact"
+    BLOOM = "bloom"
+
+class FetcherBackend(str, Enum):
+    AIOHTTP = "aiohttp"
+    HTTPX = "httpx"  # negotiates HTTP/2
+
 class ScanConfig(BaseModel):
     max_urls: int = Field(default=100, ge=1, le=10000)
     max_depth: int = Field(default=3, ge=1, le=10)
     follow_external_links: bool = False
     user_agent: str = "WebsiteChecker/1.0"
+    priority: ScanPriority = ScanPriority.NORMAL  # share of the fetch capacity when scans run side by side
     timeout: int = Field(default=30, ge=5, le=180)
     verify_ssl: bool = True
     follow_redirects: bool = True
     screenshot_enabled: bool = True
     crawl_ajax: bool = False
     respect_robots_txt: bool = True
+    use_sitemaps: bool = False  # seed the crawl from robots.txt/sitemap.xml sitemaps
+    detect_crawler_traps: bool = True  # skip calendar, facet and endless pagination links
+    fetcher: FetcherBackend = FetcherBackend.AIOHTTP
+    # Page workers, fixed at max_threads. With autoscale_workers their number follows
+    # measured throughput between min_threads and max_threads (raise max_threads too)
+    autoscale_workers: bool = False
+    min_threads: int = Field(default=4, ge=1, le=512)
+    max_threads: int = Field(default=4, ge=1, le=512)
+    max_asset_threads: int = Field(default=8, ge=1, le=32)  # CSS/JS/image/font downloads in parallel with pages
+    # Crawler processes, each fetching the hosts that hash to it; helps scans spanning many hosts
+    crawl_processes: int = Field(default=1, ge=1, le=16)
     custom_headers: Optional[Dict[str, str]] = None
     exclude_patterns: Optional[List[str]] = None
     include_patterns: Optional[List[str]] = None
+    seen_set_backend: SeenSetBackend = SeenSetBackend.EXACT
+    # Minimum SimHash similarity for a page to count as a near-duplicate, e.g. 0.95;
+    # near-duplicates are stored but neither followed nor validated. None disables
+    near_duplicate_threshold: Optional[float] = Field(default=None, ge=0.9, le=1.0)
+    # Pages crawled and validated per URL template (e.g. /product/{n}); None crawls all
+    max_pages_per_template: Optional[int] = Field(default=None, ge=1)
+    # Resource budgets; the scan stops cleanly when one runs out. None means unlimited
+    max_total_bytes: Optional[int] = Field(default=None, ge=1)  # downloaded bytes
+    max_duration_seconds: Optional[int] = Field(default=None, ge=1)  # per run; a resumed scan starts over
+    max_page_bytes: Optional[int] = Field(default=None, ge=1)  # larger responses are skipped
+    max_requests_per_second: Optional[float] = Field(default=None, gt=0)  # across all hosts
     
     # Mode-specific configuration
     path_restriction: Optional[str] = None
@@ -63,6 +103,24 @@ class ScanConfig(BaseModel):
     regex_is_inclusive: bool = True
     consolidate_css: bool = False
 
+    @field_validator('include_patterns', 'exclude_patterns')
+    def validate_patterns(cls, v):
+        for pattern in v or []:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid URL pattern {pattern!r}: {e}")
+        return v
+
+    @field_validator('regex_pattern')
+    def validate_regex_pattern(cls, v):
+        if v:
+            try:
+                re.compile(v)
+            except re.error as e:
+                raise ValueError(f"Invalid regex pattern {v!r}: {e}")
+        return v
+
 class ScanCreate(BaseModel):
     url: HttpUrl
     mode: ScanMode = ScanMode.FULL
@@ -80,6 +138,16 @@ class ScanResponse(BaseModel):
     created_at: datetime
     status: ScanStatus = ScanStatus.PENDING
 
+class ScanBudgetStatus(BaseModel):
+    max_total_bytes: Optional[int] = None
+    max_duration_seconds: Optional[int] = None
+    max_page_bytes: Optional[int] = None
+    max_requests_per_second: Optional[float] = None
+    bytes_used: int = 0
+    seconds_used: float = 0
+    pages_over_size: int = 0
+    exhausted: Optional[str] = None  # the budget that stopped the scan
+
 class ScanStatusResponse(BaseModel):
     uuid: str
     status: ScanStatus
@@ -92,6 +160,8 @@ class ScanStatusResponse(BaseModel):
     urls_total: Optional[int] = None
     started_at: Optional[datetime] = None
     updated_at: datetime
+    budget: Optional[ScanBudgetStatus] = None
+    queue_position: Optional[int] = None  # while QUEUED, 1 = next to start
 
 class ResourceDetail(BaseModel):
     id: str
@@ -1,14 +1,21 @@
 from fastapi import APIRouter, Depends, Path, Query, HTTPException, status, Request
 from typing import Optional
+from sqlalchemy.orm import Session
 from datetime import datetime, date
 import logging
 
 from app.api.models.management import (
     ScansResponse, DeleteScanResponse, SettingsResponse,
-    UpdateSettingRequest, TestConfig, TestConfigsResponse, TestConfigResponse
+    UpdateSettingRequest, TestConfig, TestConfigsResponse, TestConfigResponse,
+    HttpPoolStats, SchedulerStats
 )
 from app.services.management_service import ManagementService
 from app.api.dependencies.services import get_management_service
+from app.core.http_client import http_client
+from app.core.job_queue import QUEUED
+from app.core.scan_scheduler import scan_scheduler
+from app.core.database import get_db
+from app.models.scan_job import ScanJob
 from app.core.exceptions import (
     WebsiteCheckerException, NotFoundException, BadRequestException,
     UnprocessableEntityException, ConflictException
@@ -158,6 +165,28 @@ async def update_settings(
         logger.error(f"Unexpected error updating settings: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.get("/http-pool", response_model=HttpPoolStats)
+async def get_http_pool_stats():
+    """
+    Get statistics of the shared HTTP connection pool.
+    
+    Includes connections in use and idle, and counters of requests,
+    connection reuse and DNS cache hits since startup.
+    """
+    return HttpPoolStats(**http_client.stats())
+
+@router.get("/scheduler", response_model=SchedulerStats)
+async def get_scheduler_stats(db: Session = Depends(get_db)):
+    """
+    Get the state of the scan scheduler of this process.
+    
+    Lists the scans running here with their priority, the number of scans
+    waiting in the job queue of all workers, and the use of the shared
+    fetch and parse pools per scan.
+    """
+    queued = db.query(ScanJob).filter(ScanJob.status == QUEUED).count()
+    return SchedulerStats(**scan_scheduler.stats(), queued=queued)
+
 @router.get("/test-config", response_model=TestConfigsResponse)
 async def list_test_configs(
     request: Request,
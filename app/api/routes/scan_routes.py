@@ -493,3 +493,37 @@ async def cancel_scan(
     except Exception as e:
         logger.error(f"Error cancelling scan: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{scan_id}/pause")
+async def pause_scan(
+    scan_id: str,
+    scan_service: ScanService = Depends(get_scan_service)
+):
+    """Pause a running scan; its progress is kept for a later resume"""
+    try:
+        paused = await scan_service.pause_scan(scan_id)
+        if paused:
+            return {"message": "Scan paused successfully"}
+        return {"message": "Scan is pausing"}
+    except BadRequestException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error pausing scan: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{scan_id}/resume")
+async def resume_scan(
+    scan_id: str,
+    scan_service: ScanService = Depends(get_scan_service)
+):
+    """Resume a paused scan"""
+    try:
+        await scan_service.resume_scan(scan_id)
+        return {"message": "Scan resumed successfully"}
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except BadRequestException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error resuming scan: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,77 @@
+import logging
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BodyWriter:
+    """
+    Thread pool for writing downloaded bodies to the scan cache.
+
+    File I/O blocks, so opening, writing and closing files runs on a small
+    bounded pool instead of the event loop. Each download awaits its
+    chunk's write before reading the next one, so the amount of data
+    waiting to be written is bounded by the number of downloads in
+    flight. The executor is created on first use and shared by all crawls
+    in the process.
+    """
+
+    def __init__(self, threads: Optional[int] = None):
+        """Initialize the pool; `threads` defaults to CRAWLER_WRITER_THREADS."""
+        self.threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self.threads = self.threads or settings.CRAWLER_WRITER_THREADS
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="body-writer")
+            logger.info(f"Body writer started with {self.threads} threads")
+        return self._executor
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), function, *args)
+
+    async def open(self, path: str) -> BinaryIO:
+        """Create the file at `path`, and its directory, for writing."""
+        return await self._run(_open_for_writing, path)
+
+    async def write(self, f: BinaryIO, chunk: bytes):
+        """Append a chunk to a file returned by `open`."""
+        await self._run(f.write, chunk)
+
+    async def close(self, f: BinaryIO):
+        """Close a file returned by `open`."""
+        await self._run(f.close)
+
+    async def remove(self, path: str):
+        """Delete a partially written file."""
+        await self._run(os.remove, path)
+
+    async def write_file(self, path: str, content: bytes):
+        """Write a whole body to `path` in one call."""
+        await self._run(_write_file, path, content)
+
+    def shutdown(self):
+        """Stop the writer threads once pending writes have finished."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def _open_for_writing(path: str) -> BinaryIO:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, 'wb')
+
+
+def _write_file(path: str, content: bytes):
+    with _open_for_writing(path) as f:
+        f.write(content)
+
+
+# Shared writer pool for all crawls in this process
+body_writer = BodyWriter()
@@ -45,7 +45,7 @@ class CacheManager:
         os.makedirs(resources_dir, exist_ok=True)
         
         # Create subdirectories for different resource types
-        for resource_type in ["html", "css", "js", "images", "documents", "other"]:
+        for resource_type in ["html", "css", "js", "images", "fonts", "documents", "other"]:
             os.makedirs(os.path.join(resources_dir, resource_type), exist_ok=True)
         
         # Create screenshots directory
@@ -94,6 +94,7 @@ class CacheManager:
             "css": ".css",
             "js": ".js",
             "images": "",  # Keep original extension for images
+            "fonts": "",  # Keep original extension for fonts
             "documents": "",  # Keep original extension for documents
             "other": ""
         }
@@ -46,6 +46,125 @@ class Settings(BaseSettings):
     # Cache Settings
     CACHE_TTL: int = 300  # seconds
     
+    # Scan control
+    SCAN_STOP_TIMEOUT: float = 30.0  # seconds to wait for a paused/cancelled scan to stop
+    
+    # Durable scan job queue
+    JOB_WORKER_ENABLED: bool = True  # run scans in the API process; off when separate workers do
+    JOB_LEASE_SECONDS: float = 60.0  # a job whose worker misses heartbeats this long is queued again
+    JOB_HEARTBEAT_SECONDS: float = 10.0  # lease renewal and queue polling interval
+    JOB_MAX_ATTEMPTS: int = 3  # lease expiries before a scan is marked failed
+    JOB_WORKER_PROCESSES: int = 1  # processes started by `python -m app.worker`
+    
+    # Process-wide scan scheduler
+    SCHEDULER_MAX_RUNNING_SCANS: int = 4  # per worker process; further scans wait as QUEUED
+    SCHEDULER_FETCH_CONCURRENCY: int = 32  # requests in flight across all scans
+    SCHEDULER_PARSE_CONCURRENCY: int = 0  # HTML parses across all scans; 0 = one per CPU core
+    
+    # Shared HTTP connection pool
+    HTTP_POOL_LIMIT: int = 100  # open connections across all hosts
+    HTTP_POOL_LIMIT_PER_HOST: int = 8
+    HTTP_KEEPALIVE_TIMEOUT: float = 30.0  # seconds an idle connection is kept
+    HTTP_DNS_CACHE_TTL: int = 300  # seconds
+    HTTP_TIMEOUT: float = 30.0  # total seconds per request
+    
+    # Crawler settings
+    CRAWLER_USER_AGENT: str = "WebsiteChecker/1.0"
+    CRAWLER_CHUNK_SIZE: int = 64 * 1024
+    CRAWLER_MAX_TEXT_BYTES: int = 5 * 1024 * 1024  # HTML/CSS/JS bodies held in memory
+    CRAWLER_MAX_ASSET_BYTES: int = 50 * 1024 * 1024  # binary bodies streamed to disk
+    CRAWLER_LINK_EXTRACTOR: str = "auto"  # auto, selectolax, lxml or soup
+    CRAWLER_PARSE_PROCESSES: int = 0  # parse-stage worker processes; 0 = one per CPU core
+    CRAWLER_SIMHASH_SHINGLE_SIZE: int = 4  # words per shingle for near-duplicate detection
+    SKIP_EXTENSIONS: List[str] = [  # links with these extensions are never crawled
+        ".zip", ".gz", ".tgz", ".tar", ".rar", ".7z", ".bz2",
+        ".exe", ".msi", ".dmg", ".iso", ".bin", ".apk",
+        ".mp3", ".mp4", ".m4a", ".avi", ".mov", ".wmv", ".mkv", ".flv", ".webm", ".ogg", ".wav",
+    ]
+    
+    # Crawler per-host politeness (requests/second, concurrent requests). Hosts
+    # start at the unthrottled crawl's pace of four concurrent requests; 429/503
+    # responses halve the rate and concurrency, rising latency cuts concurrency
+    CRAWLER_HOST_RATE: float = 50.0
+    CRAWLER_HOST_MIN_RATE: float = 0.2
+    CRAWLER_HOST_MAX_RATE: float = 50.0
+    CRAWLER_HOST_RATE_STEP: float = 0.5
+    CRAWLER_HOST_BURST: float = 10.0
+    CRAWLER_HOST_CONCURRENCY: int = 4
+    CRAWLER_HOST_MAX_CONCURRENCY: int = 8
+    CRAWLER_HOST_LATENCY_TOLERANCE: float = 2.0  # slow down above baseline x tolerance
+    CRAWLER_HOST_BACKOFF: float = 10.0  # seconds, when no Retry-After is sent
+    # Asset lane (CSS, JS, images, fonts, documents), dispatched apart from pages
+    CRAWLER_HOST_ASSET_CONCURRENCY: int = 6
+    CRAWLER_HOST_ASSET_RATE: float = 10.0
+    CRAWLER_HOST_ASSET_BURST: float = 10.0
+    CRAWLER_WRITER_THREADS: int = 4  # threads writing bodies to the scan cache
+    
+    # Page worker autoscaling (AIMD on throughput, latency, errors and event loop lag)
+    CRAWLER_MAX_WORKERS: int = 512  # page workers per scan (or shard), the ceiling of max_threads
+    CRAWLER_AUTOSCALE_INTERVAL: float = 2.0  # seconds between decisions
+    CRAWLER_AUTOSCALE_STEP: int = 4  # workers added while throughput keeps growing
+    CRAWLER_AUTOSCALE_BACKOFF: float = 0.5  # worker count factor on overload
+    CRAWLER_AUTOSCALE_MIN_GAIN: float = 0.05  # throughput gain that justifies the last step
+    CRAWLER_AUTOSCALE_MAX_ERROR_RATE: float = 0.1  # failed or throttled responses
+    CRAWLER_AUTOSCALE_LATENCY_TOLERANCE: float = 3.0  # overload above best latency x tolerance
+    CRAWLER_AUTOSCALE_MAX_LOOP_LAG: float = 0.1  # seconds the event loop may fall behind
+    CRAWLER_AUTOSCALE_PROBE_INTERVALS: int = 5  # steady intervals before adding workers again
+    CRAWLER_AUTOSCALE_DECISION_LIMIT: int = 200  # worker count changes kept in the scan stats
+    
+    # Shared robots.txt cache (TTLs in seconds)
+    CRAWLER_ROBOTS_TTL: float = 3600.0  # robots.txt fetched successfully
+    CRAWLER_ROBOTS_MISSING_TTL: float = 3600.0  # 4xx: no robots.txt, everything allowed
+    CRAWLER_ROBOTS_ERROR_TTL: float = 300.0  # 5xx or network error
+    CRAWLER_ROBOTS_CACHE_SIZE: int = 10000  # origins kept
+    CRAWLER_ROBOTS_MAX_BYTES: int = 500 * 1024
+    CRAWLER_ROBOTS_MAX_CRAWL_DELAY: float = 30.0  # cap on honoured Crawl-delay
+    
+    # Sitemap seeding
+    CRAWLER_SITEMAP_MAX_FILES: int = 50  # sitemap and index files read per scan
+    CRAWLER_SITEMAP_MAX_BYTES: int = 50 * 1024 * 1024  # uncompressed size limit per file
+    
+    # Best-first crawl order (weights of the URL score signals)
+    CRAWLER_PRIORITY_DEPTH_WEIGHT: float = 1.0
+    CRAWLER_PRIORITY_LINK_WEIGHT: float = 1.0  # inbound links found so far
+    CRAWLER_PRIORITY_SITEMAP_WEIGHT: float = 1.0  # sitemap <priority>
+    CRAWLER_PRIORITY_NOVELTY_WEIGHT: float = 2.0  # URL templates with few pages fetched
+    CRAWLER_PRIORITY_CANDIDATE_FACTOR: int = 5  # URLs admitted to the frontier per max_urls
+    CRAWLER_TEMPLATE_MAX_LITERALS: int = 20  # distinct values before a path segment counts as variable
+    CRAWLER_TEMPLATE_STATS_LIMIT: int = 50  # largest templates listed in the scan stats
+    
+    # Crawler trap detection (infinite URL spaces)
+    CRAWLER_TRAP_MAX_PATH_DEPTH: int = 15  # path segments
+    CRAWLER_TRAP_MAX_SEGMENT_REPEATS: int = 2  # occurrences of one segment in a path
+    CRAWLER_TRAP_MAX_PARAM_VALUES: int = 100  # distinct values per query parameter and path
+    CRAWLER_TRAP_MAX_QUERY_VARIANTS: int = 200  # distinct query strings per path (facet combinations)
+    CRAWLER_TRAP_MAX_GROWING_STEPS: int = 50  # new maxima of a numeric query parameter per path
+    CRAWLER_TRAP_MAX_YEARS_AHEAD: int = 2  # later dates are calendar pages
+    
+    # Sharded crawling (ScanConfig.crawl_processes > 1)
+    CRAWLER_SHARD_STATUS_SECONDS: float = 0.25  # interval of each shard's progress and idle reports
+    
+    # Crawler disk-backed frontier
+    CRAWLER_FRONTIER_MEMORY_LIMIT: int = 1000  # queued URLs held in memory per host
+    CRAWLER_FRONTIER_CHECKPOINT_OPS: int = 500
+    CRAWLER_FRONTIER_CHECKPOINT_SECONDS: float = 5.0
+    
+    # Crawler seen-URL sets ("bloom" backend)
+    CRAWLER_BLOOM_INITIAL_CAPACITY: int = 100000
+    CRAWLER_BLOOM_ERROR_RATE: float = 0.001
+    CRAWLER_BLOOM_FLUSH_SIZE: int = 10000  # URLs buffered before writing to disk
+    CRAWLER_BLOOM_USE_MMAP: bool = False
+
+    # Write-behind persistence of crawled resources
+    RESOURCE_WRITER_BATCH_SIZE: int = 200  # rows per bulk insert
+    RESOURCE_WRITER_FLUSH_SECONDS: float = 2.0
+    
+    # Scan pipeline: stored pages are validated, indexed and captured while crawling
+    PIPELINE_QUEUE_SIZE: int = 100  # pages waiting per stage before the crawl is held back
+    PIPELINE_VALIDATION_CONCURRENCY: int = 4
+    PIPELINE_INDEX_CONCURRENCY: int = 2
+    PIPELINE_SCREENSHOT_CONCURRENCY: int = 2  # browser pages open at once
+    
     # Test Configurations
     DEFAULT_TEST_CONFIG: Dict[str, Any] = {
         "max_urls": 100,
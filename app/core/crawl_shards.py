@@ -0,0 +1,456 @@
+import logging
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import queue
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.host_scheduler import HostScheduler
+from app.core.scan_budget import MAX_DURATION_SECONDS, MAX_REQUESTS_PER_SECOND, MAX_TOTAL_BYTES, ScanBudget
+from app.core.scan_control import ScanControl
+from app.core.scan_pipeline import ScanPipeline
+
+logger = logging.getLogger(__name__)
+
+# Messages on a shard's inbox
+URLS = "urls"  # (URLS, depth, [url, ...]) found by another shard on a host this one owns
+FINISH = "finish"  # every shard is idle: let the crawl end
+STOP = "stop"  # pause, cancel or an exhausted budget: stop dispatching
+DRAIN = "drain"  # every shard stopped: queue what is left in the inbox and exit
+
+# Events sent by shards to the coordinator, as (kind, shard index, ...)
+STATUS = "status"
+PAGES = "pages"
+STOPPED = "stopped"
+DONE = "done"
+FAILED = "failed"
+
+
+@lru_cache(maxsize=65536)
+def shard_for(host: str, shard_count: int) -> int:
+    """
+    Return the shard owning a host, by rendezvous hashing.
+
+    The hash is stable across processes and runs (unlike hash()), so a
+    resumed scan sends every host to the shard holding its frontier.
+    """
+    if shard_count <= 1:
+        return 0
+    key = host.lower().encode("utf-8")
+    return max(
+        range(shard_count),
+        key=lambda index: hashlib.blake2b(key, digest_size=8, person=str(index).encode()).digest()
+    )
+
+
+class ShardLink:
+    """
+    A crawl process's end of the channels between the shards of a scan.
+
+    Each shard fetches only the hosts that hash to it. URLs it finds on
+    other hosts are sent, once each, to the owner's inbox; the owner
+    dedupes them against its own seen sets. The counts of URLs sent and
+    received let the coordinator tell when no URL is left in transit.
+    """
+
+    def __init__(self, index: int, count: int, inboxes: List[Any], events: Any, dispatch_counter: Any):
+        """
+        Initialize the link.
+
+        Args:
+            index: This shard's number
+            count: Number of shards of the scan
+            inboxes: One multiprocessing queue per shard, indexed by shard
+            events: Queue of status and page events read by the coordinator
+            dispatch_counter: multiprocessing.Value of URLs fetched by all shards, for max_urls
+        """
+        self.index = index
+        self.count = count
+        self.inboxes = inboxes
+        self.events = events
+        self.dispatch_counter = dispatch_counter
+        self.sent = 0
+        self.received = 0
+        self.crawling = True
+        self._forwarded = set()
+
+    def owns(self, url: str) -> bool:
+        """True if the URL's host belongs to this shard."""
+        return shard_for(HostScheduler.host_for(url), self.count) == self.index
+
+    def forward(self, urls: List[str], depth: int) -> List[str]:
+        """
+        Send URLs on other shards' hosts to their owners.
+
+        Returns:
+            The URLs this shard owns, in their original order
+        """
+        own = []
+        outgoing: Dict[int, List[str]] = {}
+        for url in urls:
+            owner = shard_for(HostScheduler.host_for(url), self.count)
+            if owner == self.index:
+                own.append(url)
+            elif url not in self._forwarded:
+                self._forwarded.add(url)
+                outgoing.setdefault(owner, []).append(url)
+        for owner, batch in outgoing.items():
+            self.inboxes[owner].put((URLS, depth, batch))
+            self.sent += len(batch)
+        return own
+
+    def flush(self):
+        """Wait until every URL sent to another shard has reached its inbox."""
+        for owner, inbox in enumerate(self.inboxes):
+            if owner != self.index:
+                inbox.close()
+                inbox.join_thread()
+
+    def emit(self, kind: str, *payload: Any):
+        """Send an event to the coordinator."""
+        self.events.put((kind, self.index) + payload)
+
+    def status(self, crawler) -> Dict[str, Any]:
+        """Return the shard's counters; idle means nothing queued or in flight."""
+        url_queue = crawler.url_queue
+        return {
+            **crawler.progress(),
+            "idle": not self.crawling or (url_queue is not None and url_queue.idle),
+            "hosts": len(url_queue.hosts) if url_queue is not None else 0,
+            "sent": self.sent,
+            "received": self.received,
+            "pages_over_size": crawler.budget.pages_over_size
+        }
+
+    async def receive(self, crawler):
+        """Apply inbox messages to the shard's crawler until the coordinator drains the inbox."""
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, _poll, self.inboxes[self.index])
+            if message is None:
+                continue
+            kind = message[0]
+            if kind == URLS:
+                while crawler.url_queue is None:
+                    # Queued once the crawler has set up its frontier
+                    await asyncio.sleep(0.05)
+                _, depth, urls = message
+                await crawler.queue_urls(urls, depth)
+                self.received += len(urls)
+            elif kind == FINISH:
+                if crawler.url_queue is not None:
+                    crawler.url_queue.release_hold()
+            elif kind == STOP:
+                if crawler.url_queue is not None:
+                    crawler.url_queue.stop()
+            elif kind == DRAIN:
+                return
+
+    async def report_status(self, crawler):
+        """Send the shard's counters to the coordinator every CRAWLER_SHARD_STATUS_SECONDS."""
+        while True:
+            self.emit(STATUS, self.status(crawler))
+            await asyncio.sleep(settings.CRAWLER_SHARD_STATUS_SECONDS)
+
+    def send_pages(self, rows: List[Dict[str, Any]]):
+        """Resource writer listener passing stored pages on to the scan pipeline."""
+        pages = [
+            row for row in rows
+            if row['resource_type'] == 'html' and row['status_code'] != 304 and row.get('local_path')
+        ]
+        if pages:
+            self.emit(PAGES, pages)
+
+
+def _poll(channel: Any) -> Optional[tuple]:
+    """Wait briefly for a message, so that the waiting thread never outlives its task for long."""
+    try:
+        return channel.get(timeout=settings.CRAWLER_SHARD_STATUS_SECONDS * 4)
+    except queue.Empty:
+        return None
+
+
+def run_shard(index: int, count: int, session_uuid: str, config: Dict[str, Any], cache_path: str,
+              start_url: str, resume: bool, inboxes: List[Any], events: Any, dispatch_counter: Any,
+              send_pages: bool):
+    """Entry point of one crawl shard process."""
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL),
+        format=f"%(asctime)s - crawl shard {index} - %(name)s - %(levelname)s - %(message)s",
+    )
+    link = ShardLink(index, count, inboxes, events, dispatch_counter)
+    try:
+        asyncio.run(_crawl_shard(link, session_uuid, config, cache_path, start_url, resume, send_pages))
+    except Exception as e:
+        logger.error(f"Crawl shard {index} of scan {session_uuid} failed: {str(e)}", exc_info=True)
+        link.emit(FAILED, str(e))
+
+
+async def _crawl_shard(link: ShardLink, session_uuid: str, config: Dict[str, Any], cache_path: str,
+                       start_url: str, resume: bool, send_pages: bool):
+    # Imported here: the crawler module imports this one
+    from app.core.body_writer import body_writer
+    from app.core.crawler import Crawler
+    from app.core.database import SessionLocal
+    from app.core.http_client import http_client
+    from app.core.parse_worker import parse_pool
+
+    # The shards split the parse processes of the machine between them
+    parse_pool.processes = max(1, (settings.CRAWLER_PARSE_PROCESSES or os.cpu_count() or 1) // link.count)
+
+    db = SessionLocal()
+    crawler = Crawler(session_uuid, config, db, cache_path=cache_path, shard=link)
+    if send_pages:
+        crawler.resource_writer.add_listener(link.send_pages)
+    receiver = asyncio.create_task(link.receive(crawler))
+    reporter = asyncio.create_task(link.report_status(crawler))
+    try:
+        await crawler.start(start_url, resume=resume)
+        link.crawling = False
+        link.flush()
+        link.emit(STOPPED, link.status(crawler))
+        # URLs sent by shards that were still crawling go to the frontier, for a resume
+        await receiver
+    finally:
+        receiver.cancel()
+        reporter.cancel()
+        try:
+            await crawler.close()
+        finally:
+            db.close()
+            await http_client.close()
+            body_writer.shutdown()
+            parse_pool.shutdown(wait=True)
+    link.emit(DONE, link.status(crawler), crawler.report())
+
+
+class ShardedCrawl:
+    """
+    Crawl of one scan split over several processes by host.
+
+    Each of `processes` shard processes runs a Crawler over the hosts that
+    hash to it, so per-host politeness stays within one process while
+    fetching and parsing use several cores. Shards exchange cross-shard
+    URLs through multiprocessing queues, keep their frontier and seen sets
+    under `cache_path/shard-<n>`, and write resources to the scan's
+    database and cache like a single crawler.
+
+    The coordinator runs in the scan's process. It aggregates the shards'
+    progress, enforces the size and duration budgets (the max_urls budget
+    is a counter shared by the shards' schedulers), passes stored pages
+    to the scan pipeline, and ends the crawl once two consecutive rounds
+    of status reports show every shard idle with as many URLs received as
+    sent. A pause or cancel stops all shards; the URLs they still exchange
+    are drained into the owners' frontiers for a later resume.
+
+    Exposes the subset of the Crawler interface used by the scan service.
+    """
+
+    def __init__(self, session_uuid: str, config: Dict[str, Any], db_session, cache_path: Optional[str] = None,
+                 control: Optional[ScanControl] = None, budget: Optional[ScanBudget] = None,
+                 pipeline: Optional[ScanPipeline] = None, processes: int = 2):
+        """Initialize the coordinator; arguments are those of Crawler plus the number of shards."""
+        self.session_uuid = session_uuid
+        self.config = config
+        self.db_session = db_session
+        self.control = control or ScanControl()
+        self.budget = budget or ScanBudget.from_config(config)
+        self.pipeline = pipeline
+        self.cache_path = cache_path or os.path.join(settings.STORAGE_DIR, session_uuid)
+        self.processes = processes
+        self.shard_status: Dict[int, Dict[str, Any]] = {}
+        self.shard_reports: Dict[int, Dict[str, Any]] = {}
+        self.errors: Dict[int, str] = {}
+        self._inboxes: List[Any] = []
+        self._stopping = False
+        self._finishing = False
+        self._draining = False
+        self._fresh = set()  # shards that reported since the last termination round
+        self._last_round = None
+
+    def _shard_config(self) -> Dict[str, Any]:
+        """Per-shard config: the coordinator enforces the size and duration budgets."""
+        rate = self.config.get(MAX_REQUESTS_PER_SECOND)
+        return {
+            **self.config,
+            MAX_TOTAL_BYTES: None,
+            MAX_DURATION_SECONDS: None,
+            MAX_REQUESTS_PER_SECOND: rate / self.processes if rate else None
+        }
+
+    async def start(self, start_url: str, resume: bool = False):
+        """
+        Run the shard processes until the crawl ends, stops or runs out of budget.
+
+        Raises:
+            RuntimeError: If a shard process failed
+        """
+        context = multiprocessing.get_context("spawn")
+        self._inboxes = [context.Queue() for _ in range(self.processes)]
+        events = context.Queue()
+        dispatch_counter = context.Value("q", 0)
+        logger.info(f"Starting crawl of {start_url} in {self.processes} shard processes")
+
+        processes = [
+            context.Process(
+                target=run_shard, name=f"crawl-shard-{index}",
+                args=(index, self.processes, self.session_uuid, self._shard_config(), self.cache_path,
+                      start_url, resume, self._inboxes, events, dispatch_counter, self.pipeline is not None)
+            )
+            for index in range(self.processes)
+        ]
+        for process in processes:
+            process.start()
+
+        self.control.add_listener(self.stop)
+        remaining = self.budget.remaining_seconds()
+        timer = asyncio.get_running_loop().call_later(remaining, self.check_budget) if remaining is not None else None
+        try:
+            await self._supervise(processes, events)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            loop = asyncio.get_running_loop()
+            for process in processes:
+                await loop.run_in_executor(None, process.join, settings.SCAN_STOP_TIMEOUT)
+                if process.is_alive():
+                    logger.warning(f"Terminating {process.name} of scan {self.session_uuid}")
+                    process.terminate()
+
+        if self.errors:
+            raise RuntimeError(f"Crawl shards failed: {'; '.join(self.errors.values())}")
+        progress = self.progress()
+        if self.budget.exhausted:
+            logger.info(f"Crawling stopped: {self.budget.exhausted} budget ran out. Visited {progress['urls_crawled']} URLs")
+        elif self.control.stopping:
+            logger.info(f"Crawling stopped ({self.control.requested.value}). Visited {progress['urls_crawled']} URLs")
+        else:
+            logger.info(f"Crawling completed. Visited {progress['urls_crawled']} URLs")
+
+    async def _supervise(self, processes: List[Any], events: Any):
+        """Handle shard events until every shard is done."""
+        loop = asyncio.get_running_loop()
+        stopped = set()
+        done = set()
+        while len(done) < self.processes:
+            event = await loop.run_in_executor(None, _poll, events)
+            if event is None:
+                # A shard that died without a word counts as failed
+                for index, process in enumerate(processes):
+                    if index not in done and process.exitcode is not None:
+                        event = (FAILED, index, f"{process.name} exited with code {process.exitcode}")
+                        break
+                else:
+                    continue
+
+            kind, index = event[0], event[1]
+            if kind == STATUS:
+                self._update_status(index, event[2])
+            elif kind == PAGES:
+                if self.pipeline is not None:
+                    for row in event[2]:
+                        await self.pipeline.submit(row)
+            elif kind == STOPPED:
+                self._update_status(index, event[2])
+                stopped.add(index)
+            elif kind == DONE:
+                self.shard_status[index] = event[2]
+                self.shard_reports[index] = event[3]
+                stopped.add(index)
+                done.add(index)
+            elif kind == FAILED:
+                self.errors[index] = event[2]
+                stopped.add(index)
+                done.add(index)
+                self.stop()
+
+            if len(stopped) == self.processes and not self._draining:
+                self._draining = True
+                self._broadcast(DRAIN)
+
+
+    def _update_status(self, index: int, status: Dict[str, Any]):
+        """Record a shard's counters, update the budget and check whether the crawl is over."""
+        self.shard_status[index] = status
+        self.budget.bytes_used = sum(shard["bytes_downloaded"] for shard in self.shard_status.values())
+        self.budget.pages_over_size = sum(shard["pages_over_size"] for shard in self.shard_status.values())
+        self.check_budget()
+
+        self._fresh.add(index)
+        if self._finishing or len(self._fresh) < self.processes:
+            return
+        # A full round of reports: finished if nothing changed since an idle round with nothing in transit
+        self._fresh.clear()
+        shards = [self.shard_status[i] for i in range(self.processes)]
+        counters = tuple((shard["sent"], shard["received"]) for shard in shards)
+        idle = all(shard["idle"] for shard in shards) and \
+            sum(shard["sent"] for shard in shards) == sum(shard["received"] for shard in shards)
+        if idle and counters == self._last_round:
+            self._finishing = True
+            self._broadcast(FINISH)
+        self._last_round = counters if idle else None
+
+    def _broadcast(self, kind: str):
+        for inbox in self._inboxes:
+            inbox.put((kind,))
+
+    def stop(self):
+        """Stop all shards; pending URLs stay in their frontiers."""
+        if not self._stopping:
+            self._stopping = True
+            self._broadcast(STOP)
+
+    def check_budget(self):
+        """Stop the shards once the size or duration budget has run out."""
+        if self.budget.check() is not None:
+            self.stop()
+
+    async def flush(self):
+        """Resources and frontiers are flushed by the shard processes when they exit."""
+
+    async def close(self):
+        """Nothing to release: the shard processes close their crawlers themselves."""
+
+    def progress(self) -> Dict[str, Any]:
+        """Return live crawl counters summed over the shards."""
+        shards = self.shard_status.values()
+        return {
+            "urls_crawled": sum(shard["urls_crawled"] for shard in shards),
+            "urls_queued": sum(shard["urls_queued"] for shard in shards),
+            "bytes_downloaded": sum(shard["bytes_downloaded"] for shard in shards)
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Return the shards' crawl reports merged, for the scan stats.
+
+        Templates and trap patterns are learned per shard, so a template
+        spread over hosts of several shards is listed once per shard.
+        """
+        reports = [self.shard_reports[index] for index in sorted(self.shard_reports)]
+        skipped = Counter()
+        for report in reports:
+            skipped.update(report["skipped"])
+        largest = [template for report in reports for template in report["templates"]["largest"]]
+        return {
+            "templates": {
+                "count": sum(report["templates"]["count"] for report in reports),
+                "max_pages_per_template": self.config.get("max_pages_per_template"),
+                "largest": largest[:settings.CRAWLER_TEMPLATE_STATS_LIMIT]
+            },
+            "traps": {
+                "fetches_saved": sum(report["traps"]["fetches_saved"] for report in reports),
+                "patterns": [pattern for report in reports for pattern in report["traps"]["patterns"]]
+            },
+            "skipped": dict(skipped),
+            "budget": self.budget.to_dict(),
+            "workers": [report.get("workers") for report in reports],
+            "shards": [
+                {"shard": index, **{key: status[key] for key in ("hosts", "urls_crawled", "sent", "received")}}
+                for index, status in sorted(self.shard_status.items())
+            ]
+        }
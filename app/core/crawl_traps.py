@@ -0,0 +1,183 @@
+import logging
+import re
+import urllib.parse
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple, Any
+
+from app.core.config import settings
+from app.core.url_template import TRACKING_PARAMS, url_template
+
+logger = logging.getLogger(__name__)
+
+# Suppression reasons, as recorded in the frontier and the crawl report
+PATH_DEPTH = "trap_path_depth"
+PATH_REPETITION = "trap_path_repetition"
+PARAM_VALUES = "trap_param_values"
+QUERY_VARIANTS = "trap_query_variants"
+GROWING_PARAM = "trap_growing_param"
+FUTURE_DATE = "trap_future_date"
+TRAP_REASONS = frozenset({PATH_DEPTH, PATH_REPETITION, PARAM_VALUES, QUERY_VARIANTS, GROWING_PARAM, FUTURE_DATE})
+
+_INTEGER_RE = re.compile(r'^-?\d{1,15}$')
+# Calendar values: 2031, 2031-05, 2031-05-17, 20310517
+_DATE_VALUE_RE = re.compile(r'^((?:19|20)\d{2})(?:-?(0[1-9]|1[0-2])(?:-?(0[1-9]|[12]\d|3[01]))?)?$')
+_YEAR_SEGMENT_RE = re.compile(r'^(19|20)\d{2}$')
+
+
+def _numeric_value(value: str) -> Optional[int]:
+    """Return a query value as a number if it is an integer or a date."""
+    if _DATE_VALUE_RE.match(value):
+        return int(value.replace('-', ''))
+    if _INTEGER_RE.match(value):
+        return int(value)
+    return None
+
+
+def _query_params(query: str) -> List[Tuple[str, str]]:
+    """Return the query parameters that can change the page."""
+    return [
+        (key, value) for key, value in urllib.parse.parse_qsl(query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+    ]
+
+
+def _year(value: str) -> Optional[int]:
+    """Return the year of a date-like value (2031, 2031-05, 2031-05-17)."""
+    match = _DATE_VALUE_RE.match(value)
+    return int(match.group(1)) if match else None
+
+
+class TrapDetector:
+    """
+    Heuristics for infinite URL spaces, applied to newly discovered links.
+
+    Calendars, faceted search, session ids in paths and ever-growing
+    ?page= values generate new URLs faster than they can be crawled. A URL
+    is suppressed when:
+
+    - its path is deeper than CRAWLER_TRAP_MAX_PATH_DEPTH segments
+    - one path segment repeats more than CRAWLER_TRAP_MAX_SEGMENT_REPEATS
+      times (/a/b/a/b/a/b, relative-link loops)
+    - a query parameter of its path already had CRAWLER_TRAP_MAX_PARAM_VALUES
+      distinct values (session ids, search terms)
+    - its path already had CRAWLER_TRAP_MAX_QUERY_VARIANTS distinct query
+      strings (facet combinations)
+    - a numeric query parameter of its path has set a new maximum more than
+      CRAWLER_TRAP_MAX_GROWING_STEPS times (next-page and next-month links)
+    - it points more than CRAWLER_TRAP_MAX_YEARS_AHEAD years into the future
+      (calendar pages)
+
+    Only URLs that pass are counted towards the per-path limits, so the
+    first values of a parameter are always crawled.
+    """
+
+    def __init__(self):
+        self._param_values: Dict[Tuple[str, str], Set[str]] = {}  # (path, param) -> values seen
+        self._param_max: Dict[Tuple[str, str], int] = {}  # (path, param) -> largest number seen
+        self._param_growth: Counter = Counter()  # (path, param) -> times a new maximum was set
+        self._query_variants: Dict[str, Set[str]] = {}  # path -> query strings seen
+        self.patterns: Counter = Counter()  # (reason, pattern) -> URLs suppressed
+        self.max_year = datetime.now().year + settings.CRAWLER_TRAP_MAX_YEARS_AHEAD
+
+    def check(self, url: str) -> Optional[str]:
+        """
+        Check a newly discovered URL and learn from it if it passes.
+
+        Args:
+            url: Normalized URL
+
+        Returns:
+            The suppression reason, or None if the URL may be crawled
+        """
+        parsed = urllib.parse.urlsplit(url)
+        path_key = parsed.netloc + parsed.path
+        params = _query_params(parsed.query)
+
+        trap = self._check_path(parsed.path) or self._check_query(path_key, parsed.path, params)
+        if trap is not None:
+            reason, pattern = trap
+            self.patterns[(reason, f"{parsed.netloc}{pattern}")] += 1
+            logger.debug(f"Suppressed {url}: {reason}")
+            return reason
+
+        self._learn(path_key, params)
+        return None
+
+    def observe(self, url: str):
+        """Learn from a URL queued without a check, e.g. one restored from the frontier."""
+        parsed = urllib.parse.urlsplit(url)
+        self._learn(parsed.netloc + parsed.path, _query_params(parsed.query))
+
+    def _check_path(self, path: str) -> Optional[Tuple[str, str]]:
+        segments = [segment for segment in path.split('/') if segment]
+        if len(segments) > settings.CRAWLER_TRAP_MAX_PATH_DEPTH:
+            return PATH_DEPTH, '/' + '/'.join(segments[:settings.CRAWLER_TRAP_MAX_PATH_DEPTH]) + '/...'
+
+        segment, repeats = Counter(segments).most_common(1)[0] if segments else ('', 0)
+        if repeats > settings.CRAWLER_TRAP_MAX_SEGMENT_REPEATS:
+            return PATH_REPETITION, f"/.../{segment}/... x{repeats}"
+
+        for segment in segments:
+            if _YEAR_SEGMENT_RE.match(segment) and int(segment) > self.max_year:
+                return FUTURE_DATE, url_template(path).split('?')[0]
+        return None
+
+    def _check_query(self, path_key: str, path: str, params: List[Tuple[str, str]]) -> Optional[Tuple[str, str]]:
+        if not params:
+            return None
+
+        query = urllib.parse.urlencode(sorted(params))
+        variants = self._query_variants.get(path_key)
+        if variants is not None and query not in variants and len(variants) >= settings.CRAWLER_TRAP_MAX_QUERY_VARIANTS:
+            return QUERY_VARIANTS, f"{path}?..."
+
+        for key, value in params:
+            year = _year(value)
+            if year is not None and year > self.max_year:
+                return FUTURE_DATE, f"{path}?{key}="
+
+            values = self._param_values.get((path_key, key))
+            if values is not None and value not in values and len(values) >= settings.CRAWLER_TRAP_MAX_PARAM_VALUES:
+                return PARAM_VALUES, f"{path}?{key}="
+
+            number = _numeric_value(value)
+            maximum = self._param_max.get((path_key, key))
+            if (number is not None and maximum is not None and number > maximum
+                    and self._param_growth[(path_key, key)] >= settings.CRAWLER_TRAP_MAX_GROWING_STEPS):
+                return GROWING_PARAM, f"{path}?{key}="
+        return None
+
+    def _learn(self, path_key: str, params: List[Tuple[str, str]]):
+        if not params:
+            return
+        variants = self._query_variants.setdefault(path_key, set())
+        if len(variants) < settings.CRAWLER_TRAP_MAX_QUERY_VARIANTS:
+            variants.add(urllib.parse.urlencode(sorted(params)))
+
+        for key, value in params:
+            values = self._param_values.setdefault((path_key, key), set())
+            if len(values) < settings.CRAWLER_TRAP_MAX_PARAM_VALUES:
+                values.add(value)
+
+            number = _numeric_value(value)
+            if number is None:
+                continue
+            maximum = self._param_max.get((path_key, key))
+            if maximum is None or number > maximum:
+                if maximum is not None:
+                    self._param_growth[(path_key, key)] += 1
+                self._param_max[(path_key, key)] = number
+
+    def stats(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the URL patterns that were cut most often.
+
+        Args:
+            limit: Maximum number of patterns; defaults to CRAWLER_TEMPLATE_STATS_LIMIT
+        """
+        limit = limit or settings.CRAWLER_TEMPLATE_STATS_LIMIT
+        return [
+            {"reason": reason, "pattern": pattern, "urls": count}
+            for (reason, pattern), count in self.patterns.most_common(limit)
+        ]
@@ -1,17 +1,44 @@
 import logging
 import asyncio
-import re
 import urllib.parse
 from typing import List, Dict, Set, Optional, Any
-from bs4 import BeautifulSoup
-import aiohttp
-import robots
-import hashlib
+from collections import Counter
+from contextlib import aclosing
+import os
 import time
+from datetime import datetime
 
 from app.core.config import settings
+from app.core.host_scheduler import ASSET_LANE, PAGE_LANE, THROTTLE_STATUS_CODES, HostScheduler, parse_retry_after
+from app.core.frontier import CrawlFrontier
+from app.core.seen_set import create_seen_set
+from app.core.cache_manager import CacheManager
+from app.core.parse_worker import parse_pool
+from app.core.near_duplicate import NearDuplicateIndex
+from app.core.url_filter import UrlFilter
+from app.core.robots_cache import robots_cache
+from app.core.http_client import http_client
+from app.core.fetcher import get_fetcher
+from app.core.scan_control import ScanControl
+from app.core.scan_budget import ScanBudget
+from app.core.scan_pipeline import ScanPipeline
+from app.core.scan_scheduler import scan_scheduler
+from app.core.sitemap import SitemapSeeder, parse_lastmod, parse_priority
+from app.core.url_priority import UrlScorer
+from app.core.url_template import TemplateClusters
+from app.core.crawl_traps import TRAP_REASONS, TrapDetector
+from app.core.crawl_shards import ShardLink
+from app.core.resource_writer import ResourceWriter
+from app.core.worker_autoscaler import WorkerAutoscaler
+from app.core.body_writer import body_writer
+from app.core.downloader import (
+    DownloadResult, Headers, PeekedResponse, declared_length, read_text_body, stream_to_file
+)
 from app.models.resource import Resource
 from app.models.metadata import Metadata
+from app.models.validation import Validation
+from app.models.search_index import SearchIndex
+from app.models.scan_status import ScanStatus
 
 logger = logging.getLogger(__name__)
 
@@ -20,86 +47,352 @@ class Crawler:
     URL discovery and crawling module based on selected operation mode.
     """
     
-    def __init__(self, session_uuid: str, config: Dict[str, Any], db_session):
-        """Initialize the crawler with scan configuration."""
+    def __init__(self, session_uuid: str, config: Dict[str, Any], db_session, cache_path: Optional[str] = None,
+                 control: Optional[ScanControl] = None, budget: Optional[ScanBudget] = None,
+                 pipeline: Optional[ScanPipeline] = None, shard: Optional[ShardLink] = None):
+        """
+        Initialize the crawler with scan configuration.
+        
+        With a `shard`, the crawler runs in one of several crawl processes
+        and fetches only the hosts the shard owns, forwarding other URLs.
+        """
         self.session_uuid = session_uuid
         self.config = config
         self.db_session = db_session
-        self.visited_urls = set()
-        self.queued_urls = set()
-        self.robots_parsers = {}  # Cache for robots.txt parsers
-        self.url_fingerprints = {}  # For duplicate content detection
+        self.control = control or ScanControl()  # Pause/cancel signals, checked between URLs
+        self.budget = budget or ScanBudget.from_config(config)  # Size, duration and rate ceilings
+        self.pipeline = pipeline  # Stages that take stored pages while the crawl runs
+        self.shard = shard  # Hosts owned by this crawl process, with sharded crawling
+        self.cache_path = cache_path or os.path.join(settings.STORAGE_DIR, session_uuid)
+        # Each shard keeps its own frontier and seen sets; bodies share the scan cache
+        state_path = os.path.join(self.cache_path, f"shard-{shard.index}") if shard else self.cache_path
+        
+        # Seen-URL sets; the "bloom" backend keeps exact URLs on disk
+        seen_set_backend = self.config.get("seen_set_backend") or "exact"
+        self.visited_urls = create_seen_set(seen_set_backend, state_path, "visited")
+        self.queued_urls = create_seen_set(seen_set_backend, state_path, "queued")
+        self.frontier = CrawlFrontier(state_path)  # Queue, progress and fingerprints on disk
+        self.templates = TemplateClusters()  # Queued URLs grouped by URL template, for sampling and stats
+        self.scorer = UrlScorer(self.templates)  # Best-first order in which queued URLs spend the max_urls budget
+        self.skipped = Counter()  # Reason -> URLs left out of the crawl
+        # Calendars, facets and endless pagination found in links are cut off
+        self.traps = TrapDetector() if self.config.get("detect_crawler_traps", True) else None
         self.common_elements = {}  # For detecting common elements across pages
-        self.session = None  # aiohttp session
+        self.url_queue: Optional[HostScheduler] = None  # Created by start()
+        self.cache_manager = CacheManager(db_session)
+        self.previous_resources = {}  # Stored resources of the last scan, for incremental mode
+        self.unchanged_urls = set()  # Pages whose sitemap lastmod predates the previous scan
+        threshold = self.config.get("near_duplicate_threshold")
+        self.near_duplicates = NearDuplicateIndex(threshold) if threshold else None
+        self.resource_writer = ResourceWriter(db_session.get_bind())  # Batched Resource inserts
+        self.resource_writer.add_listener(self.on_resources_written)
+        if self.pipeline is not None:
+            self.resource_writer.add_listener(self.feed_pipeline)
+        self.pending_copies = {}  # URL -> previous resource id, for 304 pages awaiting their row id
+        self.session = None  # aiohttp session borrowed from the shared HTTP client
+        self.fetcher = get_fetcher(self.config.get("fetcher"))  # Page requests, HTTP/1.1 or HTTP/2
+        # Page workers: fixed at max_threads, or moved between min_threads and
+        # max_threads by the autoscaler from measured throughput. Autoscaling
+        # stops at the shared fetch slots, as further workers would only queue for one
+        self.max_page_workers = min(self.config.get("max_threads", 4), settings.CRAWLER_MAX_WORKERS)
+        self.autoscaler = WorkerAutoscaler(
+            self.config.get("min_threads", 1), min(self.max_page_workers, scan_scheduler.fetch.capacity)
+        ) if self.config.get("autoscale_workers") else None
+        self.page_workers = 0  # running page workers
+        self.idle_page_workers = 0  # page workers waiting for a URL
+        self._page_worker_target = 0
+        self._page_tasks: Set[asyncio.Task] = set()
+        self._closed = False
         logger.info(f"Crawler initialized for scan {session_uuid}")
     
-    async def start(self, start_url: str):
-        """Start the crawling process from the initial URL."""
+    async def start(self, start_url: str, resume: bool = False):
+        """
+        Start the crawling process from the initial URL.
+        
+        Args:
+            start_url: URL to start crawling from
+            resume: Continue from the on-disk frontier of an interrupted crawl
+        """
         logger.info(f"Starting crawl from {start_url}")
         
         # Normalize the starting URL
         normalized_url = self.normalize_url(start_url)
         self.base_domain = self.extract_domain(normalized_url)
+        self.url_filter = UrlFilter.from_config(self.config, self.base_domain)
         
-        # Initialize URL queue with starting URL
-        self.url_queue = asyncio.Queue()
-        await self.url_queue.put((normalized_url, 0))  # (url, depth)
-        self.queued_urls.add(normalized_url)
+        # Incremental scans revalidate pages against the previous scan
+        if self.config.get("mode") == "incremental":
+            self.previous_resources = self.load_previous_resources()
         
-        # Create aiohttp session
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                'User-Agent': settings.CRAWLER_USER_AGENT
-            }
+        # Connections, DNS results and TLS setup are shared with other scans
+        self.session = http_client.session()
+        
+        self.resource_writer.start()
+        
+        # Initialize the per-host frontier with the starting URL
+        self.url_queue = HostScheduler(
+            self.frontier, self.scorer,
+            budget=self.config.get("max_urls", 1000),
+            dispatch_filter=self.within_template_sample,
+            rate_limit=self.budget.max_requests_per_second,
+            dispatch_counter=self.shard.dispatch_counter if self.shard else None
         )
+        if self.shard is not None:
+            # Other shards may still send URLs after this one runs dry
+            self.url_queue.hold()
+        # On pause or cancel, idle workers wake up and exit; queued URLs stay on disk
+        self.control.add_listener(self.url_queue.stop)
+        if resume and self.frontier.has_state():
+            self.restore_frontier()
+        elif self.shard is None or self.shard.owns(normalized_url):
+            # With sharded crawling, the shard owning the start URL seeds the crawl
+            await self.url_queue.put((normalized_url, 0))  # (url, depth)
+            self.queued_urls.add(normalized_url)
+            if self.config.get("use_sitemaps"):
+                await self.seed_from_sitemaps(normalized_url)
+        
+        # Start workers based on config; per-host limits are enforced by the scheduler
+        asset_worker_count = min(self.config.get("max_asset_threads", 8), 32)
+        if self.autoscaler is not None:
+            worker_count = self.autoscaler.workers
+            logger.info(
+                f"Starting {worker_count} page workers (autoscaled between {self.autoscaler.minimum} "
+                f"and {self.autoscaler.maximum}) and {asset_worker_count} asset workers"
+            )
+        else:
+            worker_count = self.max_page_workers
+            logger.info(f"Starting {worker_count} page workers and {asset_worker_count} asset workers")
         
+        # The duration budget also stops workers waiting for a URL
+        remaining = self.budget.remaining_seconds()
+        timer = asyncio.get_running_loop().call_later(remaining, self.check_budget) if remaining is not None else None
+        
+        asset_tasks = {asyncio.create_task(self.worker(ASSET_LANE)) for _ in range(asset_worker_count)}
+        self.resize_page_workers(worker_count)
+        autoscaling = None
+        if self.autoscaler is not None:
+            autoscaling = asyncio.create_task(
+                self.autoscaler.run(self.resize_page_workers, self.idle_workers)
+            )
         try:
-            # Start workers based on config
-            worker_count = min(self.config.get("max_threads", 4), 16)
-            logger.info(f"Starting {worker_count} crawler workers")
-            
-            workers = [self.worker() for _ in range(worker_count)]
-            await asyncio.gather(*workers)
-            
+            await self.wait_for_workers(asset_tasks)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            leftover = [task for task in asset_tasks | self._page_tasks if not task.done()]
+            if autoscaling is not None:
+                leftover.append(autoscaling)
+            for task in leftover:
+                task.cancel()
+            await asyncio.gather(*leftover, return_exceptions=True)
+        
+        if self.budget.exhausted:
+            logger.info(f"Crawling stopped: {self.budget.exhausted} budget ran out. Visited {len(self.visited_urls)} URLs")
+        elif self.control.stopping:
+            logger.info(f"Crawling stopped ({self.control.requested.value}). Visited {len(self.visited_urls)} URLs")
+        else:
             logger.info(f"Crawling completed. Visited {len(self.visited_urls)} URLs")
+    
+    async def flush(self):
+        """Write every buffered resource and checkpoint the frontier."""
+        await self.resource_writer.flush()
+        self.frontier.checkpoint()
+    
+    async def close(self):
+        """Flush buffered resources and release the frontier and seen-set files."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self.resource_writer.close()
         finally:
-            await self.session.close()
+            self.frontier.close()
+            self.visited_urls.close()
+            self.queued_urls.close()
     
-    async def worker(self):
-        """Worker process that fetches URLs from the queue and processes them."""
-        while True:
-            try:
-                url, depth = await self.url_queue.get()
-                
-                # Skip if we've already processed this URL
-                if url in self.visited_urls:
-                    self.url_queue.task_done()
+    async def seed_from_sitemaps(self, start_url: str):
+        """
+        Queue the pages listed in the site's sitemaps, as links of the start page.
+        
+        Sitemaps come from robots.txt, falling back to /sitemap.xml. In
+        incremental mode, pages whose lastmod is not newer than the previous
+        scan's download are reused without a request.
+        """
+        rules = await robots_cache.get(self.session, start_url)
+        sitemap_urls = rules.sitemaps or [f"{robots_cache.origin_for(start_url)}/sitemap.xml"]
+        
+        seeder = SitemapSeeder(self.session)
+        queued = 0
+        async with aclosing(seeder.urls(sitemap_urls)) as entries:
+            async for url, lastmod, priority in entries:
+                if self.control.stopping:
+                    break
+                if self.queue_full():
+                    logger.info("Maximum URL limit reached while reading sitemaps")
+                    break
+                if not self.should_crawl_url(url):
                     continue
-                
-                # Check if we've reached the maximum depth
-                max_depth = self.config.get("max_depth", 3)
-                if depth > max_depth:
-                    self.url_queue.task_done()
+                normalized_url = self.normalize_url(url)
+                sitemap_priority = parse_priority(priority)
+                if sitemap_priority is not None:
+                    self.scorer.set_sitemap_priority(normalized_url, sitemap_priority)
+                if self.shard is not None and not self.shard.owns(normalized_url):
+                    self.shard.forward([normalized_url], 1)
+                    continue
+                if normalized_url in self.queued_urls:
+                    self.url_queue.reprioritize(normalized_url)
                     continue
                 
-                # Process the URL
-                await self.process_url(url, depth)
-                
-                # Mark the task as done
-                self.url_queue.task_done()
+                previous = self.previous_resources.get(normalized_url)
+                modified = parse_lastmod(lastmod)
+                if previous and modified and previous.download_time and modified <= previous.download_time:
+                    self.unchanged_urls.add(normalized_url)
                 
-                # Check if we're done (queue empty and all workers idle)
-                if self.url_queue.empty() and all(w.done() for w in asyncio.all_tasks() if w is not asyncio.current_task()):
+                await self.url_queue.put((normalized_url, 1))
+                self.queued_urls.add(normalized_url)
+                queued += 1
+        
+        logger.info(
+            f"Seeded {queued} URLs from {seeder.files_read} sitemaps "
+            f"({len(self.unchanged_urls)} unchanged since the previous scan)"
+        )
+    
+    def restore_frontier(self):
+        """Reload crawl progress saved by an interrupted run of this scan."""
+        self.frontier.reset_loaded()
+        
+        # Pages with a stored resource never need fetching again, and bytes
+        # downloaded before the interruption count against the size budget;
+        # with sharded crawling each shard takes back the pages of its hosts
+        stored = self.db_session.query(Resource.normalized_url, Resource.content_length).filter(
+            Resource.uuid == self.session_uuid
+        )
+        downloaded = 0
+        for url, content_length in stored:
+            if self.shard is None or self.shard.owns(url):
+                self.frontier.mark_done(url)
+                downloaded += content_length or 0
+        self.budget.add_bytes(downloaded)
+        self.frontier.checkpoint()
+        
+        # Rebuild the near-duplicate index from the stored cluster representatives
+        if self.near_duplicates is not None:
+            representatives = self.db_session.query(Resource.simhash, Resource.normalized_url).filter(
+                Resource.uuid == self.session_uuid,
+                Resource.duplicate_cluster == Resource.normalized_url
+            )
+            for signature, url in representatives:
+                if self.shard is None or self.shard.owns(url):
+                    self.near_duplicates.add(int(signature, 16), url)
+        
+        for url in self.frontier.done_urls():
+            self.visited_urls.add(url)
+            self.queued_urls.add(url)
+            # Fetched URLs count against the budget and their template's novelty
+            self.url_queue.count_dispatched()
+            self.scorer.add_url(url)
+            self.scorer.mark_dispatched(url)
+            if self.traps is not None:
+                self.traps.observe(url)
+        for url in self.frontier.pending_urls():
+            self.queued_urls.add(url)
+            self.scorer.add_url(url)
+            if self.traps is not None:
+                self.traps.observe(url)
+        for url, reason in self.frontier.skipped_urls():
+            self.queued_urls.add(url)
+            self.templates.add(url)
+            self.templates.record("skipped", url)
+            self.skipped[reason] += 1
+        
+        pending = 0
+        for host, count in self.frontier.pending_counts():
+            self.url_queue.restore(host, count)
+            pending += count
+        logger.info(f"Resuming crawl with {len(self.visited_urls)} processed and {pending} pending URLs")
+    
+    def resize_page_workers(self, count: int):
+        """Start page workers up to `count`; surplus workers retire before taking their next URL."""
+        self._page_worker_target = count
+        while self.page_workers < count:
+            self.page_workers += 1
+            self._page_tasks.add(asyncio.create_task(self.worker(PAGE_LANE)))
+
+    def idle_workers(self) -> int:
+        """Workers waiting for a URL or for a shared fetch slot, which more workers would not help."""
+        return self.idle_page_workers + scan_scheduler.fetch.waiting_for(self.session_uuid)
+
+    async def wait_for_workers(self, asset_tasks: Set[asyncio.Task]):
+        """Wait until every worker has exited, including page workers started meanwhile."""
+        finished = set()
+        while True:
+            pending = (asset_tasks | self._page_tasks) - finished
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            finished |= done
+            for task in done:
+                task.result()
+
+    async def worker(self, lane: str = PAGE_LANE):
+        """Worker process that fetches URLs of one scheduler lane and processes them."""
+        try:
+            while True:
+                if lane == PAGE_LANE:
+                    if self.page_workers > self._page_worker_target:
+                        # Retired by the autoscaler
+                        break
+                    if self.pipeline is not None:
+                        # Fetch no more pages while a stage downstream is backed up
+                        await self.pipeline.wait_for_room()
+                    self.idle_page_workers += 1
+                    try:
+                        item = await self.url_queue.get(lane)
+                    finally:
+                        self.idle_page_workers -= 1
+                else:
+                    item = await self.url_queue.get(lane)
+                if item is None:
+                    # Frontier exhausted and no requests in flight
                     break
+                
+                url, depth = item
+                try:
+                    # Skip if we've already processed this URL
+                    if url in self.visited_urls:
+                        continue
                     
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in crawler worker: {str(e)}", exc_info=True)
+                    # Check if we've reached the maximum depth
+                    max_depth = self.config.get("max_depth", 3)
+                    if depth > max_depth:
+                        continue
+                    
+                    # Process the URL; stored pages are marked done once their row is written
+                    resource = await self.process_url(url, depth)
+                    if resource is None:
+                        self.frontier.mark_done(url)
+                    if self.autoscaler is not None and lane == PAGE_LANE:
+                        self.autoscaler.record_page()
+                    
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error in crawler worker: {str(e)}", exc_info=True)
+                    self.frontier.mark_done(url)
+                finally:
+                    # Release the host slot taken by get()
+                    self.url_queue.task_done(url)
+        finally:
+            if lane == PAGE_LANE:
+                self.page_workers -= 1
     
-    async def process_url(self, url: str, depth: int):
-        """Process a URL: download it, extract links, and queue new URLs."""
+    async def process_url(self, url: str, depth: int) -> Optional[Dict[str, Any]]:
+        """
+        Process a URL: download it, extract links, and queue new URLs.
+        
+        Returns:
+            The buffered resource row, or None if nothing was stored
+        """
         logger.debug(f"Processing URL: {url} at depth {depth}")
         
         # Mark as visited to avoid duplicates
@@ -108,25 +401,47 @@ class Crawler:
         # Check if we should respect robots.txt
         if self.config.get("respect_robots_txt", True) and not await self.is_allowed_by_robots(url):
             logger.debug(f"URL {url} disallowed by robots.txt")
-            return
+            return None
         
-        # Download the URL
-        content, headers = await self.download_url(url)
-        if not content:
-            return
+        # Download the URL; the fetch slot is shared fairly with other running scans
+        async with scan_scheduler.fetch_slot(self.session_uuid):
+            result = await self.download_url(url)
+        if not result.ok:
+            return None
+        
+        # Only HTML pages are parsed and checked for duplicates
+        if not result.is_html:
+            return await self.create_resource_record(url, result, depth)
         
-        # Create a resource record in the database
-        resource = await self.create_resource_record(url, content, headers, depth)
+        # Parse in the process pool so parsing overlaps with fetching
+        async with scan_scheduler.parse_slot(self.session_uuid):
+            parsed = await parse_pool.parse(result.content, url, result.charset)
+        
+        # Assign the page to a near-duplicate cluster before storing it
+        cluster, near_duplicate = None, False
+        if self.near_duplicates is not None:
+            cluster, near_duplicate = self.near_duplicates.assign(parsed["simhash"], self.normalize_url(url))
+        
+        # Buffer a resource record for the database
+        resource = await self.create_resource_record(
+            url, result, depth, simhash=parsed["simhash"], duplicate_cluster=cluster
+        )
         
         # Check if this is a duplicate page based on content fingerprint
-        if self.is_duplicate_content(url, content):
+        if self.is_duplicate_content(url, parsed["fingerprint"]):
             logger.debug(f"URL {url} is duplicate content")
-            return
+            return resource
+        
+        # Near-duplicates are stored but their links are not followed
+        if near_duplicate:
+            logger.debug(f"URL {url} is a near-duplicate of {cluster}")
+            return resource
         
         # Extract and process links based on the crawl mode
         if self.should_extract_links(url, depth):
-            new_urls = await self.extract_links(url, content)
+            new_urls = await self.extract_links(parsed["links"])
             await self.queue_urls(new_urls, depth + 1)
+        return resource
     
     def normalize_url(self, url: str) -> str:
         """Normalize a URL according to the URL normalization process."""
@@ -187,113 +502,280 @@ class Crawler:
         parsed = urllib.parse.urlparse(url)
         return parsed.netloc.lower()
 
-    async def download_url(self, url: str) -> tuple[Optional[str], dict]:
-        """Download a URL and return its content and headers."""
+    def load_previous_resources(self) -> Dict[str, Any]:
+        """
+        Load the resources stored by the last completed scan of the same site.
+        
+        Returns:
+            Dictionary of normalized URL to the previous resource's id, etag,
+            last_modified, hash, mime_type, local_path and download_time
+        """
+        current = self.db_session.query(Metadata).filter(Metadata.uuid == self.session_uuid).first()
+        if not current:
+            return {}
+        
+        previous_scan = self.db_session.query(Metadata).filter(
+            Metadata.normalized_url == current.normalized_url,
+            Metadata.uuid != self.session_uuid,
+            Metadata.status == ScanStatus.COMPLETED.value
+        ).order_by(Metadata.end_time.desc()).first()
+        if not previous_scan:
+            logger.info("No previous completed scan found; incremental scan will fetch everything")
+            return {}
+        
+        rows = self.db_session.query(
+            Resource.normalized_url, Resource.id, Resource.etag, Resource.last_modified,
+            Resource.hash, Resource.mime_type, Resource.local_path, Resource.download_time
+        ).filter(
+            Resource.uuid == previous_scan.uuid,
+            Resource.local_path.isnot(None)
+        )
+        previous = {row.normalized_url: row for row in rows}
+        logger.info(f"Loaded {len(previous)} stored resources from scan {previous_scan.uuid}")
+        return previous
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers from stored validators."""
+        headers = {}
+        previous = self.previous_resources.get(url)
+        if previous:
+            if previous.etag:
+                headers['If-None-Match'] = previous.etag
+            if previous.last_modified:
+                headers['If-Modified-Since'] = previous.last_modified
+        return headers
+
+    async def download_url(self, url: str) -> DownloadResult:
+        """
+        Download a URL, checking its headers before reading the body.
+        
+        HTML/CSS/JS bodies are read in chunks up to CRAWLER_MAX_TEXT_BYTES;
+        other bodies are streamed to their cache path, up to
+        CRAWLER_MAX_ASSET_BYTES. The SHA-256 is computed while streaming.
+        In incremental mode the request is conditional on the previous
+        scan's validators, and a 304 response returns the stored body; pages
+        the sitemap reports as unchanged are not requested at all. Requests go
+        through the scan's fetcher backend (HTTP/1.1 or HTTP/2).
+        """
+        started = time.monotonic()
+        if url in self.unchanged_urls and url in self.previous_resources:
+            # The sitemap says the page has not changed since the previous scan
+            result = DownloadResult(url, 304)
+            if self.read_previous_body(result):
+                return result
         try:
-            async with self.session.get(url) as response:
+            async with self.fetcher.stream(url, self.conditional_headers(url)) as response:
+                self.report_response(
+                    url,
+                    response.status,
+                    time.monotonic() - started,
+                    parse_retry_after(response.headers.get('Retry-After'))
+                )
+                result = DownloadResult(url, response.status, response.headers)
+                
                 if response.status == 200:
-                    content = await response.text()
-                    headers = dict(response.headers)
-                    return content, headers
+                    await self.read_body(response, result)
+                elif response.status == 304 and url in self.previous_resources:
+                    if not self.read_previous_body(result):
+                        # Stored body is gone; fetch the page unconditionally
+                        del self.previous_resources[url]
+                        return await self.download_url(url)
                 else:
                     logger.warning(f"Failed to download {url}: HTTP {response.status}")
-                    return None, {}
+                    result.error = f"HTTP {response.status}"
         except Exception as e:
+            self.report_response(url, None, time.monotonic() - started)
             logger.error(f"Error downloading {url}: {str(e)}")
-            return None, {}
+            result = DownloadResult(url, None)
+            result.error = str(e)
+        
+        result.duration_ms = int((time.monotonic() - started) * 1000)
+        if result.content_length and result.status_code == 200:
+            self.budget.add_bytes(result.content_length)
+            self.check_budget()
+        return result
+
+    def report_response(self, url: str, status: Optional[int], elapsed: float, retry_after: Optional[float] = None):
+        """Feed a response into its host's limits and, for pages, into the worker autoscaler."""
+        self.url_queue.report(url, status, elapsed, retry_after)
+        if self.autoscaler is not None and HostScheduler.lane_for(url) == PAGE_LANE:
+            failed = status is None or status >= 500 or status in THROTTLE_STATUS_CODES
+            self.autoscaler.record_response(elapsed, failed)
 
-    async def create_resource_record(self, url: str, content: str, headers: dict, depth: int) -> Resource:
-        """Create a resource record in the database."""
-        content_length = len(content.encode('utf-8'))
-        mime_type = headers.get('Content-Type', 'text/html')
+    async def read_body(self, response, result: DownloadResult):
+        """
+        Read or stream a 200 response body according to its content type.
         
-        resource = Resource(
+        A missing or generic Content-Type is replaced by the type sniffed
+        from the first bytes of the body. A body over the scan's
+        max_page_bytes budget is dropped rather than truncated, and counted
+        in the budget stats.
+        """
+        length = declared_length(result.headers)
+        if result.needs_sniffing:
+            response = await PeekedResponse.peek(response)
+            result.sniff(response.head)
+        
+        if result.is_text:
+            max_bytes = self.budget.page_limit(settings.CRAWLER_MAX_TEXT_BYTES)
+            if length is not None and length > max_bytes:
+                logger.warning(f"Skipping {result.url}: {length} bytes exceeds text limit")
+                result.error = f"Content-Length {length} exceeds {max_bytes} bytes"
+            else:
+                await read_text_body(response, result, max_bytes)
+                if result.truncated and max_bytes < settings.CRAWLER_MAX_TEXT_BYTES:
+                    result.content = None
+                    result.error = f"Body exceeds {max_bytes} bytes"
+        else:
+            max_bytes = self.budget.page_limit(settings.CRAWLER_MAX_ASSET_BYTES)
+            if length is not None and length > max_bytes:
+                logger.warning(f"Skipping {result.url}: {length} bytes exceeds asset limit")
+                result.error = f"Content-Length {length} exceeds {max_bytes} bytes"
+            else:
+                path = self.cache_manager.get_resource_path(self.session_uuid, result.url, result.cache_type)
+                await stream_to_file(response, result, path, max_bytes)
+        if result.error and self.budget.max_page_bytes is not None and max_bytes == self.budget.max_page_bytes:
+            self.budget.pages_over_size += 1
+
+    def read_previous_body(self, result: DownloadResult) -> bool:
+        """Fill a 304 result with the body and metadata stored by the previous scan."""
+        previous = self.previous_resources[result.url]
+        try:
+            with open(previous.local_path, 'rb') as f:
+                content = f.read()
+        except OSError as e:
+            logger.warning(f"Stored body for {result.url} is unavailable: {str(e)}")
+            return False
+        
+        # A 304 may omit headers that are unchanged since the previous scan
+        headers = Headers(result.headers)
+        for name, value in (('Content-Type', previous.mime_type), ('ETag', previous.etag),
+                            ('Last-Modified', previous.last_modified)):
+            if value and name not in headers:
+                headers[name] = value
+        result.set_headers(headers)
+        
+        result.content = content
+        result.content_length = len(content)
+        result.sha256 = previous.hash
+        return True
+
+    async def save_body(self, result: DownloadResult) -> Optional[str]:
+        """Store an in-memory body under the scan's cache directory and return its path."""
+        if result.local_path or result.content is None:
+            return result.local_path
+        local_path = self.cache_manager.get_resource_path(self.session_uuid, result.url, result.cache_type)
+        await body_writer.write_file(local_path, result.content)
+        return local_path
+
+    async def create_resource_record(self, url: str, result: DownloadResult, depth: int,
+                                     simhash: Optional[int] = None,
+                                     duplicate_cluster: Optional[str] = None) -> Dict[str, Any]:
+        """Buffer a resource record for the write-behind writer and return its row."""
+        previous = self.previous_resources.get(url) if result.status_code == 304 else None
+        
+        resource = dict(
             uuid=self.session_uuid,
             original_url=url,
             normalized_url=self.normalize_url(url),
-            resource_type='html',  # Determine from mime_type
-            mime_type=mime_type,
+            resource_type=result.resource_type,
+            mime_type=result.mime_type,
             is_external=self.extract_domain(url) != self.base_domain,
             domain=self.extract_domain(url),
             path=urllib.parse.urlparse(url).path,
             depth=depth,
             download_status='ok',
-            status_code=200,
-            content_length=content_length,
-            download_time=time.time(),
-            download_duration_ms=0  # Set actual duration
+            status_code=result.status_code,
+            local_path=await self.save_body(result),
+            content_length=result.content_length,
+            download_time=datetime.now(),
+            download_duration_ms=result.duration_ms,
+            hash=result.sha256,
+            etag=result.headers.get('ETag'),
+            last_modified=result.headers.get('Last-Modified'),
+            simhash=f"{simhash:016x}" if simhash is not None else None,
+            duplicate_cluster=duplicate_cluster
         )
         
-        self.db_session.add(resource)
-        self.db_session.commit()
+        if previous:
+            self.pending_copies[url] = previous.id
+        self.resource_writer.add(resource)
         return resource
 
-    def is_duplicate_content(self, url: str, content: str) -> bool:
-        """Check if content is duplicate based on content fingerprint."""
-        fingerprint = hashlib.md5(content.encode('utf-8')).hexdigest()
+    def on_resources_written(self, rows: List[Dict[str, Any]]):
+        """Finish pages whose resource rows have been committed by the writer."""
+        for row in rows:
+            self.frontier.mark_done(row['original_url'])
+        copied = False
+        try:
+            for row in rows:
+                previous_id = self.pending_copies.pop(row['original_url'], None)
+                if previous_id:
+                    self.copy_derived_data(previous_id, row['id'])
+                    copied = True
+            if copied:
+                self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+    async def feed_pipeline(self, rows: List[Dict[str, Any]]):
+        """Hand newly stored pages to the scan pipeline, waiting while it is full."""
+        for row in rows:
+            # Unchanged pages (304) reuse the previous scan's results instead
+            if row['resource_type'] == 'html' and row['status_code'] != 304 and row.get('local_path'):
+                await self.pipeline.submit(row)
+
+    def copy_derived_data(self, previous_id: int, resource_id: int):
+        """Reuse text, validation and search data of an unchanged page from the previous scan."""
+        previous = self.db_session.query(Resource).filter(Resource.id == previous_id).first()
+        if not previous:
+            return
         
-        if fingerprint in self.url_fingerprints:
-            original_url = self.url_fingerprints[fingerprint]
+        self.db_session.query(Resource).filter(Resource.id == resource_id).update(
+            {Resource.text_content: previous.text_content}, synchronize_session=False
+        )
+        for validation in previous.validations:
+            self.db_session.add(Validation(
+                uuid=self.session_uuid,
+                resource_id=resource_id,
+                test_group=validation.test_group,
+                test_id=validation.test_id,
+                test_name=validation.test_name,
+                severity=validation.severity,
+                description=validation.description,
+                element_selector=validation.element_selector,
+                line_number=validation.line_number,
+                column_number=validation.column_number,
+                source_snippet=validation.source_snippet,
+                remediation=validation.remediation
+            ))
+        for entry in previous.search_indices:
+            self.db_session.add(SearchIndex(
+                resource_id=resource_id,
+                element_type=entry.element_type,
+                element_value=entry.element_value,
+                context=entry.context,
+                location=entry.location,
+                frequency=entry.frequency
+            ))
+
+    def is_duplicate_content(self, url: str, fingerprint: str) -> bool:
+        """Check if content is duplicate based on content fingerprint."""
+        original_url = self.frontier.check_fingerprint(fingerprint, url)
+        if original_url:
             logger.debug(f"Duplicate content detected: {url} matches {original_url}")
             return True
         
-        self.url_fingerprints[fingerprint] = url
         return False
 
-    async def extract_links(self, base_url: str, html_content: str) -> List[str]:
-        """Extract links from HTML content."""
-        links = set()
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Extract links from various attributes
-        link_elements = (
-            ('a', 'href'),
-            ('img', 'src'),
-            ('script', 'src'),
-            ('link', 'href'),
-            ('iframe', 'src')
-        )
-        
-        for tag, attr in link_elements:
-            for element in soup.find_all(tag):
-                url = element.get(attr)
-                if url:
-                    absolute_url = urllib.parse.urljoin(base_url, url)
-                    if self.should_crawl_url(absolute_url):
-                        links.add(absolute_url)
-        
-        return list(links)
+    async def extract_links(self, links: List[str]) -> List[str]:
+        """Filter the links parsed from a page down to the crawlable ones."""
+        return [url for url in links if self.should_crawl_url(url)]
 
     def should_crawl_url(self, url: str) -> bool:
         """Determine if a URL should be crawled based on configuration."""
-        # Skip non-HTTP(S) URLs
-        if not url.startswith(('http://', 'https://')):
-            return False
-            
-        # Check domain restrictions
-        domain = self.extract_domain(url)
-        if not self.config.get("follow_external_links", False) and domain != self.base_domain:
-            return False
-            
-        # Check file extensions
-        if any(url.lower().endswith(ext) for ext in settings.SKIP_EXTENSIONS):
-            return False
-            
-        # Apply path restrictions
-        if self.config.get("path_restriction"):
-            path = urllib.parse.urlparse(url).path
-            if not path.startswith(self.config["path_restriction"]):
-                return False
-                
-        # Apply regex filter
-        if self.config.get("regex_pattern"):
-            pattern = re.compile(self.config["regex_pattern"])
-            matches = bool(pattern.search(url))
-            is_inclusive = self.config.get("regex_is_inclusive", True)
-            if matches != is_inclusive:
-                return False
-        
-        return True
+        return self.url_filter.allows(url)
 
     def should_extract_links(self, url: str, depth: int) -> bool:
         """Determine if links should be extracted from this URL."""
@@ -301,10 +783,6 @@ class Crawler:
         if depth >= self.config.get("max_depth", 3):
             return False
             
-        # Don't extract links from non-HTML content
-        if not url.lower().endswith(settings.HTML_EXTENSIONS):
-            return False
-            
         # Check crawl mode restrictions
         mode = self.config.get("mode", "full")
         if mode == "single":
@@ -314,46 +792,131 @@ class Crawler:
             
         return True
 
-    async def queue_urls(self, urls: List[str], depth: int):
-        """Queue URLs for processing."""
+    def queue_full(self) -> bool:
+        """
+        True once the frontier holds enough candidates for the max_urls budget.
+        
+        The scheduler fetches at most max_urls of them, best-first, so the
+        frontier admits CRAWLER_PRIORITY_CANDIDATE_FACTOR times as many to
+        choose from.
+        """
         max_urls = self.config.get("max_urls", 1000)
+        candidates = len(self.queued_urls) - sum(self.skipped.values())
+        return candidates >= max_urls * settings.CRAWLER_PRIORITY_CANDIDATE_FACTOR
+
+    async def queue_urls(self, urls: List[str], depth: int):
+        """Queue URLs for processing and count the links to them."""
+        if depth > self.config.get("max_depth", 3):
+            return
+        
+        urls = list(dict.fromkeys(self.normalize_url(url) for url in urls))
+        if self.shard is not None:
+            # URLs on hosts of other shards go to their owner, which dedupes them
+            urls = self.shard.forward(urls, depth)
         
         for url in urls:
-            # Skip if we've reached the URL limit
-            if len(self.visited_urls) + len(self.queued_urls) >= max_urls:
+            if url in self.visited_urls:
+                continue
+            
+            # Another inbound link raises the URL's priority
+            if url in self.queued_urls:
+                self.scorer.add_link(url)
+                self.url_queue.reprioritize(url)
+                continue
+            
+            # Skip if the frontier is full
+            if self.queue_full():
                 logger.info("Maximum URL limit reached")
                 break
-                
-            # Skip already queued URLs
-            normalized_url = self.normalize_url(url)
-            if normalized_url not in self.queued_urls and normalized_url not in self.visited_urls:
-                await self.url_queue.put((normalized_url, depth))
-                self.queued_urls.add(normalized_url)
-
-    async def is_allowed_by_robots(self, url: str) -> bool:
-        """Check if URL is allowed by robots.txt."""
-        domain = self.extract_domain(url)
-        
-        # Get or create robots.txt parser for this domain
-        if domain not in self.robots_parsers:
-            robots_url = f"https://{domain}/robots.txt"
-            try:
-                async with self.session.get(robots_url) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        parser = robots.Parser.parse(content)
-                        self.robots_parsers[domain] = parser
-                    else:
-                        # No robots.txt or error - allow all
-                        return True
-            except Exception as e:
-                logger.error(f"Error fetching robots.txt for {domain}: {str(e)}")
-                return True
-        
-        # Check if URL is allowed
-        parser = self.robots_parsers.get(domain)
-        if parser:
-            path = urllib.parse.urlparse(url).path
-            return parser.can_fetch(settings.CRAWLER_USER_AGENT, path)
             
+            # Skip URLs that look like part of an infinite URL space
+            trap = self.traps.check(url) if self.traps is not None else None
+            if trap is not None:
+                self.skip_url(url, depth, trap, new=True)
+                continue
+            
+            # Skip if the URL's template already has its sample queued
+            cap = self.config.get("max_pages_per_template")
+            if cap and self.templates.sampled(url) >= cap:
+                self.skip_url(url, depth, "template_sample", new=True)
+                continue
+            
+            self.scorer.add_link(url)
+            await self.url_queue.put((url, depth))
+            self.queued_urls.add(url)
+
+    def check_budget(self):
+        """Stop handing out URLs once the size or duration budget has run out."""
+        if self.budget.check() is not None:
+            self.url_queue.stop()
+
+    def within_template_sample(self, url: str, depth: int) -> bool:
+        """
+        Dispatch filter enforcing max_pages_per_template.
+        
+        Templates are learned while the crawl runs, so URLs queued as
+        distinct templates can merge into one later; this re-checks the cap
+        against the pages actually fetched just before a URL is handed out.
+        """
+        cap = self.config.get("max_pages_per_template")
+        if cap and self.templates.count("fetched", url) >= cap:
+            self.skip_url(url, depth, "template_sample")
+            return False
         return True
+
+    def skip_url(self, url: str, depth: int, reason: str, new: bool = False):
+        """
+        Leave a URL out of the crawl and record why.
+        
+        Args:
+            url: Normalized URL
+            depth: Depth the URL was found at
+            reason: Short reason recorded in the frontier and the crawl report
+            new: The URL was never queued; learn its template and mark it seen
+        """
+        if new:
+            self.templates.add(url)
+            self.queued_urls.add(url)
+        self.templates.record("skipped", url)
+        self.frontier.skip(url, HostScheduler.host_for(url), depth, reason)
+        self.skipped[reason] += 1
+
+    def progress(self) -> Dict[str, Any]:
+        """Return live crawl counters for the scan status."""
+        return {
+            "urls_crawled": len(self.visited_urls),
+            "urls_queued": self.url_queue.qsize() if self.url_queue is not None else 0,
+            "bytes_downloaded": self.budget.bytes_used
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Return the URL templates found and the URLs left out of the crawl, for the scan stats.
+        
+        Every suppressed trap URL is a request that was not made; pages it
+        would have led to are not counted.
+        """
+        return {
+            "templates": {
+                "count": len(self.templates),
+                "max_pages_per_template": self.config.get("max_pages_per_template"),
+                "largest": self.templates.stats()
+            },
+            "traps": {
+                "fetches_saved": sum(count for reason, count in self.skipped.items() if reason in TRAP_REASONS),
+                "patterns": self.traps.stats() if self.traps is not None else []
+            },
+            "skipped": dict(self.skipped),
+            "budget": self.budget.to_dict(),
+            "workers": self.autoscaler.to_dict() if self.autoscaler is not None else {
+                "autoscale": False, "workers": self.max_page_workers
+            }
+        }
+
+    async def is_allowed_by_robots(self, url: str) -> bool:
+        """Check if URL is allowed by robots.txt, applying its Crawl-delay to the host."""
+        rules = await robots_cache.get(self.session, url)
+        delay = rules.crawl_delay(settings.CRAWLER_USER_AGENT)
+        if delay:
+            self.url_queue.set_crawl_delay(url, delay)
+        return rules.allows(url, settings.CRAWLER_USER_AGENT)
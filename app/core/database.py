@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer
+from sqlalchemy import create_engine, inspect, text, Column, Integer
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
@@ -55,6 +55,29 @@ def get_db_context():
     finally:
         db.close()
 
+# Columns added to existing tables; create_all never alters a table that already exists
+ADDED_COLUMNS = {
+    "resource": ["etag", "last_modified", "simhash", "duplicate_cluster"],
+}
+
+def migrate_db():
+    """Add model columns, and their indexes, that databases created by older versions are missing."""
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        quote = conn.dialect.identifier_preparer.quote
+        for table_name, column_names in ADDED_COLUMNS.items():
+            table = Base.metadata.tables[table_name]
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            for name in column_names:
+                if name not in existing:
+                    logger.info(f"Adding column {table_name}.{name}")
+                    column_type = table.c[name].type.compile(dialect=conn.dialect)
+                    conn.execute(text(f"ALTER TABLE {quote(table_name)} ADD COLUMN {quote(name)} {column_type}"))
+            indexes = {index["name"] for index in inspector.get_indexes(table_name)}
+            for index in table.indexes:
+                if index.name not in indexes and any(column.name in column_names for column in index.columns):
+                    index.create(bind=conn)
+
 # Initialize database tables
 def init_db():
     """Initialize database tables if they don't exist"""
@@ -69,9 +92,11 @@ def init_db():
         from app.models.validation import Validation
         from app.models.sentiment import Sentiment
         from app.models.search_index import SearchIndex
+        from app.models.scan_job import ScanJob
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        migrate_db()
         logger.info("Database tables created successfully")
         return True
     except Exception as e:
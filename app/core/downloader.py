@@ -0,0 +1,351 @@
+import logging
+import hashlib
+import mimetypes
+import urllib.parse
+from typing import Optional, Dict, Tuple
+
+from app.core.config import settings
+from app.core.body_writer import body_writer
+
+logger = logging.getLogger(__name__)
+
+# Content types whose bodies are read into memory for parsing
+TEXT_MIME_TYPES = {
+    'text/html': 'html',
+    'application/xhtml+xml': 'html',
+    'text/css': 'css',
+    'text/javascript': 'js',
+    'application/javascript': 'js',
+    'application/x-javascript': 'js',
+    'application/ecmascript': 'js',
+}
+
+DOCUMENT_MIME_TYPES = {
+    'application/pdf',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.ms-powerpoint',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+}
+
+
+FONT_MIME_TYPES = {
+    'application/font-woff',
+    'application/font-woff2',
+    'application/x-font-woff',
+    'application/x-font-ttf',
+    'application/x-font-otf',
+    'application/vnd.ms-fontobject',
+}
+
+# Content types that say nothing about the body; these are sniffed
+AMBIGUOUS_MIME_TYPES = {
+    'application/octet-stream',
+    'binary/octet-stream',
+    'application/unknown',
+    'application/x-unknown',
+    'text/plain',
+}
+
+# Leading bytes of common binary formats
+MAGIC_NUMBERS = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'\x00\x00\x01\x00', 'image/x-icon'),
+    (b'%PDF-', 'application/pdf'),
+    (b'wOFF', 'font/woff'),
+    (b'wOF2', 'font/woff2'),
+    (b'OTTO', 'font/otf'),
+    (b'\x00\x01\x00\x00', 'font/ttf'),
+)
+
+# Resource.resource_type value for each CacheManager directory
+RESOURCE_TYPES = {
+    'html': 'html',
+    'css': 'css',
+    'js': 'javascript',
+    'images': 'image',
+    'fonts': 'font',
+    'documents': 'document',
+    'other': 'other',
+}
+
+
+class Headers(dict):
+    """
+    Response headers with case-insensitive lookups.
+
+    Keys are stored lower-cased; HTTP/2 always sends lower-case names while
+    HTTP/1.1 servers use any casing.
+    """
+
+    def __init__(self, headers=()):
+        super().__init__()
+        items = headers.items() if hasattr(headers, 'items') else headers
+        for name, value in items:
+            self[name] = value
+
+    def __setitem__(self, name: str, value: str):
+        super().__setitem__(name.lower(), value)
+
+    def __getitem__(self, name: str) -> str:
+        return super().__getitem__(name.lower())
+
+    def __contains__(self, name) -> bool:
+        return super().__contains__(name.lower())
+
+    def get(self, name: str, default=None):
+        return super().get(name.lower(), default)
+
+
+def parse_content_type(value: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Split a Content-Type header into its MIME type and charset.
+
+    Args:
+        value: Raw Content-Type header value
+
+    Returns:
+        Tuple of (lower-cased MIME type, charset or None)
+    """
+    if not value:
+        return 'application/octet-stream', None
+
+    parts = [p.strip() for p in value.split(';')]
+    mime_type = parts[0].lower() or 'application/octet-stream'
+    charset = None
+    for param in parts[1:]:
+        key, _, val = param.partition('=')
+        if key.strip().lower() == 'charset' and val:
+            charset = val.strip().strip('"\'')
+    return mime_type, charset
+
+
+def cache_type_for(mime_type: str) -> str:
+    """Return the CacheManager resource directory for a MIME type."""
+    if mime_type in TEXT_MIME_TYPES:
+        return TEXT_MIME_TYPES[mime_type]
+    if mime_type.startswith('image/'):
+        return 'images'
+    if mime_type.startswith('font/') or mime_type in FONT_MIME_TYPES:
+        return 'fonts'
+    if mime_type in DOCUMENT_MIME_TYPES:
+        return 'documents'
+    return 'other'
+
+
+def guess_mime_type(url: str) -> Optional[str]:
+    """Guess a URL's MIME type from its path extension."""
+    path = urllib.parse.urlsplit(url).path
+    return mimetypes.guess_type(path)[0] if path else None
+
+
+def is_asset_url(url: str) -> bool:
+    """True if the URL's extension names a page requisite or download rather than a page."""
+    mime_type = guess_mime_type(url)
+    return mime_type is not None and cache_type_for(mime_type) != 'html'
+
+
+def sniff_mime_type(head: bytes, url: str) -> Optional[str]:
+    """
+    Identify a body from its first bytes, falling back to the URL's extension.
+
+    Args:
+        head: First bytes of the body
+        url: URL the body was fetched from
+
+    Returns:
+        The detected MIME type, or None if the body is not recognised
+    """
+    for magic, mime_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return mime_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+
+    text = head[:1024].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text.startswith((b'<!doctype html', b'<html', b'<head', b'<body')):
+        return 'text/html'
+    if text.startswith(b'<svg') or (text.startswith(b'<?xml') and b'<svg' in text):
+        return 'image/svg+xml'
+    return guess_mime_type(url)
+
+
+class DownloadResult:
+    """
+    Outcome of downloading one URL.
+
+    Text bodies (HTML/CSS/JS) are kept in memory as bytes; binary bodies are
+    streamed to `local_path` and not kept in memory.
+    """
+
+    def __init__(self, url: str, status_code: Optional[int], headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.status_code = status_code
+        self.set_headers(headers or {})
+        self.content: Optional[bytes] = None
+        self.local_path: Optional[str] = None
+        self.content_length = 0
+        self.sha256: Optional[str] = None
+        self.truncated = False
+        self.duration_ms = 0
+        self.error: Optional[str] = None
+
+    def set_headers(self, headers: Dict[str, str]):
+        """Set the response headers and derive the content type from them."""
+        self.headers = headers if isinstance(headers, Headers) else Headers(headers)
+        self.mime_type, self.charset = parse_content_type(headers.get('Content-Type'))
+        self.cache_type = cache_type_for(self.mime_type)
+
+    @property
+    def needs_sniffing(self) -> bool:
+        """True if the declared content type is missing or too generic to classify the body."""
+        if self.headers.get('X-Content-Type-Options', '').strip().lower() == 'nosniff':
+            return False
+        return self.mime_type in AMBIGUOUS_MIME_TYPES
+
+    def sniff(self, head: bytes):
+        """Reclassify the body from its first bytes."""
+        mime_type = sniff_mime_type(head, self.url)
+        if mime_type and mime_type != self.mime_type:
+            logger.debug(f"{self.url} declared {self.mime_type}, sniffed {mime_type}")
+            self.mime_type = mime_type
+            self.cache_type = cache_type_for(mime_type)
+
+    @property
+    def resource_type(self) -> str:
+        """Resource.resource_type value for this body."""
+        return RESOURCE_TYPES[self.cache_type]
+
+    @property
+    def is_text(self) -> bool:
+        """True if the body was read into memory for parsing."""
+        return self.mime_type in TEXT_MIME_TYPES
+
+    @property
+    def is_html(self) -> bool:
+        """True if the body is an HTML document."""
+        return self.cache_type == 'html'
+
+    @property
+    def ok(self) -> bool:
+        """True if a body is available, in memory or on disk."""
+        return self.error is None and (self.content is not None or self.local_path is not None)
+
+    @property
+    def text(self) -> str:
+        """The in-memory body decoded with the response charset."""
+        if self.content is None:
+            return ''
+        return self.content.decode(self.charset or 'utf-8', errors='replace')
+
+
+def declared_length(headers: Dict[str, str]) -> Optional[int]:
+    """Return the Content-Length header as an int, if present and valid."""
+    try:
+        return int(headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        return None
+
+
+class PeekedResponse:
+    """
+    A FetchResponse whose first body chunk has been read ahead, for sniffing.
+
+    `iter_chunks` yields the peeked chunk and then the rest of the body;
+    other attributes are those of the wrapped response.
+    """
+
+    def __init__(self, response, chunks, head: bytes):
+        self._response = response
+        self._chunks = chunks
+        self.head = head
+
+    @classmethod
+    async def peek(cls, response) -> "PeekedResponse":
+        """Read the first chunk of a response body."""
+        # The body iterator can only be started once (httpx), so it is kept
+        chunks = response.iter_chunks(settings.CRAWLER_CHUNK_SIZE).__aiter__()
+        try:
+            head = await chunks.__anext__()
+        except StopAsyncIteration:
+            head = b''
+        return cls(response, chunks, head)
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    async def iter_chunks(self, chunk_size: int):
+        if self.head:
+            yield self.head
+        async for chunk in self._chunks:
+            yield chunk
+
+
+async def read_text_body(response, result: DownloadResult, max_bytes: int):
+    """
+    Read a text body in chunks, up to `max_bytes`, hashing it as it arrives.
+
+    Args:
+        response: FetchResponse whose body has not been read
+        result: DownloadResult to fill with content, length and hash
+        max_bytes: Maximum number of bytes to keep
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    async for chunk in response.iter_chunks(settings.CRAWLER_CHUNK_SIZE):
+        remaining = max_bytes - size
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            result.truncated = True
+        digest.update(chunk)
+        chunks.append(chunk)
+        size += len(chunk)
+        if result.truncated:
+            logger.warning(f"Body of {result.url} exceeds {max_bytes} bytes; truncated")
+            break
+
+    result.content = b''.join(chunks)
+    result.content_length = size
+    result.sha256 = digest.hexdigest()
+
+
+async def stream_to_file(response, result: DownloadResult, path: str, max_bytes: int):
+    """
+    Stream a binary body to `path`, up to `max_bytes`, hashing it as it arrives.
+
+    Writes run on the body writer's thread pool. A body that exceeds the
+    limit is deleted and reported as an error.
+
+    Args:
+        response: FetchResponse whose body has not been read
+        result: DownloadResult to fill with path, length and hash
+        path: Destination file path
+        max_bytes: Maximum body size in bytes
+    """
+    digest = hashlib.sha256()
+    size = 0
+    f = await body_writer.open(path)
+    try:
+        async for chunk in response.iter_chunks(settings.CRAWLER_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                break
+            digest.update(chunk)
+            await body_writer.write(f, chunk)
+    finally:
+        await body_writer.close(f)
+
+    if size > max_bytes:
+        await body_writer.remove(path)
+        result.error = f"Body exceeds {max_bytes} bytes"
+        return
+
+    result.local_path = path
+    result.content_length = size
+    result.sha256 = digest.hexdigest()
@@ -0,0 +1,129 @@
+import logging
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from app.core.downloader import Headers
+from app.core.http_client import HttpClientManager, http_client
+
+try:
+    import h2  # noqa: F401 - httpx needs it for HTTP/2
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+class FetchResponse:
+    """
+    Response of a fetcher, with the body not yet read.
+
+    Attributes:
+        status: HTTP status code
+        headers: Response headers (case-insensitive)
+        http_version: Protocol used, e.g. "HTTP/1.1" or "HTTP/2"
+    """
+
+    def __init__(self, status: int, headers: Headers, http_version: str,
+                 iter_chunks: Callable[[int], AsyncIterator[bytes]]):
+        self.status = status
+        self.headers = headers
+        self.http_version = http_version
+        self._iter_chunks = iter_chunks
+
+    def iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        """Iterate over the body in chunks of at most `chunk_size` bytes."""
+        return self._iter_chunks(chunk_size)
+
+
+class Fetcher(ABC):
+    """
+    Issues the crawler's page requests. Backends borrow their client from
+    the application's HttpClientManager and never close it.
+    """
+
+    name = "base"
+
+    def __init__(self, client: Optional[HttpClientManager] = None):
+        self.client = client or http_client
+
+    @abstractmethod
+    def stream(self, url: str, headers: Optional[Dict[str, str]] = None):
+        """
+        Send a GET request.
+
+        Args:
+            url: URL to fetch
+            headers: Extra request headers
+
+        Returns:
+            Async context manager yielding a FetchResponse
+        """
+
+
+class AiohttpFetcher(Fetcher):
+    """HTTP/1.1 fetcher over the shared aiohttp connection pool."""
+
+    name = "aiohttp"
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: Optional[Dict[str, str]] = None):
+        async with self.client.session().get(url, headers=headers) as response:
+            yield FetchResponse(
+                response.status,
+                Headers(response.headers),
+                f"HTTP/{response.version.major}.{response.version.minor}",
+                response.content.iter_chunked
+            )
+
+
+class HttpxFetcher(Fetcher):
+    """
+    httpx fetcher that negotiates HTTP/2 where the server supports it, so
+    many requests to a host are multiplexed over one connection.
+    """
+
+    name = "httpx"
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: Optional[Dict[str, str]] = None):
+        async with self.client.httpx_client().stream("GET", url, headers=headers) as response:
+            yield FetchResponse(
+                response.status_code,
+                Headers(response.headers.items()),
+                response.http_version,
+                response.aiter_bytes
+            )
+
+
+FETCHERS = {
+    AiohttpFetcher.name: AiohttpFetcher,
+    HttpxFetcher.name: HttpxFetcher,
+}
+
+
+def available_fetchers() -> List[str]:
+    """Return the fetcher backends usable in this environment."""
+    backends = [AiohttpFetcher.name]
+    if httpx is not None:
+        backends.append(HttpxFetcher.name)
+    return backends
+
+
+def get_fetcher(name: Optional[str] = None, client: Optional[HttpClientManager] = None) -> Fetcher:
+    """
+    Create a fetcher.
+
+    Args:
+        name: Backend name; an unavailable backend falls back to aiohttp
+        client: HTTP client manager to borrow connections from
+
+    Returns:
+        Fetcher instance
+    """
+    name = name or AiohttpFetcher.name
+    if name not in available_fetchers():
+        logger.warning(f"Fetcher '{name}' is not available (needs httpx and h2); using aiohttp")
+        name = AiohttpFetcher.name
+    return FETCHERS[name](client)
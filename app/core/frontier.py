@@ -0,0 +1,178 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import List, Optional, Tuple, Iterator
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FRONTIER_FILENAME = "frontier.db"
+
+# URL states in the frontier table
+STATE_PENDING = "pending"
+STATE_DONE = "done"
+STATE_SKIPPED = "skipped"  # left out of the crawl; the reason is recorded
+
+
+class CrawlFrontier:
+    """
+    Disk-backed crawl frontier stored as an SQLite file under the scan's cache path.
+
+    Records every queued URL, which URLs have been processed or skipped
+    and the content fingerprints seen so far, so an interrupted crawl can be resumed. Writes
+    are grouped into periodic checkpoints rather than committed one by one.
+    """
+
+    def __init__(self, cache_path: str):
+        """Open (or create) the frontier database for a scan."""
+        os.makedirs(cache_path, exist_ok=True)
+        self.path = os.path.join(cache_path, FRONTIER_FILENAME)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                host TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                loaded INTEGER NOT NULL DEFAULT 0,
+                added REAL NOT NULL,
+                score REAL NOT NULL DEFAULT 0,
+                reason TEXT
+            );
+            CREATE INDEX IF NOT EXISTS ix_frontier_pending
+                ON frontier (host, state, loaded);
+            CREATE TABLE IF NOT EXISTS fingerprint (
+                hash TEXT PRIMARY KEY,
+                url TEXT NOT NULL
+            );
+        """)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(frontier)")]
+        if "score" not in columns:
+            # Frontier written before URLs were scored
+            self.conn.execute("ALTER TABLE frontier ADD COLUMN score REAL NOT NULL DEFAULT 0")
+        if "reason" not in columns:
+            self.conn.execute("ALTER TABLE frontier ADD COLUMN reason TEXT")
+        self.conn.commit()
+        self._pending_ops = 0
+        self._last_checkpoint = time.monotonic()
+        logger.debug(f"Crawl frontier opened at {self.path}")
+
+    def has_state(self) -> bool:
+        """Return True if a previous crawl left URLs in this frontier."""
+        return self.conn.execute("SELECT 1 FROM frontier LIMIT 1").fetchone() is not None
+
+    def add(self, url: str, host: str, depth: int, loaded: bool = True, score: float = 0.0):
+        """Record a newly queued URL and its priority score."""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO frontier (url, host, depth, state, loaded, added, score) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, host, depth, STATE_PENDING, int(loaded), time.time(), score)
+        )
+        self._maybe_checkpoint()
+
+    def mark_done(self, url: str):
+        """Record that a URL has been processed."""
+        self.conn.execute(
+            "UPDATE frontier SET state = ?, loaded = 0 WHERE url = ?",
+            (STATE_DONE, url)
+        )
+        self._maybe_checkpoint()
+
+    def skip(self, url: str, host: str, depth: int, reason: str):
+        """Record that a URL, queued or not, is left out of the crawl and why."""
+        self.conn.execute(
+            "INSERT INTO frontier (url, host, depth, state, loaded, added, reason) "
+            "VALUES (?, ?, ?, ?, 0, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET state = excluded.state, loaded = 0, reason = excluded.reason",
+            (url, host, depth, STATE_SKIPPED, time.time(), reason)
+        )
+        self._maybe_checkpoint()
+
+    def load_host(self, host: str, limit: int) -> List[Tuple[str, int]]:
+        """
+        Load pending URLs for a host that are not already held in memory.
+
+        Args:
+            host: Host whose URLs to load
+            limit: Maximum number of URLs to load
+
+        Returns:
+            List of (url, depth) tuples, highest score first, then oldest first
+        """
+        rows = self.conn.execute(
+            "SELECT url, depth FROM frontier "
+            "WHERE host = ? AND state = ? AND loaded = 0 ORDER BY score DESC, added LIMIT ?",
+            (host, STATE_PENDING, limit)
+        ).fetchall()
+        self.conn.executemany(
+            "UPDATE frontier SET loaded = 1 WHERE url = ?",
+            [(url,) for url, _ in rows]
+        )
+        self._maybe_checkpoint()
+        return rows
+
+    def pending_counts(self) -> Iterator[Tuple[str, int]]:
+        """Yield (host, pending URL count) for every host with work left."""
+        yield from self.conn.execute(
+            "SELECT host, COUNT(*) FROM frontier WHERE state = ? GROUP BY host",
+            (STATE_PENDING,)
+        )
+
+    def done_urls(self) -> Iterator[str]:
+        """Yield every URL already processed."""
+        for (url,) in self.conn.execute("SELECT url FROM frontier WHERE state = ?", (STATE_DONE,)):
+            yield url
+
+    def pending_urls(self) -> Iterator[str]:
+        """Yield every URL still waiting to be processed."""
+        for (url,) in self.conn.execute("SELECT url FROM frontier WHERE state = ?", (STATE_PENDING,)):
+            yield url
+
+    def skipped_urls(self) -> Iterator[Tuple[str, str]]:
+        """Yield (url, reason) for every URL left out of the crawl."""
+        yield from self.conn.execute("SELECT url, reason FROM frontier WHERE state = ?", (STATE_SKIPPED,))
+
+    def reset_loaded(self):
+        """Forget which pending URLs were held in memory by a previous process."""
+        self.conn.execute("UPDATE frontier SET loaded = 0 WHERE loaded = 1")
+        self.conn.commit()
+
+    def check_fingerprint(self, fingerprint: str, url: str) -> Optional[str]:
+        """
+        Record a content fingerprint.
+
+        Returns:
+            URL that first produced this fingerprint, or None if it is new
+        """
+        row = self.conn.execute(
+            "SELECT url FROM fingerprint WHERE hash = ?", (fingerprint,)
+        ).fetchone()
+        if row:
+            return row[0]
+        self.conn.execute("INSERT INTO fingerprint (hash, url) VALUES (?, ?)", (fingerprint, url))
+        self._maybe_checkpoint()
+        return None
+
+    def _maybe_checkpoint(self):
+        """Commit once enough writes or time have accumulated."""
+        self._pending_ops += 1
+        if (self._pending_ops >= settings.CRAWLER_FRONTIER_CHECKPOINT_OPS or
+                time.monotonic() - self._last_checkpoint >= settings.CRAWLER_FRONTIER_CHECKPOINT_SECONDS):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Commit all buffered frontier changes to disk."""
+        self.conn.commit()
+        self._pending_ops = 0
+        self._last_checkpoint = time.monotonic()
+
+    def close(self):
+        """Checkpoint and close the frontier database."""
+        try:
+            self.checkpoint()
+        finally:
+            self.conn.close()
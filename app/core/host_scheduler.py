@@ -0,0 +1,528 @@
+import logging
+import asyncio
+import time
+import urllib.parse
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple, Any
+
+from app.core.config import settings
+from app.core.downloader import is_asset_url
+from app.core.frontier import CrawlFrontier
+from app.core.url_priority import PriorityReadyQueue, UrlScorer
+
+logger = logging.getLogger(__name__)
+
+# Status codes that signal the host wants us to slow down
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Dispatch lanes: pages, and the CSS, JS, images, fonts and documents they use
+PAGE_LANE = "page"
+ASSET_LANE = "asset"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the request rate to a single host, or to all
+    hosts of a scan.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """Initialize the bucket full, refilling at `rate` tokens per second."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        """Add the tokens accumulated since the last refill."""
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def time_until_available(self, now: float) -> float:
+        """Return the number of seconds until one token is available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        """Take one token from the bucket."""
+        self._refill(now)
+        self.tokens -= 1
+
+
+class HostState:
+    """
+    Ready queues, token buckets and adaptive concurrency limit for one host.
+
+    Pages and assets are queued in separate lanes. The page lane adapts its
+    rate and concurrency to the host's responses; the asset lane has its
+    own, higher fixed limits (CRAWLER_HOST_ASSET_*), as browsers fetch page
+    requisites in parallel. Backoffs and Crawl-delay apply to both.
+    """
+
+    def __init__(self, host: str, scorer: Optional[UrlScorer] = None):
+        """Initialize host state from the crawler politeness settings."""
+        self.host = host
+        self.ready = PriorityReadyQueue(scorer)
+        self.assets = PriorityReadyQueue(scorer)
+        self.spilled = 0  # pending URLs kept only in the on-disk frontier
+        self.bucket = TokenBucket(settings.CRAWLER_HOST_RATE, settings.CRAWLER_HOST_BURST)
+        self.asset_bucket = TokenBucket(settings.CRAWLER_HOST_ASSET_RATE, settings.CRAWLER_HOST_ASSET_BURST)
+        self.asset_concurrency = settings.CRAWLER_HOST_ASSET_CONCURRENCY
+        self.asset_in_flight = 0
+        self.concurrency = float(settings.CRAWLER_HOST_CONCURRENCY)
+        self.max_rate = settings.CRAWLER_HOST_MAX_RATE
+        self.max_concurrency = float(settings.CRAWLER_HOST_MAX_CONCURRENCY)
+        self.crawl_delay: Optional[float] = None
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.baseline_latency: Optional[float] = None
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+    @property
+    def concurrency_limit(self) -> int:
+        """Whole number of page requests allowed in flight at once."""
+        return max(1, int(self.concurrency))
+
+    @property
+    def queued(self) -> int:
+        """Number of URLs held in memory, in both lanes."""
+        return len(self.ready) + len(self.assets)
+
+    def queue(self, lane: str) -> PriorityReadyQueue:
+        """Return the ready queue of a lane."""
+        return self.assets if lane == ASSET_LANE else self.ready
+
+    def acquire(self, now: float, lane: str):
+        """Take a token and an in-flight slot for a request in `lane`."""
+        if lane == ASSET_LANE:
+            self.asset_bucket.consume(now)
+            self.asset_in_flight += 1
+        else:
+            self.bucket.consume(now)
+            self.in_flight += 1
+
+    def release(self, lane: str):
+        """Free the in-flight slot of a finished request."""
+        if lane == ASSET_LANE:
+            self.asset_in_flight = max(0, self.asset_in_flight - 1)
+        else:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def set_crawl_delay(self, delay: float):
+        """Apply a robots.txt Crawl-delay: one request at a time, at most one per `delay` seconds."""
+        if delay == self.crawl_delay or delay <= 0:
+            return
+        self.crawl_delay = delay
+        self.max_rate = min(settings.CRAWLER_HOST_MAX_RATE, 1 / delay)
+        self.max_concurrency = 1.0
+        self.concurrency = 1.0
+        self.bucket.rate = min(self.bucket.rate, self.max_rate)
+        self.bucket.capacity = 1.0
+        self.bucket.tokens = min(self.bucket.tokens, 1.0)
+        # Assets draw from the same bucket, one at a time
+        self.asset_bucket = self.bucket
+        self.asset_concurrency = 1
+        logger.info(f"Host {self.host} Crawl-delay {delay}s; rate limited to {self.max_rate:.2f}/s")
+
+    def dispatch_delay(self, now: float, lane: str = PAGE_LANE) -> Optional[float]:
+        """
+        Return how long until this host may receive another request in `lane`.
+
+        Returns:
+            0 if a request can be sent now, the number of seconds to wait
+            for a token or a backoff to expire, or None if the host is
+            waiting for an in-flight request to finish.
+        """
+        if lane == ASSET_LANE:
+            in_flight, limit, bucket = self.asset_in_flight, self.asset_concurrency, self.asset_bucket
+        else:
+            in_flight, limit, bucket = self.in_flight, self.concurrency_limit, self.bucket
+        if in_flight >= limit:
+            return None
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return bucket.time_until_available(now)
+
+    def record(self, status: Optional[int], elapsed: float, retry_after: Optional[float] = None):
+        """Adapt concurrency and request rate from an observed response."""
+        now = time.monotonic()
+        self.requests += 1
+
+        if status in THROTTLE_STATUS_CODES:
+            # Multiplicative decrease and back off until the host recovers
+            self.throttled += 1
+            self.concurrency = max(1.0, self.concurrency / 2)
+            self.bucket.rate = min(self.max_rate, max(settings.CRAWLER_HOST_MIN_RATE, self.bucket.rate / 2))
+            backoff = retry_after if retry_after is not None else settings.CRAWLER_HOST_BACKOFF
+            self.blocked_until = max(self.blocked_until, now + backoff)
+            logger.info(
+                f"Host {self.host} throttled (HTTP {status}); "
+                f"concurrency={self.concurrency_limit}, rate={self.bucket.rate:.2f}/s"
+            )
+            return
+
+        if status is None or status >= 500:
+            self.errors += 1
+            self.concurrency = max(1.0, self.concurrency * 0.75)
+            return
+
+        # Track latency with an EWMA and remember the best level seen
+        if self.latency_ewma is None:
+            self.latency_ewma = elapsed
+        else:
+            self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * elapsed
+        if self.baseline_latency is None or self.latency_ewma < self.baseline_latency:
+            self.baseline_latency = self.latency_ewma
+
+        if self.latency_ewma > self.baseline_latency * settings.CRAWLER_HOST_LATENCY_TOLERANCE:
+            # The host is slowing down under our load
+            self.concurrency = max(1.0, self.concurrency * 0.75)
+        else:
+            # Additive increase: roughly one extra slot per window of responses
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + settings.CRAWLER_HOST_RATE_STEP)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a snapshot of this host's scheduling state."""
+        return {
+            "queued": self.queued + self.spilled,
+            "in_flight": self.in_flight,
+            "assets_in_flight": self.asset_in_flight,
+            "concurrency": self.concurrency_limit,
+            "rate": round(self.bucket.rate, 2),
+            "crawl_delay": self.crawl_delay,
+            "latency_ms": round(self.latency_ewma * 1000) if self.latency_ewma is not None else None,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "errors": self.errors
+        }
+
+
+class HostScheduler:
+    """
+    Crawl frontier with one ready queue and one token bucket per host.
+
+    Exposes the subset of the asyncio.Queue interface used by the crawler,
+    but `get` only hands out a URL whose host has a free concurrency slot
+    and an available token, rotating between hosts so that a slow host
+    cannot occupy every worker. Page and asset URLs (by extension) wait in
+    separate lanes, so page and asset workers are limited independently.
+    `get` returns None once every queued URL
+    has been marked done, or once `budget` URLs have been handed out. An
+    optional `rate_limit` caps the requests per second across all hosts.
+
+    With a UrlScorer, each host's queue is best-first rather than FIFO.
+    When a CrawlFrontier is given, every queued URL is recorded on disk and
+    each host keeps at most CRAWLER_FRONTIER_MEMORY_LIMIT URLs in memory;
+    the rest are loaded back from the frontier, highest stored score
+    first, as the host's queue drains.
+
+    A crawl shard holds the scheduler open while other shards may still
+    send it URLs, and shares a `dispatch_counter` with them so that the
+    budget applies to the whole scan.
+    """
+
+    def __init__(self, frontier: Optional[CrawlFrontier] = None, scorer: Optional[UrlScorer] = None,
+                 budget: Optional[int] = None, dispatch_filter: Optional[Callable[[str, int], bool]] = None,
+                 rate_limit: Optional[float] = None, dispatch_counter: Optional[Any] = None):
+        """
+        Initialize an empty scheduler.
+
+        Args:
+            frontier: Disk frontier backing the in-memory queues
+            scorer: Scores URLs for best-first dispatch; FIFO if omitted
+            budget: Maximum number of URLs to hand out
+            dispatch_filter: Called with (url, depth) just before a URL would
+                be handed out; returning False drops it without using the
+                budget (the filter records why)
+            rate_limit: Maximum requests per second across all hosts
+            dispatch_counter: multiprocessing.Value counting the URLs handed
+                out by every scheduler of the scan, checked against `budget`
+        """
+        self.frontier = frontier
+        self.scorer = scorer
+        self.budget = budget
+        self.dispatch_filter = dispatch_filter
+        # One second's worth of burst, so the rate holds over any second
+        self.rate_bucket = TokenBucket(rate_limit, max(1.0, rate_limit)) if rate_limit else None
+        self.dispatched = 0
+        self.dispatch_counter = dispatch_counter
+        self.hosts: Dict[str, HostState] = {}
+        self._rotation = deque()
+        self._in_rotation = set()
+        self._unfinished = 0
+        self._stopped = False
+        self._held = False
+        self._changed = asyncio.Event()
+
+    @staticmethod
+    def lane_for(url: str) -> str:
+        """Return the dispatch lane of a URL."""
+        return ASSET_LANE if is_asset_url(url) else PAGE_LANE
+
+    @staticmethod
+    def host_for(url: str) -> str:
+        """Return the scheduling key (network location) for a URL."""
+        return urllib.parse.urlsplit(url).netloc.lower()
+
+    def _get_host(self, host: str) -> HostState:
+        """Get or create the state for a host."""
+        state = self.hosts.get(host)
+        if state is None:
+            state = HostState(host, self.scorer)
+            self.hosts[host] = state
+        return state
+
+    def put_nowait(self, item: Tuple[str, int]):
+        """Queue a (url, depth) item on its host's ready queue."""
+        url, depth = item
+        host = self.host_for(url)
+        state = self._get_host(host)
+        if self.scorer is not None:
+            self.scorer.add_url(url)
+        queue = state.queue(self.lane_for(url))
+        if self.frontier is None:
+            queue.push(item)
+        else:
+            in_memory = state.queued < settings.CRAWLER_FRONTIER_MEMORY_LIMIT
+            score = queue.score(item)
+            self.frontier.add(url, host, depth, loaded=in_memory, score=score)
+            if in_memory:
+                queue.push(item)
+            else:
+                state.spilled += 1
+        self._unfinished += 1
+        self._schedule_host(host)
+
+    def restore(self, host: str, count: int):
+        """Register URLs already pending in the frontier from an earlier run."""
+        self._get_host(host).spilled += count
+        self._unfinished += count
+        self._schedule_host(host)
+
+    def _schedule_host(self, host: str):
+        """Add a host to the dispatch rotation and wake waiting workers."""
+        if host not in self._in_rotation:
+            self._rotation.append(host)
+            self._in_rotation.add(host)
+        self._changed.set()
+
+    def _refill(self, state: HostState):
+        """Move a batch of spilled URLs for a host from disk into memory, up to the memory limit."""
+        room = settings.CRAWLER_FRONTIER_MEMORY_LIMIT - state.queued
+        if room <= 0:
+            return
+        items = self.frontier.load_host(state.host, room)
+        for item in items:
+            state.queue(self.lane_for(item[0])).push(item)
+        if items:
+            state.spilled -= len(items)
+        else:
+            # Nothing left on disk; drop the stale count so the crawl can finish
+            self._unfinished -= state.spilled
+            state.spilled = 0
+
+    async def put(self, item: Tuple[str, int]):
+        """Queue a (url, depth) item on its host's ready queue."""
+        self.put_nowait(item)
+
+    @property
+    def budget_spent(self) -> bool:
+        """True once `budget` URLs have been handed out."""
+        if self.budget is None:
+            return False
+        if self.dispatch_counter is not None:
+            return self.dispatch_counter.value >= self.budget
+        return self.dispatched >= self.budget
+
+    def count_dispatched(self, count: int = 1):
+        """Count URLs handed out before this scheduler existed, e.g. by an interrupted run."""
+        self.dispatched += count
+        if self.dispatch_counter is not None:
+            with self.dispatch_counter.get_lock():
+                self.dispatch_counter.value += count
+
+    def _reserve_budget(self) -> bool:
+        """Take one URL of a budget shared with other schedulers; False once it is spent."""
+        if self.dispatch_counter is None or self.budget is None:
+            return True
+        with self.dispatch_counter.get_lock():
+            if self.dispatch_counter.value >= self.budget:
+                return False
+            self.dispatch_counter.value += 1
+            return True
+
+    def _return_budget(self):
+        if self.dispatch_counter is not None and self.budget is not None:
+            with self.dispatch_counter.get_lock():
+                self.dispatch_counter.value -= 1
+
+    @property
+    def idle(self) -> bool:
+        """True when no URL is queued or in flight."""
+        return self._unfinished <= 0
+
+    def hold(self):
+        """Keep `get` waiting instead of returning None when the queue runs empty."""
+        self._held = True
+
+    def release_hold(self):
+        """Let `get` return None again once the queue is empty."""
+        self._held = False
+        self._changed.set()
+
+    def reprioritize(self, url: str):
+        """Re-score a queued URL after its inbound links or sitemap priority changed."""
+        state = self.hosts.get(self.host_for(url))
+        if state is not None:
+            state.queue(self.lane_for(url)).update(url)
+
+    async def get(self, lane: str = PAGE_LANE) -> Optional[Tuple[str, int]]:
+        """
+        Wait for the next URL of a lane that may be fetched under the host limits.
+
+        Returns:
+            A (url, depth) tuple, or None when the crawl is finished, stopped
+            or out of budget
+        """
+        while True:
+            if (self._unfinished == 0 and not self._held) or self._stopped or self.budget_spent:
+                # Wake any other idle worker so it can exit too
+                self._changed.set()
+                return None
+
+            item, wait = self._next_ready(lane)
+            if item is not None:
+                return item
+            if self._unfinished == 0 and not self._held:
+                # The dispatch filter dropped the last URLs
+                continue
+
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _next_ready(self, lane: str) -> Tuple[Optional[Tuple[str, int]], Optional[float]]:
+        """Pick the next dispatchable item of a lane, round-robin across hosts."""
+        now = time.monotonic()
+        wait = None
+        if self.rate_bucket is not None:
+            delay = self.rate_bucket.time_until_available(now)
+            if delay > 0:
+                return None, delay
+
+        for _ in range(len(self._rotation)):
+            host = self._rotation.popleft()
+            state = self.hosts[host]
+            queue = state.queue(lane)
+            if not queue and state.spilled:
+                self._refill(state)
+            if not state.queued and not state.spilled:
+                self._in_rotation.discard(host)
+                continue
+            self._rotation.append(host)
+            if not queue and not state.spilled:
+                # Only the other lane has work for this host
+                continue
+
+            delay = state.dispatch_delay(now, lane)
+            if delay == 0:
+                if not self._reserve_budget():
+                    # Other shards spent the shared budget; `get` sees it and returns None
+                    return None, 0.0
+                item = self._pop_ready(state, lane)
+                if item is None:
+                    self._return_budget()
+                else:
+                    state.acquire(now, lane)
+                    if self.rate_bucket is not None:
+                        self.rate_bucket.consume(now)
+                    self.dispatched += 1
+                    if self.scorer is not None:
+                        self.scorer.mark_dispatched(item[0])
+                if not state.queued and not state.spilled:
+                    self._rotation.pop()
+                    self._in_rotation.discard(host)
+                if item is not None:
+                    return item, None
+                continue
+            if delay is not None:
+                wait = delay if wait is None else min(wait, delay)
+
+        return None, wait
+
+    def _pop_ready(self, state: HostState, lane: str) -> Optional[Tuple[str, int]]:
+        """Pop the host's next item in `lane` that passes the dispatch filter."""
+        queue = state.queue(lane)
+        while True:
+            if not queue:
+                if not state.spilled or state.queued >= settings.CRAWLER_FRONTIER_MEMORY_LIMIT:
+                    return None
+                # Each refill loads URLs or clears the spilled count
+                self._refill(state)
+                continue
+            item = queue.pop()
+            if self.dispatch_filter is None or self.dispatch_filter(*item):
+                return item
+            self._unfinished -= 1
+
+    def stop(self):
+        """Stop dispatching; waiting and future `get` calls return None. Pending URLs stay in the frontier."""
+        self._stopped = True
+        self._changed.set()
+
+    def report(self, url: str, status: Optional[int], elapsed: float, retry_after: Optional[float] = None):
+        """Feed the outcome of a request back into its host's limits."""
+        self._get_host(self.host_for(url)).record(status, elapsed, retry_after)
+        self._changed.set()
+
+    def set_crawl_delay(self, url: str, delay: float):
+        """Apply a robots.txt Crawl-delay to the host of a URL."""
+        self._get_host(self.host_for(url)).set_crawl_delay(delay)
+
+    def task_done(self, url: str):
+        """Release the slot taken by `get` for this URL."""
+        state = self.hosts.get(self.host_for(url))
+        if state is not None:
+            state.release(self.lane_for(url))
+        self._unfinished -= 1
+        self._changed.set()
+
+    def qsize(self) -> int:
+        """Return the number of URLs waiting to be dispatched."""
+        return sum(state.queued + state.spilled for state in self.hosts.values())
+
+    def empty(self) -> bool:
+        """Return True if no URLs are waiting to be dispatched."""
+        return self.qsize() == 0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-host scheduling statistics."""
+        return {host: state.to_dict() for host, state in self.hosts.items()}
@@ -0,0 +1,151 @@
+import logging
+import ssl
+from typing import Dict, Any, List, Optional
+
+import aiohttp
+
+from app.core.config import settings
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClientManager:
+    """
+    Application-scoped HTTP client shared by every scan.
+
+    Owns one aiohttp session over a tuned TCPConnector, so concurrent and
+    back-to-back scans of the same host reuse keep-alive connections, cached
+    DNS results and a single TLS context instead of rebuilding them. An
+    HTTP/2-capable httpx client is created on demand. Callers borrow the
+    clients and must not close them.
+    """
+
+    def __init__(self, cafile: Optional[str] = None):
+        """Initialize the manager; `cafile` replaces the system trust store."""
+        self.cafile = cafile
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._httpx_client = None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self.counters: Dict[str, int] = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+            "http2_requests": 0,
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Count requests, connection reuse and DNS cache hits."""
+        trace_config = aiohttp.TraceConfig()
+
+        def counter(name):
+            async def increment(session, context, params):
+                self.counters[name] += 1
+            return increment
+
+        trace_config.on_request_start.append(counter("requests"))
+        trace_config.on_connection_create_end.append(counter("connections_created"))
+        trace_config.on_connection_reuseconn.append(counter("connections_reused"))
+        trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(counter("dns_cache_misses"))
+        return trace_config
+
+    def _create_ssl_context(self, alpn_protocols: List[str]) -> ssl.SSLContext:
+        """Create a TLS context offering `alpn_protocols`."""
+        context = ssl.create_default_context(cafile=self.cafile)
+        context.set_alpn_protocols(alpn_protocols)
+        return context
+
+    def session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use (needs a running event loop)."""
+        if self._session is None or self._session.closed:
+            if self._ssl_context is None:
+                # One context for all connections: CA certificates are loaded once
+                self._ssl_context = self._create_ssl_context(["http/1.1"])
+            connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_POOL_LIMIT,
+                limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+                use_dns_cache=True,
+                ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+                ssl=self._ssl_context,
+                enable_cleanup_closed=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT),
+                headers={
+                    'User-Agent': settings.CRAWLER_USER_AGENT
+                },
+                trace_configs=[self._trace_config()]
+            )
+            logger.info(
+                f"HTTP connection pool created (limit={settings.HTTP_POOL_LIMIT}, "
+                f"per host={settings.HTTP_POOL_LIMIT_PER_HOST})"
+            )
+        return self._session
+
+    def httpx_client(self):
+        """
+        Return the shared httpx client, which negotiates HTTP/2 via ALPN.
+
+        It gets its own TLS context because httpx rewrites the ALPN list of
+        the context it is given. Requires the optional httpx and h2 packages.
+        """
+        if self._httpx_client is None or self._httpx_client.is_closed:
+            async def count_response(response):
+                self.counters["requests"] += 1
+                if response.http_version == "HTTP/2":
+                    self.counters["http2_requests"] += 1
+
+            self._httpx_client = httpx.AsyncClient(
+                http2=True,
+                verify=self._create_ssl_context(["h2", "http/1.1"]),
+                follow_redirects=True,
+                timeout=settings.HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_POOL_LIMIT,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_TIMEOUT
+                ),
+                headers={
+                    'User-Agent': settings.CRAWLER_USER_AGENT
+                },
+                event_hooks={"response": [count_response]}
+            )
+            logger.info("HTTP/2 client created")
+        return self._httpx_client
+
+    def stats(self) -> Dict[str, Any]:
+        """Return connection pool usage and request counters."""
+        stats: Dict[str, Any] = {
+            "open": self._session is not None and not self._session.closed,
+            "limit": settings.HTTP_POOL_LIMIT,
+            "limit_per_host": settings.HTTP_POOL_LIMIT_PER_HOST,
+            "in_use": 0,
+            "idle": 0,
+            **self.counters
+        }
+        if stats["open"]:
+            connector = self._session.connector
+            stats["in_use"] = len(getattr(connector, "_acquired", ()))
+            stats["idle"] = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        return stats
+
+    async def close(self):
+        """Close the shared clients and their connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._httpx_client is not None:
+            await self._httpx_client.aclose()
+        self._httpx_client = None
+
+
+# Shared HTTP client for the application
+http_client = HttpClientManager()
@@ -0,0 +1,232 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.metadata import Metadata
+from app.models.scan_job import ScanJob
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+OPEN_STATES = (QUEUED, RUNNING)
+
+
+class JobQueue:
+    """
+    Durable queue of scans to run, kept in the scan_job table.
+
+    A worker claims a queued job by moving it to running under a lease of
+    JOB_LEASE_SECONDS and renews the lease with every heartbeat. A job whose
+    lease ran out belongs to a worker that died; it is queued again to
+    resume from the scan's frontier, up to JOB_MAX_ATTEMPTS times. State
+    changes are single conditional UPDATE statements, so any number of
+    worker processes can share one SQLite or Postgres database without
+    claiming the same job twice.
+
+    Pause and cancel requests for a running job are stored on the job and
+    delivered by the worker holding its lease, which may be another
+    process.
+    """
+
+    def __init__(self):
+        self.listeners: List[Callable[[], None]] = []
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Register a callback invoked when this process queues a job, e.g. to wake a local worker."""
+        self.listeners.append(callback)
+
+    def enqueue(self, db: Session, scan_uuid: str, priority: int = 0, resume: bool = False) -> ScanJob:
+        """
+        Queue a scan unless it already has an open job.
+
+        Args:
+            db: Database session; the job is committed
+            scan_uuid: Scan to run
+            priority: Higher priorities are claimed first
+            resume: Continue from the scan's frontier instead of starting over
+        """
+        job = self.open_job(db, scan_uuid)
+        if job is None:
+            job = ScanJob(scan_uuid=scan_uuid, status=QUEUED, priority=priority, resume=resume)
+            db.add(job)
+            db.commit()
+            logger.info(f"Queued job {job.id} for scan {scan_uuid}")
+        for listener in self.listeners:
+            listener()
+        return job
+
+    def open_job(self, db: Session, scan_uuid: str) -> Optional[ScanJob]:
+        """Return the queued or running job of a scan, if any."""
+        return db.query(ScanJob).filter(
+            ScanJob.scan_uuid == scan_uuid,
+            ScanJob.status.in_(OPEN_STATES)
+        ).first()
+
+    def claim(self, db: Session, worker_id: str, limit: int) -> List[ScanJob]:
+        """
+        Take up to `limit` queued jobs, highest priority and oldest first.
+
+        A job taken by another worker between the select and the update is
+        skipped.
+        """
+        if limit <= 0:
+            return []
+        candidates = db.query(ScanJob.id).filter(ScanJob.status == QUEUED).order_by(
+            ScanJob.priority.desc(), ScanJob.id
+        ).limit(limit * 2).all()
+
+        claimed = []
+        for (job_id,) in candidates:
+            now = datetime.utcnow()
+            updated = db.query(ScanJob).filter(ScanJob.id == job_id, ScanJob.status == QUEUED).update({
+                ScanJob.status: RUNNING,
+                ScanJob.worker_id: worker_id,
+                ScanJob.lease_expires_at: now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                ScanJob.heartbeat_at: now,
+                ScanJob.attempts: ScanJob.attempts + 1,
+                ScanJob.updated_at: now
+            }, synchronize_session=False)
+            db.commit()
+            if updated:
+                claimed.append(db.query(ScanJob).filter(ScanJob.id == job_id).first())
+                if len(claimed) == limit:
+                    break
+        return claimed
+
+    def heartbeat(self, db: Session, worker_id: str, job_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Renew the leases of a worker's running jobs.
+
+        Returns:
+            Job id -> pending stop request (or None) for every job still held;
+            jobs missing from the result were lost and must be abandoned
+        """
+        if not job_ids:
+            return {}
+        now = datetime.utcnow()
+        held = db.query(ScanJob).filter(
+            ScanJob.id.in_(job_ids), ScanJob.worker_id == worker_id, ScanJob.status == RUNNING
+        )
+        held.update({
+            ScanJob.lease_expires_at: now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            ScanJob.heartbeat_at: now
+        }, synchronize_session=False)
+        db.commit()
+        return {job_id: stop for job_id, stop in held.with_entities(ScanJob.id, ScanJob.stop_requested)}
+
+    def finish(self, db: Session, job_id: int, worker_id: str, error: Optional[str] = None):
+        """Close a job held by the worker."""
+        db.query(ScanJob).filter(ScanJob.id == job_id, ScanJob.worker_id == worker_id).update({
+            ScanJob.status: FINISHED,
+            ScanJob.error: error,
+            ScanJob.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+
+    def release(self, db: Session, job_id: int, worker_id: str):
+        """Hand a job held by the worker back to the queue, to resume elsewhere (e.g. on shutdown)."""
+        updated = db.query(ScanJob).filter(
+            ScanJob.id == job_id, ScanJob.worker_id == worker_id, ScanJob.status == RUNNING
+        ).update({
+            ScanJob.status: QUEUED,
+            ScanJob.resume: True,
+            ScanJob.worker_id: None,
+            ScanJob.lease_expires_at: None,
+            ScanJob.attempts: ScanJob.attempts - 1,  # a clean handover is not a failed attempt
+            ScanJob.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+        if updated:
+            for listener in self.listeners:
+                listener()
+
+    def requeue_expired(self, db: Session) -> int:
+        """
+        Queue again the running jobs whose lease ran out; fail those out of attempts.
+
+        Returns:
+            Number of jobs queued again
+        """
+        now = datetime.utcnow()
+        expired = db.query(ScanJob).filter(
+            ScanJob.status == RUNNING, ScanJob.lease_expires_at < now
+        ).all()
+
+        requeued = 0
+        for job in expired:
+            out_of_attempts = (job.attempts or 0) >= settings.JOB_MAX_ATTEMPTS
+            updated = db.query(ScanJob).filter(
+                ScanJob.id == job.id, ScanJob.status == RUNNING, ScanJob.lease_expires_at < now
+            ).update({
+                ScanJob.status: FINISHED if out_of_attempts else QUEUED,
+                ScanJob.resume: True,
+                ScanJob.worker_id: None,
+                ScanJob.lease_expires_at: None,
+                ScanJob.error: f"Lease of worker {job.worker_id} expired",
+                ScanJob.updated_at: now
+            }, synchronize_session=False)
+            if not updated:
+                continue
+            if out_of_attempts:
+                db.query(Metadata).filter(Metadata.uuid == job.scan_uuid).update({
+                    Metadata.status: "failed",
+                    Metadata.error: f"Scan stopped after {job.attempts} attempts: its worker stopped responding",
+                    Metadata.end_time: now
+                }, synchronize_session=False)
+                logger.error(f"Scan {job.scan_uuid} failed: worker lease expired {job.attempts} times")
+            else:
+                requeued += 1
+                logger.warning(f"Lease of worker {job.worker_id} on scan {job.scan_uuid} expired; queued again")
+        db.commit()
+        return requeued
+
+    def request_stop(self, db: Session, scan_uuid: str, status: str) -> Optional[str]:
+        """
+        Ask for a scan's open job to stop.
+
+        A queued job is closed at once; a running one is flagged for the
+        worker holding it, which may be another process.
+
+        Args:
+            status: "paused" or "cancelled"
+
+        Returns:
+            The job's state before the request, or None without an open job
+        """
+        job = self.open_job(db, scan_uuid)
+        if job is None:
+            return None
+        state = job.status
+        query = db.query(ScanJob).filter(ScanJob.id == job.id, ScanJob.status == state)
+        if state == QUEUED:
+            updated = query.update({ScanJob.status: FINISHED, ScanJob.stop_requested: status,
+                                    ScanJob.updated_at: datetime.utcnow()}, synchronize_session=False)
+        else:
+            updated = query.update({ScanJob.stop_requested: status}, synchronize_session=False)
+        db.commit()
+        if not updated:
+            # Claimed or finished in the meantime
+            return self.request_stop(db, scan_uuid, status)
+        return state
+
+    def queue_position(self, db: Session, scan_uuid: str) -> Optional[int]:
+        """1-based position of a scan's queued job, or None if it is not queued."""
+        job = db.query(ScanJob).filter(ScanJob.scan_uuid == scan_uuid, ScanJob.status == QUEUED).first()
+        if job is None:
+            return None
+        ahead = db.query(ScanJob).filter(
+            ScanJob.status == QUEUED,
+            or_(ScanJob.priority > job.priority, (ScanJob.priority == job.priority) & (ScanJob.id < job.id))
+        ).count()
+        return ahead + 1
+
+
+# Shared job queue for this process
+job_queue = JobQueue()
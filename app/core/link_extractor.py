@@ -0,0 +1,213 @@
+import logging
+import urllib.parse
+from abc import ABC, abstractmethod
+from typing import List, Optional, Union, Dict
+
+from bs4 import BeautifulSoup
+
+from app.core.config import settings
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - optional dependency
+    etree = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:  # pragma: no cover - optional dependency
+    SelectolaxParser = None
+
+logger = logging.getLogger(__name__)
+
+# (tag, attribute) pairs holding a single URL
+LINK_ATTRIBUTES = (
+    ('a', 'href'),
+    ('img', 'src'),
+    ('script', 'src'),
+    ('link', 'href'),
+    ('iframe', 'src'),
+    ('source', 'src'),
+)
+
+# Tags whose srcset attribute holds a list of candidate URLs
+SRCSET_TAGS = ('img', 'source')
+
+_URL_ATTRIBUTES: Dict[str, str] = dict(LINK_ATTRIBUTES)
+
+
+def parse_srcset(value: str) -> List[str]:
+    """Return the URLs of a srcset attribute, dropping width/density descriptors."""
+    urls = []
+    for candidate in value.split(','):
+        candidate = candidate.strip()
+        if candidate:
+            urls.append(candidate.split()[0])
+    return urls
+
+
+class LinkExtractor(ABC):
+    """
+    Extracts link targets from an HTML document.
+
+    Backends only read the URL-bearing attributes listed in LINK_ATTRIBUTES,
+    srcset and the first <base href>, and return absolute URLs.
+    """
+
+    name = "base"
+
+    def extract(self, html: Union[str, bytes], page_url: str) -> List[str]:
+        """
+        Extract absolute link URLs from a page.
+
+        Args:
+            html: Page body as text or raw bytes
+            page_url: URL the page was fetched from
+
+        Returns:
+            List of absolute URLs in document order, with duplicates removed
+        """
+        base_href, raw_urls = self._collect(html)
+        base_url = urllib.parse.urljoin(page_url, base_href) if base_href else page_url
+
+        links = {}
+        for url in raw_urls:
+            url = url.strip()
+            if url and not url.startswith('#'):
+                links[urllib.parse.urljoin(base_url, url)] = None
+        return list(links)
+
+    @abstractmethod
+    def _collect(self, html: Union[str, bytes]):
+        """Return (base href or None, raw URL values) for a document."""
+
+
+class SoupLinkExtractor(LinkExtractor):
+    """BeautifulSoup backend; slowest, but always available."""
+
+    name = "soup"
+
+    def _collect(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        base = soup.find('base', href=True)
+        raw_urls = []
+        for element in soup.find_all(list(_URL_ATTRIBUTES) + list(SRCSET_TAGS)):
+            value = element.get(_URL_ATTRIBUTES.get(element.name, ''))
+            if value:
+                raw_urls.append(value)
+            if element.name in SRCSET_TAGS and element.get('srcset'):
+                raw_urls.extend(parse_srcset(element['srcset']))
+        return (base['href'] if base else None), raw_urls
+
+
+class _LxmlLinkTarget:
+    """lxml parser target that records link attributes from start tags only."""
+
+    def __init__(self):
+        self.base_href = None
+        self.urls = []
+
+    def start(self, tag, attrib):
+        attr = _URL_ATTRIBUTES.get(tag)
+        if attr:
+            value = attrib.get(attr)
+            if value:
+                self.urls.append(value)
+        if tag in SRCSET_TAGS:
+            srcset = attrib.get('srcset')
+            if srcset:
+                self.urls.extend(parse_srcset(srcset))
+        elif tag == 'base' and self.base_href is None:
+            self.base_href = attrib.get('href')
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return self
+
+
+class LxmlLinkExtractor(LinkExtractor):
+    """lxml backend using a streaming parser target; no tree is built."""
+
+    name = "lxml"
+
+    def _collect(self, html):
+        target = _LxmlLinkTarget()
+        parser = etree.HTMLParser(target=target, recover=True, no_network=True)
+        if isinstance(html, str):
+            html = html.encode('utf-8')
+        if html:
+            parser.feed(html)
+        parser.close()
+        return target.base_href, target.urls
+
+
+class SelectolaxLinkExtractor(LinkExtractor):
+    """selectolax backend (lexbor engine); fastest when installed."""
+
+    name = "selectolax"
+
+    _SELECTOR = ', '.join(
+        [f'{tag}[{attr}]' for tag, attr in LINK_ATTRIBUTES] +
+        [f'{tag}[srcset]' for tag in SRCSET_TAGS] +
+        ['base[href]']
+    )
+
+    def _collect(self, html):
+        tree = SelectolaxParser(html)
+        base_href = None
+        raw_urls = []
+        for node in tree.css(self._SELECTOR):
+            attrs = node.attributes
+            if node.tag == 'base':
+                if base_href is None:
+                    base_href = attrs.get('href')
+                continue
+            value = attrs.get(_URL_ATTRIBUTES.get(node.tag, ''))
+            if value:
+                raw_urls.append(value)
+            if node.tag in SRCSET_TAGS and attrs.get('srcset'):
+                raw_urls.extend(parse_srcset(attrs['srcset']))
+        return base_href, raw_urls
+
+
+LINK_EXTRACTORS = {
+    SelectolaxLinkExtractor.name: SelectolaxLinkExtractor,
+    LxmlLinkExtractor.name: LxmlLinkExtractor,
+    SoupLinkExtractor.name: SoupLinkExtractor,
+}
+
+
+def available_backends() -> List[str]:
+    """Return the extractor backends usable in this environment, fastest first."""
+    backends = []
+    if SelectolaxParser is not None:
+        backends.append(SelectolaxLinkExtractor.name)
+    if etree is not None:
+        backends.append(LxmlLinkExtractor.name)
+    backends.append(SoupLinkExtractor.name)
+    return backends
+
+
+def get_link_extractor(name: Optional[str] = None) -> LinkExtractor:
+    """
+    Create a link extractor.
+
+    Args:
+        name: Backend name, or "auto"/None for the fastest available one.
+            An unavailable backend falls back to BeautifulSoup.
+
+    Returns:
+        LinkExtractor instance
+    """
+    name = name or settings.CRAWLER_LINK_EXTRACTOR
+    backends = available_backends()
+    if name == "auto":
+        name = backends[0]
+    elif name not in backends:
+        logger.warning(f"Link extractor '{name}' is not available; using BeautifulSoup")
+        name = SoupLinkExtractor.name
+    return LINK_EXTRACTORS[name]()
@@ -0,0 +1,124 @@
+import logging
+import hashlib
+import re
+from typing import List, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+
+_INVISIBLE_RE = re.compile(
+    r'<(script|style|noscript|template)\b.*?</\1\s*>|<!--.*?-->',
+    re.IGNORECASE | re.DOTALL
+)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WORD_RE = re.compile(r'\w+')
+
+
+def visible_words(html: str) -> List[str]:
+    """Return the lower-cased words of a page's visible text."""
+    text = _INVISIBLE_RE.sub(' ', html)
+    text = _TAG_RE.sub(' ', text)
+    return _WORD_RE.findall(text.lower())
+
+
+def simhash(words: List[str], shingle_size: int = 4) -> int:
+    """
+    Compute a 64-bit SimHash over overlapping word shingles.
+
+    Pages that differ in a few words (tokens, timestamps, ad slots) get
+    signatures that differ in only a few bits.
+
+    Args:
+        words: Tokens of the document
+        shingle_size: Number of consecutive words per shingle
+
+    Returns:
+        Unsigned 64-bit signature
+    """
+    if len(words) < shingle_size:
+        shingles = [' '.join(words)]
+    else:
+        shingles = [' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    counts = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        for bit in range(SIMHASH_BITS):
+            if h >> bit & 1:
+                counts[bit] += 1
+            else:
+                counts[bit] -= 1
+
+    signature = 0
+    for bit, count in enumerate(counts):
+        if count > 0:
+            signature |= 1 << bit
+    return signature
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two signatures."""
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """
+    LSH band index of SimHash signatures for one scan.
+
+    A similarity threshold s allows up to d = floor((1 - s) * 64) differing
+    bits. Signatures are split into d + 1 bands, so by the pigeonhole
+    principle any two signatures within d bits share at least one band
+    exactly; only pages sharing a band are compared.
+    """
+
+    def __init__(self, threshold: float):
+        """
+        Initialize the index.
+
+        Args:
+            threshold: Minimum similarity (0-1) for two pages to be near-duplicates
+        """
+        self.threshold = threshold
+        self.max_distance = int((1.0 - threshold) * SIMHASH_BITS)
+        num_bands = min(self.max_distance + 1, SIMHASH_BITS)
+        band_bits = SIMHASH_BITS // num_bands
+        # (shift, mask) per band; the last band takes the remaining bits
+        self.bands: List[Tuple[int, int]] = []
+        for i in range(num_bands):
+            width = band_bits if i < num_bands - 1 else SIMHASH_BITS - band_bits * i
+            self.bands.append((band_bits * i, (1 << width) - 1))
+        self.buckets: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in self.bands]
+        self.size = 0
+
+    def find(self, signature: int) -> Optional[str]:
+        """Return the cluster key of an indexed page within the threshold, if any."""
+        for (shift, mask), buckets in zip(self.bands, self.buckets):
+            for other, cluster in buckets.get(signature >> shift & mask, ()):
+                if hamming_distance(signature, other) <= self.max_distance:
+                    return cluster
+        return None
+
+    def add(self, signature: int, cluster: str):
+        """Index a cluster representative's signature."""
+        for (shift, mask), buckets in zip(self.bands, self.buckets):
+            buckets.setdefault(signature >> shift & mask, []).append((signature, cluster))
+        self.size += 1
+
+    def assign(self, signature: int, url: str) -> Tuple[str, bool]:
+        """
+        Assign a page to a duplicate cluster.
+
+        Args:
+            signature: SimHash of the page
+            url: URL of the page, used as the key of a new cluster
+
+        Returns:
+            Tuple of (cluster key, True if the page is a near-duplicate of
+            an earlier one)
+        """
+        cluster = self.find(signature)
+        if cluster is not None:
+            return cluster, True
+        self.add(signature, url)
+        return url, False
@@ -0,0 +1,120 @@
+import logging
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional
+
+from app.core.config import settings
+from app.core.link_extractor import LinkExtractor, get_link_extractor
+from app.core.near_duplicate import simhash, visible_words
+
+logger = logging.getLogger(__name__)
+
+_TITLE_RE = re.compile(rb'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+# Link extractors created in this process, by backend name
+_extractors: Dict[str, LinkExtractor] = {}
+
+
+def parse_page(content: bytes, base_url: str, charset: Optional[str] = None,
+               backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse an HTML page. Runs in a parse-pool process, so it only takes and
+    returns picklable values.
+
+    Args:
+        content: Raw page body
+        base_url: URL the page was fetched from
+        charset: Charset from the Content-Type header, if any
+        backend: Link extractor backend name
+
+    Returns:
+        Dictionary with the page's absolute "links", its content
+        "fingerprint", the "simhash" of its visible text and a "features"
+        dictionary (title, size, link_count, word_count)
+    """
+    backend = backend or settings.CRAWLER_LINK_EXTRACTOR
+    extractor = _extractors.get(backend)
+    if extractor is None:
+        extractor = _extractors[backend] = get_link_extractor(backend)
+
+    text = content.decode(charset or 'utf-8', errors='replace')
+    links = extractor.extract(content, base_url)
+    words = visible_words(text)
+
+    title = _TITLE_RE.search(content)
+    features = {
+        "title": title.group(1).decode(charset or 'utf-8', errors='replace').strip() if title else None,
+        "size": len(content),
+        "link_count": len(links),
+        "word_count": len(words),
+    }
+    return {
+        "links": links,
+        "fingerprint": hashlib.md5(text.encode('utf-8')).hexdigest(),
+        "simhash": simhash(words, settings.CRAWLER_SIMHASH_SHINGLE_SIZE),
+        "features": features,
+    }
+
+
+class ParsePool:
+    """
+    Process pool for the crawler's parse stage.
+
+    Parsing is CPU-bound, so running it in worker processes lets fetching
+    (on the event loop) and parsing overlap across cores. The executor is
+    created on first use and shared by all crawls in the process.
+    """
+
+    def __init__(self, processes: Optional[int] = None):
+        """Initialize the pool; `processes` defaults to CRAWLER_PARSE_PROCESSES or the core count."""
+        self.processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self.processes = self.processes or settings.CRAWLER_PARSE_PROCESSES or os.cpu_count() or 1
+            # spawn avoids forking a process that holds event loop and writer threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Parse pool started with {self.processes} processes")
+        return self._executor
+
+    async def parse(self, content: bytes, base_url: str, charset: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse a page in the pool; see parse_page for the result.
+
+        If the pool breaks (e.g. a worker was killed) the page is parsed in
+        this process and a new pool is started for the next page.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), parse_page, content, base_url, charset, settings.CRAWLER_LINK_EXTRACTOR
+            )
+        except BrokenProcessPool:
+            logger.error("Parse pool is broken; restarting it")
+            self.shutdown()
+            return parse_page(content, base_url, charset)
+
+    def shutdown(self, wait: bool = False):
+        """
+        Stop the worker processes.
+
+        Args:
+            wait: Block until they exited; a process about to exit should,
+                or a worker still starting up can hang its exit
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+# Shared parse pool for all crawls in this process
+parse_pool = ParsePool()
@@ -0,0 +1,129 @@
+import logging
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.resource import Resource
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceWriter:
+    """
+    Write-behind buffer for crawled Resource rows.
+
+    Rows are collected in memory and written with bulk inserts once
+    RESOURCE_WRITER_BATCH_SIZE rows are buffered or every
+    RESOURCE_WRITER_FLUSH_SECONDS, on a dedicated writer thread with its own
+    session, so SQLite commits never block the event loop. Listeners are
+    called on the event loop with each batch after it is committed; the rows
+    then carry their database ids. A listener may be a coroutine function;
+    the flush waits for it, so a slow consumer holds back later batches.
+    """
+
+    def __init__(self, bind, batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            bind: SQLAlchemy engine (or connection) to write to
+            batch_size: Rows buffered before a flush is triggered
+            flush_interval: Seconds between periodic flushes
+        """
+        self.bind = bind
+        self.batch_size = batch_size or settings.RESOURCE_WRITER_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.RESOURCE_WRITER_FLUSH_SECONDS
+        self.listeners: List[Callable[[List[Dict[str, Any]]], Any]] = []
+        self.written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resource-writer")
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the periodic flush task on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def add_listener(self, callback: Callable[[List[Dict[str, Any]]], Any]):
+        """Register a callback, plain or async, invoked with every committed batch of rows."""
+        self.listeners.append(callback)
+
+    def add(self, row: Dict[str, Any]):
+        """Buffer a Resource row given as a column mapping."""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        """Number of rows buffered but not yet written."""
+        return len(self._buffer)
+
+    async def _run(self):
+        """Flush on a size trigger or after the flush interval."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing resource batch: {str(e)}", exc_info=True)
+
+    async def flush(self):
+        """Write every buffered row and wait until it is committed."""
+        async with self._flush_lock:
+            while self._buffer:
+                rows = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                loop = asyncio.get_running_loop()
+                try:
+                    await loop.run_in_executor(self._executor, self._write, rows)
+                except Exception:
+                    # Put the batch back so a later flush can retry it
+                    self._buffer[:0] = rows
+                    raise
+                self.written += len(rows)
+                for listener in self.listeners:
+                    # The rows are committed; one failing listener must not keep them from the rest
+                    try:
+                        result = listener(rows)
+                        if inspect.isawaitable(result):
+                            await result
+                    except Exception as e:
+                        logger.error(f"Error in resource writer listener: {str(e)}", exc_info=True)
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        """Bulk insert a batch on the writer thread."""
+        session = Session(bind=self.bind)
+        try:
+            session.bulk_insert_mappings(Resource, rows, return_defaults=True)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        logger.debug(f"Wrote {len(rows)} resources")
+
+    async def close(self):
+        """Flush remaining rows and stop the writer."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
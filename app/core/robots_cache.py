@@ -0,0 +1,142 @@
+import logging
+import asyncio
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+from urllib.robotparser import RobotFileParser
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RobotsRules:
+    """
+    robots.txt rules of one origin, valid until `expires`.
+
+    A missing or unreadable robots.txt is cached as "allow everything"
+    (parser is None), so it is not refetched for every URL.
+    """
+
+    def __init__(self, parser: Optional[RobotFileParser], status: Optional[int], ttl: float):
+        self.parser = parser
+        self.status = status
+        self.expires = time.monotonic() + ttl
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+    def allows(self, url: str, user_agent: str) -> bool:
+        """Check if `user_agent` may fetch `url`."""
+        if self.parser is None:
+            return True
+        return self.parser.can_fetch(user_agent, url)
+
+    @property
+    def sitemaps(self) -> List[str]:
+        """Sitemap URLs listed in robots.txt."""
+        if self.parser is None:
+            return []
+        return self.parser.site_maps() or []
+
+    def crawl_delay(self, user_agent: str) -> Optional[float]:
+        """Return the Crawl-delay for `user_agent` in seconds, capped by CRAWLER_ROBOTS_MAX_CRAWL_DELAY."""
+        if self.parser is None:
+            return None
+        delay = self.parser.crawl_delay(user_agent)
+        if delay is None:
+            return None
+        return min(float(delay), settings.CRAWLER_ROBOTS_MAX_CRAWL_DELAY)
+
+
+class RobotsCache:
+    """
+    Process-wide robots.txt cache shared by all running scans.
+
+    Entries are keyed by origin (scheme and host) and expire after a TTL
+    that depends on the outcome of the fetch. Concurrent lookups for an
+    origin that is not cached share one in-flight fetch.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """Initialize an empty cache holding at most `max_entries` origins."""
+        self.max_entries = max_entries or settings.CRAWLER_ROBOTS_CACHE_SIZE
+        self._entries: "OrderedDict[str, RobotsRules]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.fetches = 0
+
+    @staticmethod
+    def origin_for(url: str) -> str:
+        """Return the scheme://host origin whose robots.txt governs a URL."""
+        parsed = urllib.parse.urlsplit(url)
+        return f"{parsed.scheme}://{parsed.netloc.lower()}"
+
+    async def get(self, session, url: str) -> RobotsRules:
+        """
+        Get the robots.txt rules for a URL, fetching them if needed.
+
+        Args:
+            session: aiohttp session used if robots.txt must be fetched
+            url: URL to look up
+
+        Returns:
+            RobotsRules for the URL's origin
+        """
+        origin = self.origin_for(url)
+        rules = self._entries.get(origin)
+        if rules is not None and not rules.expired:
+            self._entries.move_to_end(origin)
+            self.hits += 1
+            return rules
+
+        task = self._inflight.get(origin)
+        if task is None:
+            task = asyncio.create_task(self._fetch(session, origin))
+            self._inflight[origin] = task
+            task.add_done_callback(lambda _: self._inflight.pop(origin, None))
+        # A cancelled caller must not cancel the fetch other callers wait on
+        return await asyncio.shield(task)
+
+    async def _fetch(self, session, origin: str) -> RobotsRules:
+        """Fetch and parse robots.txt for an origin and store the result."""
+        self.fetches += 1
+        robots_url = f"{origin}/robots.txt"
+        try:
+            async with session.get(robots_url) as response:
+                if response.status == 200:
+                    body = await response.content.read(settings.CRAWLER_ROBOTS_MAX_BYTES)
+                    parser = RobotFileParser(robots_url)
+                    parser.parse(body.decode('utf-8', errors='replace').splitlines())
+                    parser.modified()
+                    rules = RobotsRules(parser, response.status, settings.CRAWLER_ROBOTS_TTL)
+                elif 400 <= response.status < 500:
+                    # No robots.txt - allow all
+                    rules = RobotsRules(None, response.status, settings.CRAWLER_ROBOTS_MISSING_TTL)
+                else:
+                    logger.warning(f"robots.txt for {origin} returned HTTP {response.status}")
+                    rules = RobotsRules(None, response.status, settings.CRAWLER_ROBOTS_ERROR_TTL)
+        except Exception as e:
+            logger.error(f"Error fetching robots.txt for {origin}: {str(e)}")
+            rules = RobotsRules(None, None, settings.CRAWLER_ROBOTS_ERROR_TTL)
+
+        self._entries[origin] = rules
+        self._entries.move_to_end(origin)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return rules
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache size and hit/fetch counters."""
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "fetches": self.fetches
+        }
+
+
+# Shared robots.txt cache for all scans in this process
+robots_cache = RobotsCache()
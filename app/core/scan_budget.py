@@ -0,0 +1,94 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Budget names, as reported in the scan stats
+MAX_TOTAL_BYTES = "max_total_bytes"
+MAX_DURATION_SECONDS = "max_duration_seconds"
+MAX_PAGE_BYTES = "max_page_bytes"
+MAX_REQUESTS_PER_SECOND = "max_requests_per_second"
+
+
+class ScanBudget:
+    """
+    Resource ceilings for one scan and what has been used of them.
+
+    The total download size and the scan duration are hard stops: once
+    either runs out the crawl stops taking new URLs, and the scan finishes
+    with the pages fetched so far. The page size and request rate are
+    enforced per request by the crawler and its scheduler. Limits left at
+    None are not enforced.
+    """
+
+    def __init__(self, max_total_bytes: Optional[int] = None, max_duration_seconds: Optional[float] = None,
+                 max_page_bytes: Optional[int] = None, max_requests_per_second: Optional[float] = None):
+        self.max_total_bytes = max_total_bytes
+        self.max_duration_seconds = max_duration_seconds
+        self.max_page_bytes = max_page_bytes
+        self.max_requests_per_second = max_requests_per_second
+        self.bytes_used = 0
+        self.pages_over_size = 0
+        self.exhausted: Optional[str] = None  # name of the budget that stopped the scan
+        self._started = time.monotonic()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ScanBudget":
+        """Create the budget configured in a scan's config."""
+        return cls(
+            max_total_bytes=config.get(MAX_TOTAL_BYTES),
+            max_duration_seconds=config.get(MAX_DURATION_SECONDS),
+            max_page_bytes=config.get(MAX_PAGE_BYTES),
+            max_requests_per_second=config.get(MAX_REQUESTS_PER_SECOND)
+        )
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the budget was created."""
+        return time.monotonic() - self._started
+
+    def remaining_seconds(self) -> Optional[float]:
+        """Seconds left of the duration budget, or None without one."""
+        if self.max_duration_seconds is None:
+            return None
+        return max(0.0, self.max_duration_seconds - self.elapsed)
+
+    def add_bytes(self, size: int):
+        """Count downloaded bytes against the total download size."""
+        self.bytes_used += size
+
+    def page_limit(self, default: int) -> int:
+        """Return the body size limit for one response, given the crawler's own limit."""
+        if self.max_page_bytes is None:
+            return default
+        return min(default, self.max_page_bytes)
+
+    def check(self) -> Optional[str]:
+        """
+        Check the hard stops.
+
+        Returns:
+            The name of the budget that ran out, or None while the scan may continue
+        """
+        if self.exhausted is None:
+            if self.max_total_bytes is not None and self.bytes_used >= self.max_total_bytes:
+                self.exhausted = MAX_TOTAL_BYTES
+            elif self.max_duration_seconds is not None and self.elapsed >= self.max_duration_seconds:
+                self.exhausted = MAX_DURATION_SECONDS
+            if self.exhausted is not None:
+                logger.info(f"Scan budget {self.exhausted} ran out")
+        return self.exhausted
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the limits, usage and exhausted budget for the scan stats and status."""
+        return {
+            MAX_TOTAL_BYTES: self.max_total_bytes,
+            MAX_DURATION_SECONDS: self.max_duration_seconds,
+            MAX_PAGE_BYTES: self.max_page_bytes,
+            MAX_REQUESTS_PER_SECOND: self.max_requests_per_second,
+            "bytes_used": self.bytes_used,
+            "seconds_used": round(self.elapsed, 1),
+            "pages_over_size": self.pages_over_size,
+            "exhausted": self.exhausted
+        }
@@ -0,0 +1,68 @@
+import logging
+from typing import Callable, List, Optional
+
+from app.models.scan_status import ScanStatus
+
+logger = logging.getLogger(__name__)
+
+
+class ScanStopped(Exception):
+    """Raised at a checkpoint of a scan that was asked to pause or cancel."""
+
+    def __init__(self, status: ScanStatus):
+        self.status = status
+        super().__init__(f"Scan {status.value}")
+
+
+class ScanControl:
+    """
+    Cancel and pause signals for one running scan.
+
+    Signals are cooperative: crawler workers finish the URL in hand and
+    stop taking new ones, and the scan task checks `check()` between its
+    phases. A paused scan keeps its frontier on disk and is continued by
+    a new task; a cancelled one is discarded.
+    """
+
+    def __init__(self):
+        self.requested: Optional[ScanStatus] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    @property
+    def stopping(self) -> bool:
+        """True once a pause or cancel has been requested."""
+        return self.requested is not None
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Call `callback` when a stop is requested, e.g. to wake idle workers."""
+        self._listeners.append(callback)
+        if self.stopping:
+            callback()
+
+    def pause(self):
+        """Ask the scan to stop and keep its progress for a later resume."""
+        self._request(ScanStatus.PAUSED)
+
+    def cancel(self):
+        """Ask the scan to stop for good; overrides an earlier pause."""
+        self._request(ScanStatus.CANCELLED)
+
+    def _request(self, status: ScanStatus):
+        if self.requested == ScanStatus.CANCELLED:
+            return
+        first = self.requested is None
+        self.requested = status
+        logger.info(f"Scan stop requested: {status.value}")
+        if first:
+            for callback in self._listeners:
+                callback()
+
+    def check(self):
+        """
+        Checkpoint between units of work.
+
+        Raises:
+            ScanStopped: If a pause or cancel was requested
+        """
+        if self.requested is not None:
+            raise ScanStopped(self.requested)
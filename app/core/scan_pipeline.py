@@ -0,0 +1,183 @@
+import logging
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class PipelineStage:
+    """
+    One consumer of stored pages: a bounded queue and its own workers.
+
+    A failing item is logged and counted; it never stops the stage.
+    """
+
+    def __init__(self, name: str, handler: Handler, concurrency: int = 1, queue_size: Optional[int] = None):
+        """
+        Initialize the stage.
+
+        Args:
+            name: Stage name, as reported in the scan stats
+            handler: Coroutine function called with each resource row
+            concurrency: Items processed at the same time
+            queue_size: Items waiting before producers are held back; defaults to PIPELINE_QUEUE_SIZE
+        """
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or settings.PIPELINE_QUEUE_SIZE)
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        """Start the stage workers on the running event loop."""
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._work(), name=f"pipeline-{self.name}-{i}")
+                for i in range(self.concurrency)
+            ]
+
+    async def put(self, item: Dict[str, Any]):
+        """Queue an item, waiting while the queue is full."""
+        await self.queue.put(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        if self.queue.full():
+            self.not_full.clear()
+
+    async def _work(self):
+        while True:
+            item = await self.queue.get()
+            self.not_full.set()
+            started = time.monotonic()
+            try:
+                await self.handler(item)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Pipeline stage {self.name} failed on {item.get('original_url')}: {str(e)}")
+            finally:
+                self.busy_seconds += time.monotonic() - started
+                self.queue.task_done()
+
+    async def join(self):
+        """Wait until every queued item has been processed."""
+        await self.queue.join()
+
+    async def stop(self, drain: bool = True):
+        """
+        Stop the workers.
+
+        Args:
+            drain: Process the queued items first; otherwise drop them
+        """
+        if drain:
+            await self.join()
+        else:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.queue.task_done()
+            self.not_full.set()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the stage counters for the scan stats."""
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue.maxsize,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 1),
+            "max_queue_depth": self.max_depth
+        }
+
+
+class ScanPipeline:
+    """
+    Stages that process stored pages while the crawl is still running.
+
+    Each page submitted by the crawler is queued on every stage (or the
+    stages named) and handled by that stage's workers, so validation,
+    indexing and screenshots overlap with downloading instead of running
+    one after another once the crawl has finished. Queues are bounded:
+    `submit` waits while a stage is full, and the crawler calls
+    `wait_for_room` before taking its next URL, so a slow stage holds the
+    crawl back rather than letting pages pile up in memory.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, PipelineStage] = {}
+        self.submitted = 0
+        self.backpressure_seconds = 0.0  # time producers spent waiting for a full stage
+        self._started = False
+
+    def add_stage(self, name: str, handler: Handler, concurrency: int = 1, queue_size: Optional[int] = None):
+        """Add a stage; see PipelineStage for the arguments."""
+        self.stages[name] = PipelineStage(name, handler, concurrency, queue_size)
+
+    def start(self):
+        """Start the workers of every stage."""
+        self._started = True
+        for stage in self.stages.values():
+            stage.start()
+        if self.stages:
+            logger.info(f"Scan pipeline started with stages: {', '.join(self.stages)}")
+
+    async def submit(self, item: Dict[str, Any], stages: Optional[List[str]] = None):
+        """
+        Queue a stored page on its stages, waiting while one of them is full.
+
+        Args:
+            item: Resource row; it must carry its database id
+            stages: Names of the stages to run; defaults to all
+        """
+        started = time.monotonic()
+        for name in stages if stages is not None else list(self.stages):
+            stage = self.stages.get(name)
+            if stage is not None:
+                await stage.put(item)
+        self.submitted += 1
+        self.backpressure_seconds += time.monotonic() - started
+
+    async def wait_for_room(self):
+        """Wait until no stage queue is full."""
+        started = time.monotonic()
+        for stage in self.stages.values():
+            await stage.not_full.wait()
+        self.backpressure_seconds += time.monotonic() - started
+
+    async def close(self):
+        """Process everything queued and stop the stages."""
+        if self._started:
+            self._started = False
+            for stage in self.stages.values():
+                await stage.stop(drain=True)
+
+    async def cancel(self):
+        """Drop queued items and stop the stages, e.g. on pause or cancel."""
+        if self._started:
+            self._started = False
+            for stage in self.stages.values():
+                await stage.stop(drain=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the pipeline counters for the scan stats."""
+        return {
+            "pages_submitted": self.submitted,
+            "backpressure_seconds": round(self.backpressure_seconds, 1),
+            "stages": {name: stage.stats() for name, stage in self.stages.items()}
+        }
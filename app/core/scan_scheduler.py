@@ -0,0 +1,174 @@
+import logging
+import asyncio
+import heapq
+import itertools
+import os
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Share of the fetch and parse capacity given to a scan, by priority
+PRIORITY_WEIGHTS = {"low": 1.0, "normal": 2.0, "high": 4.0}
+DEFAULT_PRIORITY = "normal"
+
+
+class FairShare:
+    """
+    A counting semaphore shared by scans with weighted fair queueing.
+
+    While slots are free they are granted immediately. Once all are taken,
+    waiting requests are served in order of their start tag (start-time
+    fair queueing): each grant advances the scan's tag by 1 / weight, so
+    over any busy period a scan receives slots in proportion to its weight
+    no matter how many workers it has waiting. A scan that was idle
+    restarts at the current virtual time and cannot claim a backlog of
+    credit.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.in_use = 0
+        self.granted: Counter = Counter()  # scan id -> slots granted
+        self._weights: Dict[str, float] = {}
+        self._finish: Dict[str, float] = {}  # scan id -> start tag of its next request
+        self._virtual_time = 0.0
+        self._waiting: List[Tuple[float, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def register(self, scan_id: str, weight: float):
+        """Set the weight of a scan."""
+        self._weights[scan_id] = weight
+
+    def unregister(self, scan_id: str):
+        """Forget a finished scan."""
+        self._weights.pop(scan_id, None)
+        self._finish.pop(scan_id, None)
+        self.granted.pop(scan_id, None)
+
+    def _tag(self, scan_id: str) -> float:
+        start = max(self._virtual_time, self._finish.get(scan_id, 0.0))
+        self._finish[scan_id] = start + 1.0 / self._weights.get(scan_id, PRIORITY_WEIGHTS[DEFAULT_PRIORITY])
+        return start
+
+    async def acquire(self, scan_id: str):
+        """Wait for a slot on behalf of a scan."""
+        tag = self._tag(scan_id)
+        if self.in_use < self.capacity and not self._waiting:
+            self._grant(scan_id, tag)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (tag, next(self._sequence), scan_id, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the waiter was cancelled; pass the slot on
+                self.release()
+            raise
+
+    def release(self):
+        """Return a slot and grant it to the waiting request with the smallest tag."""
+        self.in_use -= 1
+        while self._waiting and self.in_use < self.capacity:
+            tag, _, scan_id, future = heapq.heappop(self._waiting)
+            if future.cancelled():
+                continue
+            self._grant(scan_id, tag)
+            future.set_result(None)
+
+    def _grant(self, scan_id: str, tag: float):
+        self.in_use += 1
+        self._virtual_time = max(self._virtual_time, tag)
+        self.granted[scan_id] += 1
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a slot."""
+        return sum(1 for entry in self._waiting if not entry[3].cancelled())
+
+    def waiting_for(self, scan_id: str) -> int:
+        """Number of requests of one scan waiting for a slot."""
+        return sum(1 for entry in self._waiting if entry[2] == scan_id and not entry[3].cancelled())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "granted": dict(self.granted)
+        }
+
+
+class ScanScheduler:
+    """
+    Process-wide running-scan limit and capacity sharing for concurrent scans.
+
+    A worker starts at most SCHEDULER_MAX_RUNNING_SCANS scans at once in
+    this process; further scans wait as QUEUED jobs in the durable job
+    queue. Running scans keep their own crawl workers, but every fetch and
+    every HTML parse takes a slot from a global pool
+    (SCHEDULER_FETCH_CONCURRENCY sockets, SCHEDULER_PARSE_CONCURRENCY
+    parses) shared by weighted fair queueing, so a large scan with many
+    workers cannot starve small ones.
+    """
+
+    def __init__(self, max_running: Optional[int] = None, fetch_concurrency: Optional[int] = None,
+                 parse_concurrency: Optional[int] = None):
+        """Initialize the scheduler; limits default to the SCHEDULER_* settings."""
+        self.max_running = max_running or settings.SCHEDULER_MAX_RUNNING_SCANS
+        self.fetch = FairShare("fetch", fetch_concurrency or settings.SCHEDULER_FETCH_CONCURRENCY)
+        self.parse = FairShare("parse", parse_concurrency or settings.SCHEDULER_PARSE_CONCURRENCY or os.cpu_count() or 1)
+        self.running: Dict[str, str] = {}  # scan id -> priority
+
+    def free_slots(self) -> int:
+        """Number of scans that may still be started."""
+        return max(0, self.max_running - len(self.running))
+
+    def start(self, scan_id: str, priority: str = DEFAULT_PRIORITY):
+        """Register a starting scan and its share of the fetch and parse pools."""
+        self.running[scan_id] = priority
+        self.fetch.register(scan_id, PRIORITY_WEIGHTS[priority])
+        self.parse.register(scan_id, PRIORITY_WEIGHTS[priority])
+
+    def finish(self, scan_id: str):
+        """Release the running slot of a scan that stopped for any reason."""
+        if self.running.pop(scan_id, None) is not None:
+            self.fetch.unregister(scan_id)
+            self.parse.unregister(scan_id)
+
+    @asynccontextmanager
+    async def fetch_slot(self, scan_id: str):
+        """Hold one of the global fetch slots for a request of the scan."""
+        await self.fetch.acquire(scan_id)
+        try:
+            yield
+        finally:
+            self.fetch.release()
+
+    @asynccontextmanager
+    async def parse_slot(self, scan_id: str):
+        """Hold one of the global parse slots for an HTML parse of the scan."""
+        await self.parse.acquire(scan_id)
+        try:
+            yield
+        finally:
+            self.parse.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the running scans and the use of the shared pools."""
+        return {
+            "max_running_scans": self.max_running,
+            "running": dict(self.running),
+            "fetch": self.fetch.stats(),
+            "parse": self.parse.stats()
+        }
+
+
+# Shared scheduler for all scans in this process
+scan_scheduler = ScanScheduler()
@@ -0,0 +1,273 @@
+import logging
+import hashlib
+import math
+import mmap
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Optional, List, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SeenSet(ABC):
+    """
+    Set of URLs the crawler has already seen.
+
+    Backends implement the subset of the set interface the crawler uses:
+    `add`, `in` and `len`.
+    """
+
+    @abstractmethod
+    def add(self, url: str):
+        """Record a URL as seen."""
+
+    @abstractmethod
+    def __contains__(self, url: str) -> bool:
+        """True if the URL was seen (or, for probabilistic backends, probably seen)."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of URLs added."""
+
+    def close(self):
+        """Release any files held by the backend."""
+
+
+class ExactSeenSet(SeenSet):
+    """In-memory exact set of URL strings."""
+
+    def __init__(self):
+        self.urls = set()
+
+    def add(self, url: str):
+        self.urls.add(url)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.urls
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over a bytearray or a memory-mapped file.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, path: Optional[str] = None):
+        """
+        Initialize a filter sized for `capacity` items at `error_rate`.
+
+        Args:
+            capacity: Number of items the filter is sized for
+            error_rate: Target false positive probability at capacity
+            path: Optional file to memory-map the bit array into
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.count = 0
+
+        num_bytes = (self.num_bits + 7) // 8
+        self._file = None
+        if path:
+            self._file = open(path, "w+b")
+            self._file.truncate(num_bytes)
+            self.bits = mmap.mmap(self._file.fileno(), num_bytes)
+        else:
+            self.bits = bytearray(num_bytes)
+
+    def _positions(self, hashes: Tuple[int, int]) -> List[int]:
+        """Derive the bit positions for an item using double hashing."""
+        h1, h2 = hashes
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, hashes: Tuple[int, int]):
+        """Set the bits for an item given its (h1, h2) hash pair."""
+        bits = self.bits
+        for pos in self._positions(hashes):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, hashes: Tuple[int, int]) -> bool:
+        bits = self.bits
+        for pos in self._positions(hashes):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of the bit array in bytes."""
+        return len(self.bits)
+
+    def close(self):
+        """Release the memory map, if any."""
+        if self._file:
+            self.bits.close()
+            self._file.close()
+            self._file = None
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows by adding larger filters as it fills up.
+
+    Each new filter doubles the capacity and halves the error rate, so the
+    overall false positive rate stays bounded by twice the initial target.
+    """
+
+    def __init__(self, initial_capacity: int, error_rate: float, directory: Optional[str] = None, name: str = "seen"):
+        """Initialize with a single filter of `initial_capacity`."""
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.directory = directory
+        self.name = name
+        self.filters: List[BloomFilter] = []
+        self._grow()
+
+    def _grow(self):
+        """Append a new, larger filter."""
+        index = len(self.filters)
+        capacity = self.initial_capacity * (2 ** index)
+        error_rate = self.error_rate * (0.5 ** (index + 1))
+        path = None
+        if self.directory:
+            path = os.path.join(self.directory, f"{self.name}.bloom.{index}")
+        self.filters.append(BloomFilter(capacity, error_rate, path))
+
+    def add(self, hashes: Tuple[int, int]):
+        """Add an item's hash pair, growing the filter when the current one is full."""
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            self._grow()
+            current = self.filters[-1]
+        current.add(hashes)
+
+    def __contains__(self, hashes: Tuple[int, int]) -> bool:
+        return any(hashes in f for f in self.filters)
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of all bit arrays in bytes."""
+        return sum(f.size_bytes for f in self.filters)
+
+    def close(self):
+        for f in self.filters:
+            f.close()
+
+
+class BloomSeenSet(SeenSet):
+    """
+    Compact seen-set: a scalable Bloom filter in memory (or mmap) with the
+    exact URLs kept in an on-disk SQLite table.
+
+    Negative lookups are answered by the filter alone. Positive lookups are
+    confirmed against the disk table, so a filter false positive never
+    causes a URL to be skipped.
+    """
+
+    def __init__(self, directory: str, name: str = "seen", use_mmap: bool = False):
+        """
+        Initialize the seen-set.
+
+        Args:
+            directory: Directory for the exact on-disk store (and mmap files)
+            name: Name used for the files of this set
+            use_mmap: Memory-map the Bloom filter bits from files in `directory`
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.filter = ScalableBloomFilter(
+            settings.CRAWLER_BLOOM_INITIAL_CAPACITY,
+            settings.CRAWLER_BLOOM_ERROR_RATE,
+            directory if use_mmap else None,
+            name
+        )
+        self.path = os.path.join(directory, f"{name}.db")
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("CREATE TABLE seen (url TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._buffer = set()
+        self.count = 0
+        self.false_positives = 0
+
+    @staticmethod
+    def _hashes(url: str) -> Tuple[int, int]:
+        """Hash a URL once into the pair used by every filter."""
+        digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, url: str):
+        hashes = self._hashes(url)
+        if hashes in self.filter and self._confirm(url):
+            return
+        self.filter.add(hashes)
+        self._buffer.add(url)
+        self.count += 1
+        if len(self._buffer) >= settings.CRAWLER_BLOOM_FLUSH_SIZE:
+            self._flush()
+
+    def __contains__(self, url: str) -> bool:
+        if self._hashes(url) not in self.filter:
+            return False
+        if self._confirm(url):
+            return True
+        self.false_positives += 1
+        return False
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _confirm(self, url: str) -> bool:
+        """Check the exact store for a URL the filter reports as present."""
+        if url in self._buffer:
+            return True
+        return self.conn.execute("SELECT 1 FROM seen WHERE url = ?", (url,)).fetchone() is not None
+
+    def _flush(self):
+        """Move buffered URLs into the on-disk table."""
+        self.conn.executemany("INSERT OR IGNORE INTO seen (url) VALUES (?)", ((u,) for u in self._buffer))
+        self.conn.commit()
+        self._buffer.clear()
+
+    @property
+    def size_bytes(self) -> int:
+        """Bytes held in memory by the filter."""
+        return self.filter.size_bytes
+
+    def close(self):
+        self._buffer.clear()
+        self.conn.close()
+        self.filter.close()
+
+
+SEEN_SET_BACKENDS = ("exact", "bloom")
+
+
+def create_seen_set(backend: str, directory: Optional[str] = None, name: str = "seen") -> SeenSet:
+    """
+    Create a seen-set for the given backend name.
+
+    Args:
+        backend: "exact" or "bloom"
+        directory: Directory for on-disk data, required by the bloom backend
+        name: Name used for the backend's files
+
+    Returns:
+        SeenSet instance
+    """
+    if backend == "exact":
+        return ExactSeenSet()
+    if backend == "bloom":
+        if not directory:
+            raise ValueError("The bloom seen-set backend needs a directory")
+        return BloomSeenSet(directory, name, use_mmap=settings.CRAWLER_BLOOM_USE_MMAP)
+    raise ValueError(f"Unknown seen-set backend: {backend}")
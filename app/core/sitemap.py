@@ -0,0 +1,169 @@
+import logging
+import zlib
+from collections import deque
+from contextlib import aclosing
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from xml.etree.ElementTree import XMLPullParser, ParseError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a sitemap <lastmod> (W3C datetime) into a naive local datetime,
+    comparable with Resource.download_time.
+    """
+    if not value:
+        return None
+    try:
+        lastmod = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if lastmod.tzinfo is not None:
+        lastmod = lastmod.astimezone().replace(tzinfo=None)
+    return lastmod
+
+
+def parse_priority(value: Optional[str]) -> Optional[float]:
+    """Parse a sitemap <priority> (0.0 to 1.0); invalid values are ignored."""
+    if not value:
+        return None
+    try:
+        priority = float(value)
+    except ValueError:
+        return None
+    if not 0.0 <= priority <= 1.0:
+        return None
+    return priority
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from a tag."""
+    return tag.rsplit('}', 1)[-1]
+
+
+async def iter_sitemap(session, url: str) -> AsyncIterator[Tuple[str, str, Optional[str], Optional[str]]]:
+    """
+    Stream one sitemap or sitemap index, parsing it as it downloads.
+
+    Gzip files are decompressed on the fly and each <url>/<sitemap> element
+    is discarded once read, so memory use does not grow with the file.
+
+    Args:
+        session: aiohttp session
+        url: Sitemap URL
+
+    Yields:
+        (kind, loc, lastmod, priority) tuples, where kind is "url" for a
+        page and "sitemap" for a child sitemap listed in an index
+    """
+    parser = XMLPullParser(events=('start', 'end'))
+    decompressor = None
+    root = None
+    size = 0
+
+    async with session.get(url) as response:
+        if response.status != 200:
+            logger.warning(f"Sitemap {url} returned HTTP {response.status}")
+            return
+
+        first = True
+        async for chunk in response.content.iter_chunked(settings.CRAWLER_CHUNK_SIZE):
+            if first:
+                # .xml.gz files are usually served without Content-Encoding
+                if chunk.startswith(GZIP_MAGIC):
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                first = False
+
+            while chunk:
+                if decompressor is not None:
+                    # Inflate in bounded pieces so a highly compressed chunk
+                    # never expands into one large parse
+                    piece = decompressor.decompress(chunk, settings.CRAWLER_CHUNK_SIZE)
+                    chunk = decompressor.unconsumed_tail
+                else:
+                    piece, chunk = chunk, b''
+
+                size += len(piece)
+                if size > settings.CRAWLER_SITEMAP_MAX_BYTES:
+                    logger.warning(f"Sitemap {url} exceeds {settings.CRAWLER_SITEMAP_MAX_BYTES} bytes; truncated")
+                    return
+
+                try:
+                    parser.feed(piece)
+                except ParseError as e:
+                    logger.warning(f"Invalid sitemap XML at {url}: {str(e)}")
+                    return
+
+                for event, element in parser.read_events():
+                    if event == 'start':
+                        if root is None:
+                            root = element
+                        continue
+
+                    name = _local_name(element.tag)
+                    if name not in ('url', 'sitemap'):
+                        continue
+                    loc = lastmod = priority = None
+                    for child in element:
+                        child_name = _local_name(child.tag)
+                        if child_name == 'loc' and child.text:
+                            loc = child.text.strip()
+                        elif child_name == 'lastmod' and child.text:
+                            lastmod = child.text.strip()
+                        elif child_name == 'priority' and child.text:
+                            priority = child.text.strip()
+                    # Entries are direct children of the root; drop them once read
+                    root.clear()
+                    if loc:
+                        yield name, loc, lastmod, priority
+
+
+class SitemapSeeder:
+    """
+    Walks the sitemaps of a site, following sitemap indexes breadth-first,
+    and yields the page URLs they list.
+    """
+
+    def __init__(self, session, max_files: Optional[int] = None):
+        """
+        Initialize the seeder.
+
+        Args:
+            session: aiohttp session used to fetch sitemaps
+            max_files: Maximum number of sitemap files to read
+        """
+        self.session = session
+        self.max_files = max_files or settings.CRAWLER_SITEMAP_MAX_FILES
+        self.files_read = 0
+        self.urls_found = 0
+
+    async def urls(self, sitemap_urls: List[str]) -> AsyncIterator[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        Yield (page URL, lastmod, priority) for every page listed by the given sitemaps.
+
+        Args:
+            sitemap_urls: Sitemap or sitemap index URLs, e.g. from robots.txt
+        """
+        pending = deque(sitemap_urls)
+        seen = set(sitemap_urls)
+        while pending and self.files_read < self.max_files:
+            sitemap_url = pending.popleft()
+            self.files_read += 1
+            try:
+                async with aclosing(iter_sitemap(self.session, sitemap_url)) as entries:
+                    async for kind, loc, lastmod, priority in entries:
+                        if kind == 'sitemap':
+                            if loc not in seen:
+                                seen.add(loc)
+                                pending.append(loc)
+                        else:
+                            self.urls_found += 1
+                            yield loc, lastmod, priority
+            except Exception as e:
+                logger.error(f"Error reading sitemap {sitemap_url}: {str(e)}")
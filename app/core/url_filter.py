@@ -0,0 +1,233 @@
+import logging
+import os
+import re
+from typing import List, Dict, Any, Optional, Iterable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Characters that make a pattern more than a plain literal
+_REGEX_META = set('.^$*+?{}[]\\|()')
+
+# Scheme, host and path of an absolute HTTP(S) URL, without query or fragment
+_URL_RE = re.compile(r'https?://([^/?#]*)([^?#]*)')
+
+# A numbered backreference (\1) or conditional ((?(1)...)), not itself escaped
+_NUMBERED_REFERENCE = re.compile(r'(?:^|[^\\])(?:\\\\)*\\[1-9]|\(\?\(\d')
+
+
+def _common_prefix(strings: List[str]) -> str:
+    first, last = min(strings), max(strings)
+    i = 0
+    while i < len(first) and first[i] == last[i]:
+        i += 1
+    return first[:i]
+
+
+class PrefixTrie:
+    """
+    Compressed (radix) trie answering "does the string start with any
+    stored prefix?". Edges carry whole substrings, so a lookup costs one
+    `startswith` per branching point rather than one step per character.
+    """
+
+    def __init__(self, prefixes: Iterable[str] = ()):
+        prefixes = set(prefixes)
+        self.size = len(prefixes)
+        self.root = self._build(list(prefixes))
+
+    def _build(self, suffixes: List[str]):
+        """Return (is_terminal, {first char: (edge label, child)}) for a set of suffixes."""
+        groups: Dict[str, List[str]] = {}
+        for suffix in suffixes:
+            if suffix:
+                groups.setdefault(suffix[0], []).append(suffix)
+        children = {}
+        for char, group in groups.items():
+            label = _common_prefix(group)
+            children[char] = (label, self._build([s[len(label):] for s in group]))
+        return '' in suffixes, children
+
+    def matches(self, value: str) -> bool:
+        """True if some stored prefix is a prefix of `value`."""
+        terminal, children = self.root
+        i = 0
+        while not terminal:
+            if i >= len(value):
+                return False
+            edge = children.get(value[i])
+            if edge is None:
+                return False
+            label, (terminal, children) = edge
+            if not value.startswith(label, i):
+                return False
+            i += len(label)
+        return True
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def literal_prefix(pattern: str) -> Optional[str]:
+    """
+    Return the literal a pattern matches at the start of a string, if the
+    pattern is nothing more than "^" followed by a literal (escapes allowed).
+    """
+    if not pattern.startswith('^'):
+        return None
+    literal = []
+    chars = iter(pattern[1:])
+    for char in chars:
+        if char == '\\':
+            escaped = next(chars, None)
+            if escaped is None or escaped.isalnum():
+                # \d, \w, ... are classes, not literals
+                return None
+            literal.append(escaped)
+        elif char in _REGEX_META:
+            return None
+        else:
+            literal.append(char)
+    return ''.join(literal)
+
+
+class PatternSet:
+    """
+    Several regexes matched as one: anchored literal patterns go into a
+    prefix trie, everything else into a single alternation regex. Patterns
+    that cannot share that regex are matched one by one.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Compile a group of patterns.
+
+        Raises:
+            ValueError: If a pattern is not a valid regular expression
+        """
+        self.patterns = [p for p in patterns if p]
+        prefixes = []
+        regexes = []
+        for pattern in self.patterns:
+            prefix = literal_prefix(pattern)
+            if prefix is not None:
+                prefixes.append(prefix)
+                continue
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid URL pattern {pattern!r}: {e}")
+            regexes.append(pattern)
+        self.trie = PrefixTrie(prefixes)
+
+        self.regex = None
+        self.fallback: List[re.Pattern] = []
+        combined = []
+        for pattern in regexes:
+            if _NUMBERED_REFERENCE.search(pattern):
+                # Groups are renumbered inside the alternation, so the reference would point elsewhere
+                self.fallback.append(re.compile(pattern))
+            else:
+                combined.append(pattern)
+        if combined:
+            try:
+                self.regex = re.compile('|'.join(f'(?:{p})' for p in combined))
+            except re.error:
+                # Patterns with global flags or clashing group names cannot be combined
+                self.fallback += [re.compile(p) for p in combined]
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def matches(self, url: str) -> bool:
+        """True if any pattern in the set matches `url` (re.search semantics)."""
+        if self.trie.size and self.trie.matches(url):
+            return True
+        if self.regex is not None and self.regex.search(url) is not None:
+            return True
+        return any(regex.search(url) for regex in self.fallback)
+
+
+class UrlFilter:
+    """
+    Decides which discovered URLs a scan crawls. Built once per scan, with
+    every rule compiled up front and cheap checks run first: scheme, domain,
+    skipped extensions, path restriction, then exclude and include patterns.
+    """
+
+    def __init__(self, base_domain: str, follow_external_links: bool = False,
+                 skip_extensions: Iterable[str] = (), path_restriction: Optional[str] = None,
+                 include_patterns: Iterable[str] = (), exclude_patterns: Iterable[str] = (),
+                 required_patterns: Iterable[str] = ()):
+        """
+        Build the filter.
+
+        Args:
+            base_domain: Domain of the start URL
+            follow_external_links: Allow URLs on other domains
+            skip_extensions: File extensions (with the dot) never crawled
+            path_restriction: Path prefix URLs must start with
+            include_patterns: If given, URLs must match at least one
+            exclude_patterns: URLs matching any of these are rejected
+            required_patterns: If given, URLs must also match at least one of
+                these (the REGEX mode's inclusive pattern)
+        """
+        self.base_domain = base_domain
+        self.follow_external_links = follow_external_links
+        self.skip_extensions = frozenset(ext.lower() for ext in skip_extensions)
+        self.path_restriction = path_restriction or None
+        self.include = PatternSet(include_patterns)
+        self.exclude = PatternSet(exclude_patterns)
+        self.required = PatternSet(required_patterns)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], base_domain: str) -> "UrlFilter":
+        """Build the filter for a crawler configuration dictionary."""
+        exclude = list(config.get("exclude_patterns") or [])
+        required = []
+        if config.get("regex_pattern"):
+            if config.get("regex_is_inclusive", True):
+                required.append(config["regex_pattern"])
+            else:
+                exclude.append(config["regex_pattern"])
+
+        return cls(
+            base_domain,
+            follow_external_links=config.get("follow_external_links", False),
+            skip_extensions=settings.SKIP_EXTENSIONS,
+            path_restriction=config.get("path_restriction"),
+            include_patterns=config.get("include_patterns") or [],
+            exclude_patterns=exclude,
+            required_patterns=required
+        )
+
+    def allows(self, url: str) -> bool:
+        """Determine if a URL should be crawled."""
+        # Skip non-HTTP(S) URLs
+        match = _URL_RE.match(url)
+        if match is None:
+            return False
+        netloc, path = match.groups()
+
+        # Check domain restrictions
+        if not self.follow_external_links and netloc.lower() != self.base_domain:
+            return False
+
+        # Check file extensions
+        if self.skip_extensions and os.path.splitext(path)[1].lower() in self.skip_extensions:
+            return False
+
+        # Apply path restriction
+        if self.path_restriction and not path.startswith(self.path_restriction):
+            return False
+
+        # Apply pattern rules
+        if self.exclude and self.exclude.matches(url):
+            return False
+        if self.include and not self.include.matches(url):
+            return False
+        if self.required and not self.required.matches(url):
+            return False
+
+        return True
@@ -0,0 +1,147 @@
+import heapq
+import itertools
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.url_template import TemplateClusters
+
+logger = logging.getLogger(__name__)
+
+# Score changes smaller than this do not reorder the heap
+RESCORE_EPSILON = 1e-6
+
+
+class UrlScorer:
+    """
+    Scores queued URLs for a best-first crawl; higher scores are fetched first.
+
+    A score combines four signals, each in [0, 1] and weighted by the
+    CRAWLER_PRIORITY_* settings:
+
+    - depth: shallow pages first
+    - inbound links: pages linked from many crawled pages first
+    - sitemap priority: the page's <priority> in the site's sitemaps
+    - template novelty: URL templates with few pages fetched so far first,
+      so pagination and archive pages do not use up the max_urls budget
+
+    Inbound counts and novelty change while the crawl runs; queued URLs are
+    re-scored lazily by PriorityReadyQueue.
+    """
+
+    def __init__(self, templates: Optional[TemplateClusters] = None):
+        """Initialize the scorer, sharing `templates` with the crawler if given."""
+        self.inbound: Dict[str, int] = {}
+        self.sitemap_priority: Dict[str, float] = {}
+        self.templates = templates if templates is not None else TemplateClusters()
+
+    def add_url(self, url: str):
+        """Learn the template of a newly queued URL."""
+        self.templates.add(url)
+
+    def add_link(self, url: str):
+        """Count a link to `url` found on a crawled page."""
+        self.inbound[url] = self.inbound.get(url, 0) + 1
+
+    def set_sitemap_priority(self, url: str, priority: float):
+        """Record the <priority> a sitemap gives `url`."""
+        self.sitemap_priority[url] = priority
+
+    def mark_dispatched(self, url: str):
+        """Count a fetch for the URL's template, lowering the novelty of its siblings."""
+        self.templates.record("fetched", url)
+        # The URL is never scored again
+        self.inbound.pop(url, None)
+        self.sitemap_priority.pop(url, None)
+
+    def score(self, url: str, depth: int) -> float:
+        """Return the current priority of a queued URL."""
+        inbound = self.inbound.get(url, 0)
+        fetched = self.templates.count("fetched", url)
+        return (
+            settings.CRAWLER_PRIORITY_DEPTH_WEIGHT / (1 + depth)
+            + settings.CRAWLER_PRIORITY_LINK_WEIGHT * inbound / (1 + inbound)
+            + settings.CRAWLER_PRIORITY_SITEMAP_WEIGHT * self.sitemap_priority.get(url, 0.0)
+            + settings.CRAWLER_PRIORITY_NOVELTY_WEIGHT / (1 + fetched)
+        )
+
+
+class PriorityReadyQueue:
+    """
+    Max-heap of (url, depth) items ordered by UrlScorer score.
+
+    Scores are computed when an item is pushed and kept up to date lazily:
+    an item whose score rises (new inbound links) is re-pushed through
+    `update`, leaving its old entry behind as a tombstone, and an item
+    whose score has dropped (its template was fetched meanwhile) is pushed
+    back when it reaches the top. Without a scorer the queue is FIFO.
+    """
+
+    def __init__(self, scorer: Optional[UrlScorer] = None):
+        self.scorer = scorer
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}  # url -> live heap entry
+        self._counter = itertools.count()
+        self.rescored = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+    def score(self, item: Tuple[str, int]) -> float:
+        """Return the current score of an item (0 without a scorer)."""
+        if self.scorer is None:
+            return 0.0
+        return self.scorer.score(*item)
+
+    def push(self, item: Tuple[str, int]):
+        """Queue an item at its current score."""
+        self._push(item, self.score(item))
+
+    def _push(self, item: Tuple[str, int], score: float):
+        old = self._entries.get(item[0])
+        if old is not None:
+            old[2] = None
+        entry = [-score, next(self._counter), item]
+        self._entries[item[0]] = entry
+        heapq.heappush(self._heap, entry)
+
+    def extend(self, items: Iterable[Tuple[str, int]]):
+        """Queue several items."""
+        for item in items:
+            self.push(item)
+
+    def update(self, url: str):
+        """Move a queued URL up if its score has risen."""
+        entry = self._entries.get(url)
+        if entry is None or self.scorer is None:
+            return
+        score = self.score(entry[2])
+        if score > -entry[0] + RESCORE_EPSILON:
+            self.rescored += 1
+            self._push(entry[2], score)
+
+    def pop(self) -> Tuple[str, int]:
+        """
+        Remove and return the item with the highest current score.
+
+        Raises:
+            IndexError: If the queue is empty
+        """
+        while True:
+            entry = heapq.heappop(self._heap)
+            item = entry[2]
+            if item is None:
+                continue
+            if self.scorer is not None and self._heap:
+                score = self.score(item)
+                if -self._heap[0][0] > score + RESCORE_EPSILON:
+                    # Stale score; the next entry is better now
+                    self.rescored += 1
+                    entry[2] = None
+                    self._push(item, score)
+                    continue
+            del self._entries[item[0]]
+            return item
@@ -0,0 +1,197 @@
+import re
+import urllib.parse
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+# Path segment classes, after the URL categories of RegexService.get_examples
+_NUMBER_RE = re.compile(r'^\d+$')
+_YEAR_RE = re.compile(r'^(19|20)\d{2}$')
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_ID_RE = re.compile(r'^(?=[^/]*\d)[0-9a-f-]{8,}$', re.IGNORECASE)
+_DIGITS_RE = re.compile(r'\d+')
+
+# Query parameters that never change the page
+TRACKING_PARAMS = frozenset({
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+    "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid",
+})
+
+VARIABLE_SEGMENT = '{*}'
+
+
+def _segment_token(segment: str, previous: Optional[str]) -> str:
+    """Replace the variable parts of one path segment with placeholders."""
+    if _NUMBER_RE.match(segment):
+        if _YEAR_RE.match(segment):
+            return '{yyyy}'
+        if previous in ('{yyyy}', '{mm}') and len(segment) <= 2:
+            # /2023/05/01/ archive paths
+            return '{mm}' if previous == '{yyyy}' else '{dd}'
+        return '{n}'
+    if _ID_RE.match(segment):
+        return '{id}'
+    segment = _EMAIL_RE.sub('{email}', segment)
+    segment = _DATE_RE.sub('{date}', segment)
+    return _DIGITS_RE.sub('{n}', segment)
+
+
+def url_template(url: str) -> str:
+    """
+    Reduce a URL to the template it was probably generated from.
+
+    Path segments are tokenized: numbers, /yyyy/mm/dd dates, ids, emails
+    and digit runs inside slugs become placeholders. The query string is
+    reduced to its sorted parameter names, without tracking parameters.
+    So https://example.com/product/123?color=red&utm_source=x and
+    https://example.com/product/456?color=blue share the template
+    example.com/product/{n}?color.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    segments = []
+    previous = None
+    for segment in parsed.path.split('/'):
+        previous = _segment_token(segment, previous)
+        segments.append(previous)
+    template = parsed.netloc.lower() + '/'.join(segments)
+
+    keys = sorted({
+        key for key, _ in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+    })
+    if keys:
+        template += '?' + '&'.join(keys)
+    return template
+
+
+class TemplateLearner:
+    """
+    Generalizes URL templates from the URLs discovered so far.
+
+    A path position whose parent has more than `max_literals` distinct
+    values (tag names, usernames, article slugs) is treated as a variable,
+    so /tag/python and /tag/rust end up in the template /tag/{*}.
+    """
+
+    def __init__(self, max_literals: Optional[int] = None):
+        self.max_literals = max_literals or settings.CRAWLER_TEMPLATE_MAX_LITERALS
+        self._literals: Dict[str, Set[str]] = {}  # parent -> literal child segments seen
+        self._variable: Set[str] = set()  # parents whose child segment varies
+
+    def _walk(self, template: str, learn: bool):
+        path, _, query = template.partition('?')
+        segments = path.split('/')
+        parent = segments[0]
+        generalized = [parent]
+        collapsed = False
+        for segment in segments[1:]:
+            if parent in self._variable:
+                segment = VARIABLE_SEGMENT
+            elif learn:
+                literals = self._literals.setdefault(parent, set())
+                literals.add(segment)
+                if len(literals) > self.max_literals:
+                    self._variable.add(parent)
+                    del self._literals[parent]
+                    segment = VARIABLE_SEGMENT
+                    collapsed = True
+            generalized.append(segment)
+            parent = '/'.join(generalized)
+        result = parent + ('?' + query if query else '')
+        return result, collapsed
+
+    def observe(self, template: str) -> bool:
+        """
+        Learn from a discovered URL's template.
+
+        Returns:
+            True if a path position became variable, which changes the
+            generalized form of previously seen templates
+        """
+        return self._walk(template, learn=True)[1]
+
+    def generalize(self, template: str) -> str:
+        """Return the learned template covering a URL template."""
+        return self._walk(template, learn=False)[0]
+
+
+class TemplateClusters:
+    """
+    Clusters a crawl's URLs by learned template and counts, per template,
+    the URLs discovered, fetched and skipped by sampling.
+
+    Counts are kept per url_template and regrouped whenever the learner
+    generalizes a path position, so they always refer to current templates.
+    """
+
+    KINDS = ("discovered", "fetched", "skipped")
+
+    def __init__(self, learner: Optional[TemplateLearner] = None):
+        self.learner = learner or TemplateLearner()
+        self._by_url_template: Dict[str, Counter] = {kind: Counter() for kind in self.KINDS}
+        self._by_template: Dict[str, Counter] = {kind: Counter() for kind in self.KINDS}
+        self._examples: Dict[str, str] = {}  # url_template -> first URL seen
+
+    def template(self, url: str) -> str:
+        """Return the learned template of a URL."""
+        return self.learner.generalize(url_template(url))
+
+    def add(self, url: str):
+        """Learn from a newly discovered URL and count it."""
+        template = url_template(url)
+        self._examples.setdefault(template, url)
+        if self.learner.observe(template):
+            self._regroup()
+        self._count("discovered", template)
+
+    def record(self, kind: str, url: str):
+        """Count a URL as "fetched" or "skipped"."""
+        self._count(kind, url_template(url))
+
+    def count(self, kind: str, url: str) -> int:
+        """Return the number of URLs of a kind in the URL's template."""
+        return self._by_template[kind].get(self.template(url), 0)
+
+    def sampled(self, url: str) -> int:
+        """Return the number of URLs of the URL's template admitted to the crawl."""
+        template = self.template(url)
+        return self._by_template["discovered"].get(template, 0) - self._by_template["skipped"].get(template, 0)
+
+    def _count(self, kind: str, template: str):
+        self._by_url_template[kind][template] += 1
+        self._by_template[kind][self.learner.generalize(template)] += 1
+
+    def _regroup(self):
+        for kind, counts in self._by_url_template.items():
+            grouped = Counter()
+            for template, count in counts.items():
+                grouped[self.learner.generalize(template)] += count
+            self._by_template[kind] = grouped
+
+    def __len__(self) -> int:
+        return len(self._by_template["discovered"])
+
+    def stats(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the largest templates with their counts and an example URL.
+
+        Args:
+            limit: Maximum number of templates; defaults to CRAWLER_TEMPLATE_STATS_LIMIT
+        """
+        limit = limit or settings.CRAWLER_TEMPLATE_STATS_LIMIT
+        examples = {}
+        for template, url in self._examples.items():
+            examples.setdefault(self.learner.generalize(template), url)
+        discovered = self._by_template["discovered"]
+        return [
+            {
+                "template": template,
+                "urls": count,
+                "fetched": self._by_template["fetched"].get(template, 0),
+                "skipped": self._by_template["skipped"].get(template, 0),
+                "example": examples.get(template)
+            }
+            for template, count in discovered.most_common(limit)
+        ]
@@ -0,0 +1,189 @@
+import logging
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Interval of the event loop lag probe, in seconds
+LAG_PROBE_SECONDS = 0.05
+
+INCREASE = "increase"
+DECREASE = "decrease"
+HOLD = "hold"
+
+
+class WorkerAutoscaler:
+    """
+    AIMD controller for the number of page workers of a crawl.
+
+    Every CRAWLER_AUTOSCALE_INTERVAL seconds it looks at the pages finished,
+    the mean response latency, the share of failed or throttled responses
+    and the worst event loop lag of the interval. Overload (errors, lag, or
+    latency above the best level seen times CRAWLER_AUTOSCALE_LATENCY_TOLERANCE)
+    cuts the worker count by CRAWLER_AUTOSCALE_BACKOFF. Otherwise, while
+    every worker is busy, it adds CRAWLER_AUTOSCALE_STEP workers as long as
+    the previous step raised throughput by CRAWLER_AUTOSCALE_MIN_GAIN; once
+    throughput levels off it holds, probing upwards again after
+    CRAWLER_AUTOSCALE_PROBE_INTERVALS steady intervals. The count stays
+    within [minimum, maximum].
+
+    Changes of the worker count are kept, with the measurements behind
+    them, for the scan stats.
+    """
+
+    def __init__(self, minimum: int, maximum: int, initial: Optional[int] = None):
+        """
+        Initialize the controller.
+
+        Args:
+            minimum: Fewest page workers
+            maximum: Most page workers
+            initial: Starting count; defaults to `minimum`
+        """
+        self.minimum = max(1, min(minimum, maximum))
+        self.maximum = max(self.minimum, maximum)
+        self.workers = min(self.maximum, max(self.minimum, initial or self.minimum))
+        self.peak = self.workers
+        self.decisions: List[Dict[str, Any]] = []
+        self.counts = {INCREASE: 0, DECREASE: 0, HOLD: 0}
+        self.baseline_latency: Optional[float] = None
+        self._started = time.monotonic()
+        self._window_started = self._started
+        self._pages = 0
+        self._responses = 0
+        self._failures = 0
+        self._latency_total = 0.0
+        self._last_action: Optional[str] = None
+        self._last_throughput = 0.0
+        self._cooldown = 0  # intervals to hold before probing upwards again
+
+    def record_response(self, elapsed: float, failed: bool):
+        """Count a page response and its time to headers."""
+        self._responses += 1
+        self._latency_total += elapsed
+        if failed:
+            self._failures += 1
+
+    def record_page(self):
+        """Count a page finished by a worker."""
+        self._pages += 1
+
+    def decide(self, idle_workers: int, loop_lag: float) -> int:
+        """
+        Close the measurement window and choose the worker count for the next one.
+
+        Args:
+            idle_workers: Workers waiting for a URL or a fetch slot right now
+            loop_lag: Worst event loop delay seen in the window, in seconds
+
+        Returns:
+            The new worker count
+        """
+        now = time.monotonic()
+        elapsed = max(now - self._window_started, 1e-6)
+        throughput = self._pages / elapsed
+        latency = self._latency_total / self._responses if self._responses else None
+        error_rate = self._failures / self._responses if self._responses else 0.0
+        if latency is not None and (self.baseline_latency is None or latency < self.baseline_latency):
+            self.baseline_latency = latency
+
+        action, reason = HOLD, None
+        if error_rate > settings.CRAWLER_AUTOSCALE_MAX_ERROR_RATE:
+            action, reason = DECREASE, "error rate"
+        elif loop_lag > settings.CRAWLER_AUTOSCALE_MAX_LOOP_LAG:
+            action, reason = DECREASE, "event loop lag"
+        elif latency is not None and latency > self.baseline_latency * settings.CRAWLER_AUTOSCALE_LATENCY_TOLERANCE:
+            action, reason = DECREASE, "latency"
+        elif not self._responses:
+            reason = "no responses"
+        elif idle_workers > 0:
+            # The frontier or the fetch slots do not keep the current workers busy
+            reason = "idle workers"
+        elif self._last_action == INCREASE and \
+                throughput < self._last_throughput * (1 + settings.CRAWLER_AUTOSCALE_MIN_GAIN):
+            self._cooldown = settings.CRAWLER_AUTOSCALE_PROBE_INTERVALS
+            reason = "throughput flat"
+        elif self._cooldown > 0:
+            self._cooldown -= 1
+            reason = "steady"
+        else:
+            action = INCREASE
+        if action == DECREASE:
+            self._cooldown = settings.CRAWLER_AUTOSCALE_PROBE_INTERVALS
+
+        before = self.workers
+        if action == INCREASE:
+            self.workers = min(self.maximum, self.workers + settings.CRAWLER_AUTOSCALE_STEP)
+        elif action == DECREASE:
+            self.workers = max(self.minimum, int(self.workers * settings.CRAWLER_AUTOSCALE_BACKOFF))
+        if self.workers == before:
+            # Already at a bound
+            action = HOLD
+            reason = reason or ("maximum workers" if before == self.maximum else None)
+        self.peak = max(self.peak, self.workers)
+        self.counts[action] += 1
+
+        if action != HOLD:
+            logger.info(
+                f"Page workers {before} -> {self.workers}"
+                f"{f' ({reason})' if reason else ''}: {throughput:.1f} pages/s, "
+                f"latency {latency * 1000 if latency is not None else 0:.0f} ms, errors {error_rate:.0%}, "
+                f"loop lag {loop_lag * 1000:.0f} ms"
+            )
+            self.decisions.append({
+                "seconds": round(now - self._started, 1),
+                "action": action,
+                "reason": reason,
+                "workers": self.workers,
+                "pages_per_second": round(throughput, 2),
+                "latency_ms": round(latency * 1000) if latency is not None else None,
+                "error_rate": round(error_rate, 3),
+                "loop_lag_ms": round(loop_lag * 1000)
+            })
+            del self.decisions[:-settings.CRAWLER_AUTOSCALE_DECISION_LIMIT]
+
+        # Compare the next window with the last one that had traffic
+        if self._responses:
+            self._last_action = action
+            self._last_throughput = throughput
+        self._window_started = now
+        self._pages = self._responses = self._failures = 0
+        self._latency_total = 0.0
+        return self.workers
+
+    async def run(self, resize: Callable[[int], None], idle_workers: Callable[[], int]):
+        """
+        Adjust the worker count until cancelled.
+
+        Args:
+            resize: Called with the new worker count after every decision
+            idle_workers: Returns the number of workers waiting for a URL or a fetch slot
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            # Probe the event loop lag while the window runs
+            lag = 0.0
+            deadline = loop.time() + settings.CRAWLER_AUTOSCALE_INTERVAL
+            while loop.time() < deadline:
+                before = loop.time()
+                await asyncio.sleep(LAG_PROBE_SECONDS)
+                lag = max(lag, loop.time() - before - LAG_PROBE_SECONDS)
+            resize(self.decide(idle_workers(), lag))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the bounds, current and peak counts and the decisions, for the scan stats."""
+        return {
+            "autoscale": True,
+            "min_workers": self.minimum,
+            "max_workers": self.maximum,
+            "workers": self.workers,
+            "peak_workers": self.peak,
+            "increases": self.counts[INCREASE],
+            "decreases": self.counts[DECREASE],
+            "holds": self.counts[HOLD],
+            "baseline_latency_ms": round(self.baseline_latency * 1000) if self.baseline_latency is not None else None,
+            "decisions": self.decisions
+        }
@@ -9,7 +9,12 @@ import os
 from app.api.routes import scan_router, search_router, regex_router, management_router, db_browser_router
 from app.core.config import settings
 from app.core.exceptions import WebsiteCheckerException
-from app.core.database import init_db
+from app.core.database import init_db, SessionLocal
+from app.services.scan_service import ScanService
+from app.services.scan_worker import scan_worker
+from app.core.parse_worker import parse_pool
+from app.core.body_writer import body_writer
+from app.core.http_client import http_client
 
 # Configure logging
 logging.basicConfig(
@@ -89,11 +94,23 @@ async def startup_event():
     
     # Initialize database
     init_db()
+    
+    # Queue scans left without a job; jobs of dead workers are requeued when their lease expires
+    await ScanService(SessionLocal()).resume_interrupted_scans()
+    
+    # Run queued scans in this process unless separate workers do
+    if settings.JOB_WORKER_ENABLED:
+        scan_worker.start()
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Website Checker API")
+    # Running scans pause and go back to the queue for the next worker
+    await scan_worker.stop()
+    parse_pool.shutdown()
+    body_writer.shutdown()
+    await http_client.close()
 
 # Mount static files - this should be AFTER route definitions
 static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
@@ -6,3 +6,4 @@ from app.models.screenshot import Screenshot, ScreenshotIssueMapping
 from app.models.validation import Validation
 from app.models.sentiment import Sentiment
 from app.models.search_index import SearchIndex
+from app.models.scan_job import ScanJob
@@ -29,6 +29,10 @@ class Resource(Base):
     text_content = Column(Text)
     screenshot_path = Column(String)
     hash = Column(String)
+    etag = Column(String)
+    last_modified = Column(String)
+    simhash = Column(String)  # 64-bit SimHash of the visible text, as hex
+    duplicate_cluster = Column(String, index=True)  # URL of the first page of its near-duplicate group
     
     # Relationships
     scan = relationship("Metadata", back_populates="resources")
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from datetime import datetime
+
+from app.core.database import Base
+
+class ScanJob(Base):
+    __tablename__ = "scan_job"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scan_uuid = Column(String, ForeignKey("metadata.uuid", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, running, finished
+    priority = Column(Integer, default=0)  # higher is claimed first
+    resume = Column(Boolean, default=False)  # continue from the scan's frontier
+    worker_id = Column(String)
+    lease_expires_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    attempts = Column(Integer, default=0)
+    stop_requested = Column(String)  # paused or cancelled, delivered by the worker holding the lease
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ScanJob {self.id}: {self.scan_uuid} ({self.status})>"
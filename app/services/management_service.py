@@ -10,6 +10,7 @@ from app.api.models.management import (
     UpdateSettingRequest, TestConfig, TestConfigsResponse, TestConfigResponse,
     SettingValue, SettingCategory
 )
+from app.core.config import settings
 from app.core.exceptions import NotFoundException, BadRequestException
 from app.models.metadata import Metadata
 from app.models.regex_filter import RegexFilter
@@ -369,9 +370,9 @@ class ManagementService:
                 name="max_threads",
                 value=4,
                 type="int",
-                description="Maximum number of threads for scanning",
+                description="Maximum number of page workers for scanning; the autoscaler stays at or below it",
                 min_value=1,
-                max_value=16,
+                max_value=settings.CRAWLER_MAX_WORKERS,
                 category=SettingCategory.SCANNING
             ),
             "scanner.timeout": SettingValue(
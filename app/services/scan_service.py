@@ -2,7 +2,7 @@ import logging
 import asyncio
 import uuid as uuid_lib
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from sqlalchemy.orm import Session
 import os
 import json
@@ -15,7 +15,7 @@ from app.api.models.scan import (
     ValidationResponse, ResourceDetail, ValidationIssue, ScanStatus,
     ResourceType, ResourceStatus, SeverityLevel, ScreenshotType, ScanMode,
     ScreenshotsResponse, ScreenshotMetadata, ElementDetail,
-    PackageOptions, PackageResponse
+    PackageOptions, PackageResponse, ScanBudgetStatus
 )
 from app.core.exceptions import NotFoundException, BadRequestException
 from app.models.metadata import Metadata 
@@ -25,77 +25,191 @@ from app.models.screenshot import Screenshot
 from app.models.external_link import ExternalLink
 from app.core.config import settings
 from app.core.crawler import Crawler
+from app.core.crawl_shards import ShardedCrawl
 from app.core.css_processor import CssProcessor
+from app.core.scan_control import ScanControl, ScanStopped
+from app.core.scan_budget import ScanBudget
+from app.core.scan_pipeline import ScanPipeline
+from app.core.scan_scheduler import PRIORITY_WEIGHTS, scan_scheduler
+from app.core.job_queue import QUEUED, job_queue
+from app.services.validator import ValidatorService
+
+try:
+    from app.services.search_service import SearchService
+except ImportError:
+    # Without the search service pages still get their text extracted
+    SearchService = None
 
 logger = logging.getLogger(__name__)
 
+# Scans with a task in this process, shared by every ScanService instance:
+# scan id -> {"status", "start_time", "task", "control", "budget", "crawler"}
+active_scans: Dict[str, Dict[str, Any]] = {}
+_active_scans_lock = asyncio.Lock()
+
 class ScanService:
     def __init__(self, db: Session):
         """Initialize the scan service with a database session."""
         self.db = db
-        self.active_scans = {}
-        self._lock = asyncio.Lock()
+        self.active_scans = active_scans
+        self._lock = _active_scans_lock
         logger.info("ScanService initialized with database session")
     
+    def _launch(self, scan_id: str, scan_data: ScanCreate, resume: bool = False):
+        """Start the scan task and register its handle, control signals and budget."""
+        control = ScanControl()
+        budget = ScanBudget.from_config(scan_data.config.dict())
+        scan_scheduler.start(scan_id, scan_data.config.priority.value)
+        self.active_scans[scan_id] = {
+            "status": ScanStatus.RUNNING,
+            "start_time": datetime.now(),
+            "control": control,
+            "budget": budget,
+            "crawler": None,
+            "task": None
+        }
+        self.active_scans[scan_id]["task"] = asyncio.create_task(
+            self._process_scan(scan_id, scan_data, resume=resume, control=control, budget=budget)
+        )
+    
     async def start_scan(self, scan_id: str, scan_data: ScanCreate):
-        """Start a new website scan with the provided configuration."""
+        """
+        Queue a new website scan with the provided configuration.
+        
+        The scan is stored as QUEUED with a job in the durable job queue; a
+        scan worker, in this or another process, claims it and runs it.
+        """
         async with self._lock:
-            if scan_id in self.active_scans:
+            if scan_id in self.active_scans or job_queue.open_job(self.db, scan_id):
                 raise BadRequestException(f"Scan {scan_id} is already running")
             
-            self.active_scans[scan_id] = {
-                "status": ScanStatus.RUNNING,
-                "start_time": datetime.now()
-            }
+            logger.info(f"Starting scan with ID: {scan_id} and URL: {scan_data.url}")
+            
+            # Create cache directory for this scan
+            cache_path = os.path.join(settings.STORAGE_DIR, scan_id)
+            os.makedirs(cache_path, exist_ok=True)
+            
+            # Create resource subdirectories
+            resources_dir = os.path.join(cache_path, "resources")
+            for subdir in ["html", "css", "js", "images", "fonts", "documents", "other"]:
+                os.makedirs(os.path.join(resources_dir, subdir), exist_ok=True)
+            
+            # Create screenshots directory
+            screenshots_dir = os.path.join(cache_path, "screenshots")
+            os.makedirs(screenshots_dir, exist_ok=True)
+            
+            # Store scan info in database
+            scan = Metadata(
+                uuid=scan_id,
+                original_url=str(scan_data.url),
+                normalized_url=str(scan_data.url).lower(),
+                scan_mode=scan_data.mode.value,
+                status=ScanStatus.QUEUED.value,
+                progress=0.0,
+                config=scan_data.dict(),
+                cache_path=cache_path,
+                page_count=0,
+                resource_count=0,
+                downloaded_count=0,
+                total_download_size=0,
+                external_link_count=0,
+                external_link_errors=0
+            )
+            scan.current_activity = "Queued"
+            self.db.add(scan)
+            self.db.commit()
+            
+            job_queue.enqueue(self.db, scan_id, priority=_job_priority(scan_data))
+            logger.info(f"Scan job queued for scan ID: {scan_id}")
+
+    async def resume_scan(self, scan_id: str):
+        """Queue a PAUSED scan to continue from its crawl frontier."""
+        async with self._lock:
+            if scan_id in self.active_scans or job_queue.open_job(self.db, scan_id):
+                raise BadRequestException(f"Scan {scan_id} is already running")
+            
+            scan = self.db.query(Metadata).filter(Metadata.uuid == scan_id).first()
+            if not scan:
+                raise NotFoundException("Scan", scan_id)
+            if scan.status not in (ScanStatus.RUNNING.value, ScanStatus.PAUSED.value, ScanStatus.QUEUED.value):
+                raise BadRequestException(f"Scan {scan_id} is not running or paused", {"status": scan.status})
+            
+            scan_data = ScanCreate(**scan.config)
+            scan.status = ScanStatus.QUEUED.value
+            scan.current_activity = "Queued for resuming"
+            self.db.commit()
+            
+            job_queue.enqueue(self.db, scan_id, priority=_job_priority(scan_data), resume=True)
+            logger.info(f"Scan job queued for resuming scan ID: {scan_id}")
+
+    async def run_scan(self, scan_id: str, resume: bool = False):
+        """
+        Run a scan claimed from the job queue and wait until it stops.
+        
+        Args:
+            scan_id: Scan to run
+            resume: Continue from the scan's frontier
+        """
+        async with self._lock:
+            scan = self.db.query(Metadata).filter(Metadata.uuid == scan_id).first()
+            if not scan:
+                raise NotFoundException("Scan", scan_id)
+            if scan.status not in (ScanStatus.QUEUED.value, ScanStatus.RUNNING.value):
+                logger.info(f"Scan {scan_id} is {scan.status}; nothing to run")
+                return
             
+            scan_data = ScanCreate(**scan.config)
+            scan.status = ScanStatus.RUNNING.value
+            if not resume:
+                scan.start_time = datetime.now()
+            scan.current_activity = "Resuming scan" if resume else "Initializing scan"
+            self.db.commit()
+            
+            self._launch(scan_id, scan_data, resume=resume)
+            task = self.active_scans[scan_id]["task"]
+            logger.info(f"Scan task created for scan ID: {scan_id}")
+        
+        # Returns however the task ends, including when it is cancelled
+        await asyncio.wait({task})
+
+    async def resume_interrupted_scans(self) -> int:
+        """
+        Queue every RUNNING or QUEUED scan that has no open job, e.g. one left by a version without the job queue.
+        
+        Scans whose worker died keep their job; it is queued again once its lease expires.
+        """
+        scans = self.db.query(Metadata).filter(
+            Metadata.status.in_((ScanStatus.RUNNING.value, ScanStatus.QUEUED.value))
+        ).all()
+        resumed = 0
+        for scan in scans:
+            if job_queue.open_job(self.db, scan.uuid) is not None:
+                continue
             try:
-                logger.info(f"Starting scan with ID: {scan_id} and URL: {scan_data.url}")
-                
-                # Create cache directory for this scan
-                cache_path = os.path.join(settings.STORAGE_DIR, scan_id)
-                os.makedirs(cache_path, exist_ok=True)
-                
-                # Create resource subdirectories
-                resources_dir = os.path.join(cache_path, "resources")
-                for subdir in ["html", "css", "js", "images", "other"]:
-                    os.makedirs(os.path.join(resources_dir, subdir), exist_ok=True)
-                
-                # Create screenshots directory
-                screenshots_dir = os.path.join(cache_path, "screenshots")
-                os.makedirs(screenshots_dir, exist_ok=True)
-                
-                # Store scan info in database
-                scan = Metadata(
-                    uuid=scan_id,
-                    original_url=str(scan_data.url),
-                    normalized_url=str(scan_data.url).lower(),
-                    scan_mode=scan_data.mode.value,
-                    status=ScanStatus.RUNNING.value,
-                    start_time=datetime.now(),
-                    progress=0.0,
-                    config=scan_data.dict(),
-                    cache_path=cache_path,
-                    page_count=0,
-                    resource_count=0,
-                    downloaded_count=0,
-                    total_download_size=0,
-                    external_link_count=0,
-                    external_link_errors=0,
-                    current_activity="Initializing scan"
-                )
-                self.db.add(scan)
-                self.db.commit()
-                
-                # Start the scan process
-                asyncio.create_task(self._process_scan(scan_id, scan_data))
-                
-                logger.info(f"Scan task created for scan ID: {scan_id}")
+                scan_data = ScanCreate(**scan.config)
+                job_queue.enqueue(self.db, scan.uuid, priority=_job_priority(scan_data),
+                                  resume=scan.status == ScanStatus.RUNNING.value)
+                resumed += 1
             except Exception as e:
-                del self.active_scans[scan_id]
-                raise
+                logger.error(f"Could not resume scan {scan.uuid}: {str(e)}")
+                await self._handle_scan_error(scan.uuid, f"Could not resume scan: {str(e)}")
+        
+        if resumed:
+            logger.info(f"Queued {resumed} interrupted scans")
+        return resumed
 
-    async def _process_scan(self, scan_id: str, scan_data: ScanCreate):
-        """Process a scan using the Crawler."""
+    async def _process_scan(self, scan_id: str, scan_data: ScanCreate, resume: bool = False,
+                            control: Optional[ScanControl] = None, budget: Optional[ScanBudget] = None):
+        """
+        Process a scan using the Crawler, stopping at checkpoints if paused or cancelled.
+        
+        A scan whose size or duration budget runs out still completes, with
+        the pages fetched so far and the exhausted budget in its stats.
+        """
+        control = control or ScanControl()
+        budget = budget or ScanBudget.from_config(scan_data.config.dict())
+        pipeline: Optional[ScanPipeline] = None
+        capture: Optional[_PageCapture] = None
         try:
             logger.info(f"Processing scan {scan_id} with mode {scan_data.mode}")
             
@@ -105,8 +219,33 @@ class ScanService:
                 logger.error(f"Scan {scan_id} not found in database")
                 return
             
-            # Initialize crawler
-            crawler = Crawler(scan_id, scan_data.config.dict(), self.db)
+            # Pages are validated, indexed and captured as soon as they are stored
+            if scan_data.config.screenshot_enabled:
+                capture = _PageCapture()
+            pipeline = self._build_pipeline(scan, control, budget, capture)
+            pipeline.start()
+            
+            # Initialize crawler; several processes split the hosts of a sharded crawl
+            crawler_config = {**scan_data.config.dict(), "mode": scan_data.mode.value}
+            if scan_data.config.crawl_processes > 1:
+                crawler = ShardedCrawl(
+                    scan_id, crawler_config, self.db,
+                    cache_path=scan.cache_path,
+                    control=control,
+                    budget=budget,
+                    pipeline=pipeline,
+                    processes=scan_data.config.crawl_processes
+                )
+            else:
+                crawler = Crawler(
+                    scan_id, crawler_config, self.db,
+                    cache_path=scan.cache_path,
+                    control=control,
+                    budget=budget,
+                    pipeline=pipeline
+                )
+            if scan_id in self.active_scans:
+                self.active_scans[scan_id]["crawler"] = crawler
             
             # Configure crawler based on scan mode
             await self._configure_crawler(crawler, scan_data.mode, scan_data.config)
@@ -116,20 +255,41 @@ class ScanService:
             scan.progress = 5
             self.db.commit()
             
-            # Start crawling
-            await crawler.start(scan.original_url)
+            # Start crawling (or continue from the saved frontier)
+            try:
+                await crawler.start(scan.original_url, resume=resume)
+                crawl_report = crawler.report()
+            finally:
+                # Post-processing reads resources back, so the buffered rows must be durable first
+                await crawler.close()
+            control.check()
+            
+            # Pages stored before a pause were dropped from the stage queues
+            if resume:
+                await self._backfill_pipeline(scan, pipeline)
             
             # Process downloaded content based on mode
             await self._process_content(scan, scan_data.mode)
+            control.check()
             
-            # Take screenshots if enabled
-            if scan_data.config.screenshot_enabled:
-                await self._take_screenshots(scan)
+            # Wait for the stages to finish the pages still queued
+            scan.current_activity = "Finishing validation, indexing and screenshots"
+            self.db.commit()
+            await pipeline.close()
+            control.check()
             
             # Generate final reports
-            await self._generate_reports(scan)
+            crawl_report["budget"] = budget.to_dict()
+            crawl_report["pipeline"] = pipeline.stats()
+            crawl_report["scheduler"] = {
+                "priority": scan_data.config.priority.value,
+                "fetch_slots": scan_scheduler.fetch.granted.get(scan_id, 0)
+            }
+            await self._generate_reports(scan, crawl_report)
             
             # Update final status
+            if budget.exhausted:
+                scan.current_activity = f"Stopped early: {budget.exhausted} budget ran out"
             scan.status = ScanStatus.COMPLETED.value
             scan.progress = 100
             scan.end_time = datetime.now()
@@ -137,11 +297,146 @@ class ScanService:
             
             logger.info(f"Scan {scan_id} completed successfully")
             
+        except ScanStopped as e:
+            await self._handle_scan_stopped(scan_id, e.status)
         except Exception as e:
             logger.error(f"Error processing scan {scan_id}: {str(e)}", exc_info=True)
             await self._handle_scan_error(scan_id, str(e))
+        finally:
+            if pipeline is not None:
+                await pipeline.cancel()
+            if capture is not None:
+                await capture.close()
+            self.active_scans.pop(scan_id, None)
+            scan_scheduler.finish(scan_id)
+
+    def _build_pipeline(self, scan: Metadata, control: ScanControl, budget: ScanBudget,
+                        capture: Optional["_PageCapture"] = None) -> ScanPipeline:
+        """Create the validation, index and (with a browser) screenshot stages for a scan."""
+        pipeline = ScanPipeline()
+        validator = ValidatorService(self.db)
+        search = SearchService(self.db) if SearchService is not None else None
+        pipeline.add_stage(
+            "validation", lambda row: self._validate_page(validator, scan, row),
+            settings.PIPELINE_VALIDATION_CONCURRENCY
+        )
+        pipeline.add_stage(
+            "index", lambda row: self._index_page(search, row),
+            settings.PIPELINE_INDEX_CONCURRENCY
+        )
+        if capture is not None:
+            pipeline.add_stage(
+                "screenshots", lambda row: self._screenshot_page(capture, scan, row, control, budget),
+                settings.PIPELINE_SCREENSHOT_CONCURRENCY
+            )
+        return pipeline
+
+    async def _backfill_pipeline(self, scan: Metadata, pipeline: ScanPipeline):
+        """Queue pages of a resumed scan on the stages that have not handled them yet."""
+        pages = self.db.query(Resource).filter(
+            Resource.uuid == scan.uuid,
+            Resource.resource_type == ResourceType.HTML.value,
+            Resource.status_code != 304,
+            Resource.local_path.isnot(None)
+        ).all()
+        validated = {
+            resource_id for (resource_id,) in
+            self.db.query(Validation.resource_id).filter(Validation.uuid == scan.uuid).distinct()
+        }
+        captured = {
+            resource_id for (resource_id,) in
+            self.db.query(Screenshot.resource_id).join(
+                Resource, Screenshot.resource_id == Resource.id
+            ).filter(Resource.uuid == scan.uuid)
+        }
+        
+        queued = 0
+        for resource in pages:
+            stages = []
+            if resource.id not in validated and not self._is_near_duplicate(resource):
+                stages.append("validation")
+            if resource.text_content is None:
+                stages.append("index")
+            if resource.id not in captured:
+                stages.append("screenshots")
+            if stages:
+                row = {"id": resource.id, "original_url": resource.original_url, "local_path": resource.local_path}
+                await pipeline.submit(row, stages)
+                queued += 1
+        if queued:
+            logger.info(f"Queued {queued} pages stored before the scan was paused")
+
+    async def _validate_page(self, validator: ValidatorService, scan: Metadata, row: Dict[str, Any]):
+        """Pipeline stage: run the validation tests on a stored page."""
+        if row.get('duplicate_cluster') and row['duplicate_cluster'] != row.get('normalized_url'):
+            # Issues are reported once, on the first page of the near-duplicate group
+            return
+        await validator.validate_resource(row['id'], scan.uuid)
+        self.db.commit()
 
-    async def _configure_crawler(self, crawler: Crawler, mode: ScanMode, config: Dict[str, Any]):
+    async def _index_page(self, search: Optional["SearchService"], row: Dict[str, Any]):
+        """Pipeline stage: store the text of a page and add it to the search index."""
+        resource = self.db.query(Resource).filter(Resource.id == row['id']).first()
+        if resource is None:
+            return
+        if resource.text_content is None:
+            loop = asyncio.get_running_loop()
+            resource.text_content = await loop.run_in_executor(None, _read_text, resource.local_path)
+        if search is not None:
+            await search.index_content(resource)
+        self.db.commit()
+
+    async def _screenshot_page(self, capture: "_PageCapture", scan: Metadata, row: Dict[str, Any],
+                               control: ScanControl, budget: ScanBudget):
+        """Pipeline stage: capture a full-page screenshot and a thumbnail of a stored page."""
+        if control.stopping:
+            return
+        if budget.remaining_seconds() == 0:
+            logger.debug(f"Scan {scan.uuid} ran out of time; skipping screenshot of {row['original_url']}")
+            return
+        
+        screenshot_dir = os.path.join(scan.cache_path, "screenshots")
+        os.makedirs(screenshot_dir, exist_ok=True)
+        
+        browser = await capture.browser()
+        if browser is None:
+            return
+        page = await browser.new_page()
+        try:
+            await page.goto(row['original_url'])
+            
+            # Full page screenshot
+            screenshot_path = os.path.join(screenshot_dir, f"{row['id']}_full.png")
+            await page.screenshot(
+                path=screenshot_path,
+                full_page=True
+            )
+            
+            # Create thumbnail
+            thumbnail_path = os.path.join(screenshot_dir, f"{row['id']}_thumb.png")
+            await page.screenshot(
+                path=thumbnail_path,
+                clip={'x': 0, 'y': 0, 'width': 800, 'height': 600}
+            )
+        finally:
+            await page.close()
+        
+        # Save screenshot record
+        screenshot = Screenshot(
+            resource_id=row['id'],
+            type=ScreenshotType.FULL_PAGE.value,
+            viewport_width=1920,
+            viewport_height=1080,
+            path=screenshot_path,
+            thumbnail_path=thumbnail_path,
+            created_at=datetime.now(),
+            filesize=os.path.getsize(screenshot_path),
+            capture_success=True
+        )
+        self.db.add(screenshot)
+        self.db.commit()
+
+    async def _configure_crawler(self, crawler: Union[Crawler, ShardedCrawl], mode: ScanMode, config: Dict[str, Any]):
         """Configure crawler based on scan mode."""
         if mode == ScanMode.SINGLE:
             config.max_depth = 0
@@ -172,100 +467,42 @@ class ScanService:
         scan.page_count = len([r for r in resources if r.resource_type == ResourceType.HTML.value])
         self.db.commit()
 
-    async def _take_screenshots(self, scan: Metadata):
-        """Take screenshots of discovered pages."""
-        scan.current_activity = "Taking screenshots"
-        
-        try:
-            # Get HTML resources
-            html_resources = self.db.query(Resource).filter(
-                Resource.uuid == scan.uuid,
-                Resource.resource_type == ResourceType.HTML.value
-            ).all()
-            
-            # Set up browser for screenshots (using playwright)
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                
-                for resource in html_resources:
-                    try:
-                        # Create screenshot directory if needed
-                        screenshot_dir = os.path.join(scan.cache_path, "screenshots")
-                        os.makedirs(screenshot_dir, exist_ok=True)
-                        
-                        # Take screenshot
-                        page = await browser.new_page()
-                        await page.goto(resource.original_url)
-                        
-                        # Full page screenshot
-                        screenshot_path = os.path.join(screenshot_dir, f"{resource.id}_full.png")
-                        await page.screenshot(
-                            path=screenshot_path,
-                            full_page=True
-                        )
-                        
-                        # Create thumbnail
-                        thumbnail_path = os.path.join(screenshot_dir, f"{resource.id}_thumb.png")
-                        await page.screenshot(
-                            path=thumbnail_path,
-                            clip={'x': 0, 'y': 0, 'width': 800, 'height': 600}
-                        )
-                        
-                        # Save screenshot record
-                        screenshot = Screenshot(
-                            resource_id=resource.id,
-                            type=ScreenshotType.FULL_PAGE.value,
-                            viewport_width=1920,
-                            viewport_height=1080,
-                            path=screenshot_path,
-                            thumbnail_path=thumbnail_path,
-                            created_at=datetime.now(),
-                            filesize=os.path.getsize(screenshot_path),
-                            capture_success=True
-                        )
-                        self.db.add(screenshot)
-                        
-                    except Exception as e:
-                        logger.error(f"Error taking screenshot of {resource.original_url}: {str(e)}")
-                        continue
-                        
-                    finally:
-                        await page.close()
-                
-                await browser.close()
-                
-            self.db.commit()
-            logger.info(f"Screenshots taken for scan {scan.uuid}")
-            
-        except Exception as e:
-            logger.error(f"Error in screenshot process: {str(e)}")
-            raise
-
-    async def _generate_reports(self, scan: Metadata):
-        """Generate final reports and statistics."""
+    async def _generate_reports(self, scan: Metadata, crawl_report: Optional[Dict[str, Any]] = None):
+        """Generate final reports and statistics, including the crawler's URL template report."""
         scan.current_activity = "Generating reports"
         # Calculate statistics
         resources = self.db.query(Resource).filter(Resource.uuid == scan.uuid).all()
         external_links = self.db.query(ExternalLink).filter(ExternalLink.uuid == scan.uuid).all()
+        duplicate_groups = self._duplicate_groups(resources)
         
         scan.stats = {
             "pages": scan.page_count,
             "resources": {
                 "total": len(resources),
                 "downloaded": scan.downloaded_count,
+                "not_modified": len([r for r in resources if r.status_code == 304]),
                 "by_type": {
                     "html": len([r for r in resources if r.resource_type == ResourceType.HTML.value]),
                     "css": len([r for r in resources if r.resource_type == ResourceType.CSS.value]),
                     "js": len([r for r in resources if r.resource_type == ResourceType.JS.value]),
                     "images": len([r for r in resources if r.resource_type == ResourceType.IMAGE.value]),
+                    "fonts": len([r for r in resources if r.resource_type == ResourceType.FONT.value]),
+                    "documents": len([r for r in resources if r.resource_type == ResourceType.DOCUMENT.value]),
                     "other": len([r for r in resources if r.resource_type == ResourceType.OTHER.value])
                 }
             },
             "external_links": {
                 "total": len(external_links),
                 "broken": len([l for l in external_links if l.status_code >= 400])
+            },
+            "near_duplicates": {
+                "groups": len(duplicate_groups),
+                "pages": sum(len(g["duplicates"]) for g in duplicate_groups),
+                "clusters": duplicate_groups
             }
         }
+        if crawl_report:
+            scan.stats.update(crawl_report)
         self.db.commit()
 
     async def cleanup_scan(self, scan_id: str):
@@ -303,41 +540,119 @@ class ScanService:
             if scan_id in self.active_scans:
                 del self.active_scans[scan_id]
 
-    async def _validate_content(self, resource: Resource) -> List[ValidationIssue]:
-        """Validate HTML/CSS content and identify issues"""
-        validation_issues = []
-        try:
-            if resource.resource_type == ResourceType.HTML.value:
-                validation_issues.extend(await self._validate_html(resource))
-            elif resource.resource_type == ResourceType.CSS.value:
-                validation_issues.extend(await self._validate_css(resource))
-                
-            return validation_issues
-        except Exception as e:
-            logger.error(f"Validation error for {resource.original_url}: {str(e)}")
-            return []
+    def _is_near_duplicate(self, resource: Resource) -> bool:
+        """True if the resource belongs to another page's near-duplicate group."""
+        return bool(resource.duplicate_cluster) and resource.duplicate_cluster != resource.normalized_url
 
-    async def cancel_scan(self, scan_id: str) -> bool:
-        """Cancel an active scan"""
-        async with self._lock:
-            if scan_id not in self.active_scans:
-                return False
-            
-            try:
-                # Update scan status
-                scan = self.db.query(Metadata).filter(Metadata.uuid == scan_id).first()
-                if scan:
-                    scan.status = ScanStatus.CANCELLED.value
+    def _duplicate_groups(self, resources: List[Resource]) -> List[Dict[str, Any]]:
+        """Group near-duplicate pages, listing each group once under its first page."""
+        groups: Dict[str, List[str]] = {}
+        for resource in resources:
+            if self._is_near_duplicate(resource):
+                groups.setdefault(resource.duplicate_cluster, []).append(resource.normalized_url)
+        return [
+            {"url": url, "duplicates": sorted(duplicates)}
+            for url, duplicates in sorted(groups.items())
+        ]
+
+    async def _handle_scan_stopped(self, scan_id: str, status: ScanStatus):
+        """Record a scan stopped at a checkpoint; cancelled scans are cleaned up."""
+        try:
+            scan = self.db.query(Metadata).filter(Metadata.uuid == scan_id).first()
+            if scan:
+                scan.status = status.value
+                if status == ScanStatus.PAUSED:
+                    scan.current_activity = "Paused"
+                else:
+                    scan.current_activity = "Cancelled"
                     scan.end_time = datetime.now()
-                    self.db.commit()
-                
-                # Clean up resources
+                self.db.commit()
+            logger.info(f"Scan {scan_id} {status.value}")
+            
+            if status == ScanStatus.CANCELLED:
                 await self.cleanup_scan(scan_id)
+        except Exception as e:
+            logger.error(f"Error stopping scan {scan_id}: {str(e)}")
+    
+    async def _wait_stopped(self, task: asyncio.Task) -> bool:
+        """Wait up to SCAN_STOP_TIMEOUT for a signalled scan task to reach a checkpoint."""
+        done, _ = await asyncio.wait({task}, timeout=settings.SCAN_STOP_TIMEOUT)
+        return bool(done)
+    
+    async def _wait_stopped_elsewhere(self, scan_id: str) -> bool:
+        """Wait up to SCAN_STOP_TIMEOUT for a scan running in another process to leave RUNNING."""
+        deadline = asyncio.get_running_loop().time() + settings.SCAN_STOP_TIMEOUT
+        while True:
+            # End the read transaction so the other process's commits are visible
+            self.db.commit()
+            status = self.db.query(Metadata.status).filter(Metadata.uuid == scan_id).scalar()
+            if status != ScanStatus.RUNNING.value:
                 return True
-                
-            except Exception as e:
-                logger.error(f"Error cancelling scan {scan_id}: {str(e)}")
+            if asyncio.get_running_loop().time() >= deadline:
                 return False
+            await asyncio.sleep(0.5)
+    
+    async def pause_scan(self, scan_id: str) -> bool:
+        """
+        Pause an active scan.
+        
+        Workers finish the URLs in hand, the frontier is flushed to disk and
+        the scan task exits, releasing its connections and browser. The scan
+        is continued with resume_scan.
+        
+        Returns:
+            True if the scan has paused, False if it is still stopping
+        """
+        async with self._lock:
+            entry = self.active_scans.get(scan_id)
+            if entry is None:
+                # Queued, or running in another worker process
+                state = job_queue.request_stop(self.db, scan_id, ScanStatus.PAUSED.value)
+                if state is None:
+                    raise BadRequestException(f"Scan {scan_id} is not running")
+                if state == QUEUED:
+                    # A queued scan has nothing to stop; it leaves the queue until resumed
+                    await self._handle_scan_stopped(scan_id, ScanStatus.PAUSED)
+                    return True
+            else:
+                entry["status"] = ScanStatus.PAUSED
+                entry["control"].pause()
+        
+        if entry is None:
+            return await self._wait_stopped_elsewhere(scan_id)
+        return await self._wait_stopped(entry["task"])
+    
+    async def cancel_scan(self, scan_id: str) -> bool:
+        """Cancel an active, queued or paused scan"""
+        async with self._lock:
+            entry = self.active_scans.get(scan_id)
+            if entry is None:
+                state = job_queue.request_stop(self.db, scan_id, ScanStatus.CANCELLED.value)
+                if state is not None and state != QUEUED:
+                    # The worker process running the scan stops it
+                    running_elsewhere = True
+                else:
+                    # A paused or queued scan has no task to signal
+                    scan = self.db.query(Metadata).filter(Metadata.uuid == scan_id).first()
+                    if not scan or scan.status not in (ScanStatus.PAUSED.value, ScanStatus.QUEUED.value):
+                        return False
+                    await self._handle_scan_stopped(scan_id, ScanStatus.CANCELLED)
+                    return True
+            else:
+                running_elsewhere = False
+                entry["status"] = ScanStatus.CANCELLED
+                entry["control"].cancel()
+                task = entry["task"]
+        
+        if running_elsewhere:
+            return await self._wait_stopped_elsewhere(scan_id)
+        if not await self._wait_stopped(task):
+            # Stuck in a long request; cancelling the task still closes the crawler
+            logger.warning(f"Scan {scan_id} did not stop within {settings.SCAN_STOP_TIMEOUT}s; cancelling its task")
+            task.cancel()
+            await asyncio.wait({task})
+            await self._handle_scan_stopped(scan_id, ScanStatus.CANCELLED)
+        return True
 
     async def get_scan_status(self, scan_id: str) -> ScanStatusResponse:
         """Get current scan status"""
@@ -345,15 +660,68 @@ class ScanService:
         if not scan:
             raise NotFoundException(f"Scan {scan_id} not found")
         
+        # Running scans report their live budget usage and crawl counters, summed over shards
+        entry = self.active_scans.get(scan_id)
+        if entry is not None and entry.get("budget") is not None:
+            budget = entry["budget"].to_dict()
+        else:
+            budget = (scan.stats or {}).get("budget")
+        crawler = entry.get("crawler") if entry is not None else None
+        progress = crawler.progress() if crawler is not None else {}
+        
         return ScanStatusResponse(
             uuid=scan.uuid,
             status=scan.status,
             progress=scan.progress,
-            current_activity=scan.current_activity,
-            error=scan.error,
-            stats=scan.stats or {},
-            start_time=scan.start_time,
-            end_time=scan.end_time
+            current_activity=getattr(scan, "current_activity", None) or "",
+            total_download_size=scan.total_download_size or progress.get("bytes_downloaded") or 0,
+            urls_crawled=scan.page_count or progress.get("urls_crawled") or 0,
+            started_at=scan.start_time,
+            updated_at=scan.end_time or datetime.now(),
+            budget=ScanBudgetStatus(**budget) if budget else None,
+            queue_position=job_queue.queue_position(self.db, scan_id)
         )
 
-    # Rest of the service methods (get_scan_resources, etc.) remain unchanged
\ No newline at end of file
+    # Rest of the service methods (get_scan_resources, etc.) remain unchanged
+
+
+class _PageCapture:
+    """Browser shared by a scan's screenshot workers, launched with the first page."""
+
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+        self.failed = False  # launch failed; not retried for every page
+        self._lock = asyncio.Lock()
+
+    async def browser(self):
+        """Return the browser, or None if it could not be launched."""
+        async with self._lock:
+            if self._browser is None and not self.failed:
+                try:
+                    self._playwright = await async_playwright().start()
+                    self._browser = await self._playwright.chromium.launch()
+                except Exception as e:
+                    logger.error(f"Could not launch the screenshot browser; skipping screenshots: {str(e)}")
+                    self.failed = True
+                    await self.close()
+        return self._browser
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+def _read_text(path: str) -> str:
+    """Read a stored page body as text."""
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8', errors='replace')
+
+
+def _job_priority(scan_data: ScanCreate) -> int:
+    """Job queue priority of a scan: its fetch weight, so higher-priority scans are claimed first."""
+    return int(PRIORITY_WEIGHTS[scan_data.config.priority.value])
@@ -0,0 +1,170 @@
+import logging
+import asyncio
+import os
+import socket
+import uuid as uuid_lib
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.api.models.scan import ScanStatus
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.job_queue import job_queue
+from app.core.scan_scheduler import scan_scheduler
+from app.models.metadata import Metadata
+from app.services.scan_service import ScanService, active_scans
+
+logger = logging.getLogger(__name__)
+
+
+class ScanWorker:
+    """
+    Loop that runs scans from the durable job queue in this process.
+
+    Every JOB_HEARTBEAT_SECONDS, or as soon as a scan is queued in this
+    process or one of its own scans ends, the worker renews the leases of
+    its running jobs, passes on pause and cancel requests made through
+    other processes, queues again jobs whose worker stopped heartbeating,
+    and claims as many queued jobs as the scan scheduler has free slots.
+
+    Several workers, in the API process and in `python -m app.worker`
+    processes, can share one database. On shutdown running scans are paused
+    at their next checkpoint and their jobs handed back to the queue, so
+    another worker continues them from their frontier.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, session_factory: Callable[[], Session] = SessionLocal):
+        """
+        Initialize the worker.
+
+        Args:
+            worker_id: Lease owner name; defaults to host, process id and a random suffix
+            session_factory: Creates the database sessions of the loop and of each scan
+        """
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid_lib.uuid4().hex[:6]}"
+        self.session_factory = session_factory
+        self.jobs: Dict[int, str] = {}  # job id -> scan id, for jobs running here
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self):
+        """Start the loop on the running event loop."""
+        if self._task is None:
+            self._stopping = False
+            job_queue.add_listener(self.wake)
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Scan worker {self.worker_id} started")
+
+    def wake(self):
+        """Poll the queue now instead of at the next heartbeat."""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Scan worker poll failed: {str(e)}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def poll(self):
+        """Heartbeat, deliver stop requests, requeue expired jobs and claim new ones."""
+        db = self.session_factory()
+        try:
+            held = job_queue.heartbeat(db, self.worker_id, list(self.jobs))
+            for job_id, scan_id in list(self.jobs.items()):
+                if job_id not in held:
+                    # Another worker took the job over; stop without touching the scan's status
+                    logger.warning(f"Lost the lease on scan {scan_id}; abandoning it")
+                    self._abandon(job_id, scan_id)
+                elif held[job_id]:
+                    self._signal(scan_id, ScanStatus(held[job_id]))
+
+            job_queue.requeue_expired(db)
+            if not self._stopping:
+                for job in job_queue.claim(db, self.worker_id, scan_scheduler.free_slots() - self._starting()):
+                    self.jobs[job.id] = job.scan_uuid
+                    self._tasks[job.id] = asyncio.create_task(self._run_job(job.id, job.scan_uuid, job.resume))
+        finally:
+            db.close()
+
+    def _starting(self) -> int:
+        """Jobs claimed whose scan has not registered with the scheduler yet."""
+        return sum(1 for scan_id in self.jobs.values() if scan_id not in scan_scheduler.running)
+
+    def _signal(self, scan_id: str, status: ScanStatus):
+        entry = active_scans.get(scan_id)
+        if entry is None:
+            return
+        entry["status"] = status
+        if status == ScanStatus.CANCELLED:
+            entry["control"].cancel()
+        else:
+            entry["control"].pause()
+
+    def _abandon(self, job_id: int, scan_id: str):
+        self.jobs.pop(job_id, None)
+        entry = active_scans.get(scan_id)
+        if entry is not None and entry["task"] is not None:
+            entry["task"].cancel()
+
+    async def _run_job(self, job_id: int, scan_id: str, resume: bool):
+        db = self.session_factory()
+        error = None
+        try:
+            await ScanService(db).run_scan(scan_id, resume=resume)
+        except Exception as e:
+            logger.error(f"Scan job {job_id} for scan {scan_id} failed: {str(e)}", exc_info=True)
+            error = str(e)
+        finally:
+            try:
+                if job_id in self.jobs:
+                    if self._stopping and error is None and self._paused_for_shutdown(db, scan_id):
+                        job_queue.release(db, job_id, self.worker_id)
+                    else:
+                        job_queue.finish(db, job_id, self.worker_id, error)
+            finally:
+                db.close()
+                self.jobs.pop(job_id, None)
+                self._tasks.pop(job_id, None)
+                self.wake()
+
+    def _paused_for_shutdown(self, db: Session, scan_id: str) -> bool:
+        """Mark a scan paused by the shutdown as queued again; False if it ended another way."""
+        scan = db.query(Metadata).filter(Metadata.uuid == scan_id).first()
+        if scan is None or scan.status != ScanStatus.PAUSED.value:
+            return False
+        scan.status = ScanStatus.QUEUED.value
+        db.commit()
+        return True
+
+    async def stop(self):
+        """Stop claiming jobs, pause the running scans and hand their jobs back to the queue."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.wake in job_queue.listeners:
+            job_queue.listeners.remove(self.wake)
+
+        for scan_id in list(self.jobs.values()):
+            self._signal(scan_id, ScanStatus.PAUSED)
+        if self._tasks:
+            await asyncio.wait(list(self._tasks.values()), timeout=settings.SCAN_STOP_TIMEOUT)
+        logger.info(f"Scan worker {self.worker_id} stopped")
+
+
+# Worker of the API process, started when JOB_WORKER_ENABLED is set
+scan_worker = ScanWorker()
@@ -153,3 +153,8 @@ class ValidatorService:
             detected_at=datetime.now()
         )
         
+        self.db.add(issue)
+    
+    def _get_default_enabled_tests(self) -> List[str]:
+        """Return the test groups run on every page."""
+        return ["html", "accessibility", "links", "performance"]
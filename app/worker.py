@@ -0,0 +1,82 @@
+"""
+Standalone scan worker processes.
+
+Each process runs a ScanWorker that claims scans from the job queue in
+the shared database, so scans keep running while the API restarts and
+can be spread over several processes on one machine. Start the API with
+JOB_WORKER_ENABLED=false to leave all scans to these workers.
+
+Usage:
+    python -m app.worker [--processes N]
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+
+from app.core.config import settings
+from app.core.database import init_db
+from app.core.parse_worker import parse_pool
+from app.core.body_writer import body_writer
+from app.core.http_client import http_client
+from app.services.scan_worker import ScanWorker
+
+logger = logging.getLogger(__name__)
+
+
+async def serve():
+    """Run one worker until SIGINT or SIGTERM, then hand its scans back to the queue."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = ScanWorker()
+    worker.start()
+    await stop.wait()
+
+    await worker.stop()
+    parse_pool.shutdown(wait=True)
+    body_writer.shutdown()
+    await http_client.close()
+
+
+def run_worker():
+    """Entry point of one worker process."""
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL),
+        format=f"%(asctime)s - worker {os.getpid()} - %(name)s - %(levelname)s - %(message)s",
+    )
+    init_db()
+    asyncio.run(serve())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scan worker processes against the shared database.")
+    parser.add_argument("--processes", type=int, default=settings.JOB_WORKER_PROCESSES,
+                        help="worker processes to start (default: JOB_WORKER_PROCESSES)")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker()
+        return
+
+    processes = [multiprocessing.Process(target=run_worker, name=f"scan-worker-{i}") for i in range(args.processes)]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
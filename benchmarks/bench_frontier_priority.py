@@ -0,0 +1,167 @@
+"""
+Benchmark best-first against FIFO crawl order on a synthetic site.
+
+The site mimics a typical CMS: the home page links to a long blog
+pagination chain and dozens of tag archives before the product, docs,
+careers, events and forum sections, and every list page links to many
+structurally identical detail pages. Each page has a known page type.
+The crawl is simulated without HTTP by running the HostScheduler with
+and without a UrlScorer, counting inbound links and re-prioritising
+queued URLs the way Crawler.queue_urls does, until the max_urls budget
+is spent. The report shows how many distinct page types each order
+reached within the budget.
+
+Usage:
+    python -m benchmarks.bench_frontier_priority [--max-urls N] [--max-depth N]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.core.host_scheduler import HostScheduler  # noqa: E402
+from app.core.url_priority import UrlScorer  # noqa: E402
+
+BASE = "https://www.example.com"
+TAGS = [f"topic-{chr(97 + i % 26)}{i // 26}" for i in range(60)]
+DOC_SECTIONS = ["install", "config", "api", "cli", "faq", "deploy", "plugins", "security"]
+CATEGORIES = ["shoes", "bags", "hats", "coats", "socks"]
+# One path of every page type
+SAMPLE_PATHS = [
+    "/", "/blog", "/blog/2023/05/post-1", "/tag/topic-a0", "/author/writer-1", "/products",
+    "/category/shoes", "/product/1", "/product/1/reviews", "/docs", "/docs/api", "/docs/api/page-1",
+    "/about", "/contact", "/careers", "/careers/9000", "/events", "/events/1", "/forum",
+    "/forum/thread/1", "/user/1",
+]
+
+
+def page(path: str) -> Tuple[str, List[str]]:
+    """Return (page type, links) for a path of the synthetic site."""
+    parts = path.split("?")[0].strip("/").split("/")
+    query = path.split("?")[1] if "?" in path else ""
+    number = int(query.split("=")[1]) if query.startswith("page=") else 1
+
+    if path == "/":
+        return "home", (
+            [f"/blog?page={n}" for n in range(1, 6)]
+            + [f"/tag/{tag}" for tag in TAGS]
+            + ["/products", "/docs", "/about", "/contact", "/careers", "/events", "/forum"]
+        )
+    if parts[0] == "blog" and len(parts) == 1:
+        first = number * 10
+        return "blog-list", (
+            [f"/blog?page={number + 1}"]
+            + [f"/blog/2023/05/post-{first + k}" for k in range(10)]
+            + [f"/tag/{TAGS[(number + k) % len(TAGS)]}" for k in range(3)]
+        )
+    if parts[0] == "blog":
+        post = int(parts[-1].split("-")[1])
+        return "article", (
+            [f"/tag/{TAGS[post % len(TAGS)]}", f"/blog/2023/05/post-{post + 1}",
+             f"/author/writer-{post % 7}"]
+        )
+    if parts[0] == "tag":
+        offset = TAGS.index(parts[1]) * 100 + number * 10
+        return "tag-archive", (
+            [f"/tag/{parts[1]}?page={number + 1}"]
+            + [f"/blog/2023/05/post-{offset + k}" for k in range(10)]
+        )
+    if parts[0] == "author":
+        return "author", [f"/blog/2023/05/post-{k}" for k in range(5)]
+    if parts[0] == "products":
+        return "product-index", [f"/category/{c}" for c in CATEGORIES] + [f"/product/{i}" for i in range(20)]
+    if parts[0] == "category":
+        first = CATEGORIES.index(parts[1]) * 1000 + number * 10
+        return "category", [f"/category/{parts[1]}?page={number + 1}"] + [f"/product/{first + k}" for k in range(10)]
+    if parts[0] == "product" and len(parts) == 3:
+        return "reviews", [f"/product/{parts[1]}"]
+    if parts[0] == "product":
+        product = int(parts[1])
+        return "product", [f"/product/{product}/reviews"] + [f"/product/{product + k}" for k in (1, 2, 3)]
+    if parts[0] == "docs":
+        if len(parts) == 1:
+            return "docs-index", [f"/docs/{s}" for s in DOC_SECTIONS]
+        if len(parts) == 2:
+            return "docs-section", [f"/docs/{parts[1]}/page-{k}" for k in range(5)]
+        return "doc", [f"/docs/{parts[1]}"]
+    if parts[0] == "careers":
+        if len(parts) == 1:
+            return "careers", [f"/careers/{9000 + k}" for k in range(5)]
+        return "job", ["/careers"]
+    if parts[0] == "events":
+        if len(parts) == 1:
+            return "events", [f"/events/{k}" for k in range(8)]
+        return "event", ["/events"]
+    if parts[0] == "forum":
+        if len(parts) == 1:
+            return "forum", [f"/forum/thread/{k}" for k in range(10)]
+        return "thread", [f"/user/{int(parts[2]) % 13}"]
+    if parts[0] == "user":
+        return "user", [f"/forum/thread/{int(parts[1]) * 3}"]
+    return parts[0], []
+
+
+async def crawl(max_urls: int, max_depth: int, best_first: bool) -> Counter:
+    """Simulate a crawl and return the number of fetched pages per page type."""
+    scorer = UrlScorer() if best_first else None
+    scheduler = HostScheduler(scorer=scorer, budget=max_urls)
+    queued = {BASE + "/"}
+    scheduler.put_nowait((BASE + "/", 0))
+    fetched = Counter()
+
+    while True:
+        item = await scheduler.get()
+        if item is None:
+            break
+        url, depth = item
+        page_type, links = page(url[len(BASE):])
+        fetched[page_type] += 1
+
+        if depth < max_depth:
+            for link in dict.fromkeys(BASE + path for path in links):
+                if link in queued:
+                    if scorer is not None:
+                        scorer.add_link(link)
+                        scheduler.reprioritize(link)
+                    continue
+                if len(queued) >= max_urls * settings.CRAWLER_PRIORITY_CANDIDATE_FACTOR:
+                    break
+                if scorer is not None:
+                    scorer.add_link(link)
+                scheduler.put_nowait((link, depth + 1))
+                queued.add(link)
+        scheduler.task_done(url)
+    return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-urls", type=int, default=200, help="Crawl budget")
+    parser.add_argument("--max-depth", type=int, default=5)
+    args = parser.parse_args()
+
+    # Politeness limits are irrelevant without network requests
+    settings.CRAWLER_HOST_RATE = settings.CRAWLER_HOST_BURST = 1e9
+
+    total_types = {page(path)[0] for path in SAMPLE_PATHS}
+    print(f"max_urls={args.max_urls}, max_depth={args.max_depth}, {len(total_types)} page types\n")
+    print(f"{'order':<12} {'types':>6} {'time ms':>8}  most fetched types")
+    for name, best_first in (("fifo", False), ("best-first", True)):
+        started = time.perf_counter()
+        fetched = asyncio.run(crawl(args.max_urls, args.max_depth, best_first))
+        elapsed = (time.perf_counter() - started) * 1000
+        top = ", ".join(f"{page_type} {count}" for page_type, count in fetched.most_common(4))
+        print(f"{name:<12} {len(fetched):>6} {elapsed:>8.1f}  {top}")
+        missing = sorted(total_types - set(fetched))
+        if missing:
+            print(f"{'':<12} missing: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
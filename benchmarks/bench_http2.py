@@ -0,0 +1,190 @@
+"""
+Benchmark the crawler's fetcher backends against a local HTTP/2 server.
+
+Starts a Hypercorn server over TLS (HTTP/2 is negotiated with ALPN, so a
+throwaway self-signed certificate is generated with the openssl CLI) and
+fetches the same set of pages through each fetcher backend with a fixed
+concurrency. The server counts the distinct client connections it sees,
+so the report shows requests/second, connections opened and the protocol
+each backend ended up using.
+
+Needs hypercorn, httpx and h2 in addition to the application requirements.
+
+Usage:
+    python -m benchmarks.bench_http2 [--requests N] [--concurrency N] [--delay-ms N] [--size N]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.core.fetcher import available_fetchers, get_fetcher  # noqa: E402
+from app.core.http_client import HttpClientManager  # noqa: E402
+
+HOST = "127.0.0.1"
+
+
+def make_certificate(directory: str):
+    """Create a self-signed certificate for 127.0.0.1 and return (certfile, keyfile)."""
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", keyfile, "-out", certfile, "-subj", "/CN=localhost",
+         "-addext", f"subjectAltName=IP:{HOST},DNS:localhost"],
+        check=True, capture_output=True
+    )
+    return certfile, keyfile
+
+
+def run_server(port: int, certfile: str, keyfile: str, delay_ms: int, size: int):
+    """Serve HTML pages over HTTP/1.1 and HTTP/2 until the process is terminated."""
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    connections = set()
+    body = b"<html><body>" + b"x" * size + b"</body></html>"
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        if scope["path"] == "/stats":
+            payload = json.dumps({"connections": len(connections)}).encode()
+            connections.clear()
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": payload})
+            return
+
+        connections.add(tuple(scope["client"]))
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/html; charset=utf-8"),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    config = Config()
+    config.bind = [f"{HOST}:{port}"]
+    config.certfile = certfile
+    config.keyfile = keyfile
+    config.alpn_protocols = ["h2", "http/1.1"]
+    config.loglevel = "WARNING"
+    # Hypercorn recycles connections after 1000 requests by default
+    config.keep_alive_max_requests = 1_000_000
+    asyncio.run(serve(app, config))
+
+
+def server_stats(base_url: str, context: ssl.SSLContext) -> dict:
+    """Read and reset the server's connection counter."""
+    with urllib.request.urlopen(f"{base_url}/stats", context=context) as response:
+        return json.loads(response.read())
+
+
+def wait_for_server(base_url: str, context: ssl.SSLContext, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            server_stats(base_url, context)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+async def run_backend(name: str, urls: list, concurrency: int, cafile: str) -> dict:
+    """Fetch every URL through one backend and return throughput figures."""
+    client = HttpClientManager(cafile=cafile)
+    fetcher = get_fetcher(name, client)
+    semaphore = asyncio.Semaphore(concurrency)
+    versions = set()
+    failures = 0
+
+    async def fetch(url: str):
+        nonlocal failures
+        async with semaphore:
+            try:
+                async with fetcher.stream(url) as response:
+                    async for _ in response.iter_chunks(settings.CRAWLER_CHUNK_SIZE):
+                        pass
+                    versions.add(response.http_version)
+                    if response.status != 200:
+                        failures += 1
+            except Exception:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch(url) for url in urls))
+    elapsed = time.perf_counter() - started
+    await client.close()
+    return {
+        "requests_per_second": len(urls) / elapsed,
+        "protocol": ", ".join(sorted(versions)) or "-",
+        "failures": failures
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Pages fetched per backend")
+    parser.add_argument("--concurrency", type=int, default=100, help="Requests in flight")
+    parser.add_argument("--delay-ms", type=int, default=50, help="Server think time per page")
+    parser.add_argument("--size", type=int, default=5_000, help="Page body size in bytes")
+    parser.add_argument("--port", type=int, default=8943)
+    args = parser.parse_args()
+
+    backends = available_fetchers()
+    if "httpx" not in backends:
+        print("httpx and h2 are not installed; only the aiohttp backend can run")
+
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = make_certificate(directory)
+        # urllib does not offer ALPN on a caller's context; ask for HTTP/1.1 explicitly
+        stats_context = ssl.create_default_context(cafile=certfile)
+        stats_context.set_alpn_protocols(["http/1.1"])
+        base_url = f"https://{HOST}:{args.port}"
+
+        server = multiprocessing.Process(
+            target=run_server,
+            args=(args.port, certfile, keyfile, args.delay_ms, args.size),
+            daemon=True
+        )
+        server.start()
+        try:
+            wait_for_server(base_url, stats_context)
+            urls = [f"{base_url}/page/{i}" for i in range(args.requests)]
+            print(f"{args.requests} pages of {args.size} bytes, concurrency {args.concurrency}, "
+                  f"server delay {args.delay_ms} ms, "
+                  f"HTTP_POOL_LIMIT_PER_HOST={settings.HTTP_POOL_LIMIT_PER_HOST}\n")
+            print(f"{'backend':<10} {'protocol':<10} {'req/s':>10} {'connections':>12} {'failures':>9}")
+            for name in backends:
+                server_stats(base_url, stats_context)
+                result = asyncio.run(run_backend(name, urls, args.concurrency, certfile))
+                connections = server_stats(base_url, stats_context)["connections"]
+                print(f"{name:<10} {result['protocol']:<10} {result['requests_per_second']:>10,.0f} "
+                      f"{connections:>12} {result['failures']:>9}")
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
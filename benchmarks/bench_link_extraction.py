@@ -0,0 +1,61 @@
+"""
+Benchmark the link extractor backends on a corpus of real pages.
+
+The corpus is every *.html file under a directory, by default the HTML
+resources stored by previous scans under STORAGE_DIR. Prints pages/second
+for each available backend and the number of links each one found.
+
+Usage:
+    python -m benchmarks.bench_link_extraction [--corpus DIR] [--repeat N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.core.link_extractor import available_backends, get_link_extractor  # noqa: E402
+
+
+def load_corpus(directory: str) -> list:
+    """Read every HTML file under `directory` as raw bytes."""
+    pages = []
+    for path in glob.glob(os.path.join(directory, "**", "*.html"), recursive=True):
+        with open(path, "rb") as f:
+            pages.append(("https://example.com/" + os.path.relpath(path, directory), f.read()))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=settings.STORAGE_DIR, help="Directory containing *.html pages")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus per backend")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"No *.html pages found under {args.corpus}; run a scan or pass --corpus")
+        sys.exit(1)
+    total_mb = sum(len(body) for _, body in pages) / (1024 * 1024)
+    print(f"Corpus: {len(pages)} pages, {total_mb:.1f} MB\n")
+
+    print(f"{'backend':<12} {'pages/s':>10} {'MB/s':>8} {'links':>10}")
+    for name in available_backends():
+        extractor = get_link_extractor(name)
+        links = sum(len(extractor.extract(body, url)) for url, body in pages)
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            for url, body in pages:
+                extractor.extract(body, url)
+        elapsed = time.perf_counter() - started
+
+        processed = len(pages) * args.repeat
+        print(f"{name:<12} {processed / elapsed:>10.1f} {total_mb * args.repeat / elapsed:>8.1f} {links:>10}")
+
+
+if __name__ == "__main__":
+    main()
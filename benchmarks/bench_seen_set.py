@@ -0,0 +1,93 @@
+"""
+Benchmark the crawler seen-set backends.
+
+Compares memory use and add/lookup throughput of the exact in-memory set
+and the Bloom filter backend (with its on-disk exact store) at growing
+numbers of URLs. Each measurement runs in a fresh process so the peak
+resident memory reported covers only that backend.
+
+Usage:
+    python -m benchmarks.bench_seen_set [--sizes 100000 1000000 10000000]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.seen_set import create_seen_set  # noqa: E402
+
+LOOKUPS = 200000
+
+
+def synthetic_url(i: int) -> str:
+    """Build a realistic-looking URL for index i."""
+    return f"https://www.example{i % 50}.com/section-{i % 997}/articles/{i}/page-title-for-item-{i}?ref=nav&id={i}"
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process (ru_maxrss is in KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run(backend: str, size: int, directory: str) -> dict:
+    """Fill one seen-set with `size` URLs and measure it."""
+    baseline = peak_rss_bytes()
+    seen = create_seen_set(backend, directory, f"bench_{backend}_{size}")
+
+    started = time.perf_counter()
+    for i in range(size):
+        seen.add(synthetic_url(i))
+    add_seconds = time.perf_counter() - started
+
+    memory = peak_rss_bytes() - baseline
+
+    lookups = min(LOOKUPS, size)
+    step = max(1, size // lookups)
+    started = time.perf_counter()
+    for i in range(0, size, step):
+        _ = synthetic_url(i) in seen
+    hit_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(size, size + lookups):
+        _ = synthetic_url(i) in seen
+    miss_seconds = time.perf_counter() - started
+
+    seen.close()
+    return {
+        "backend": backend,
+        "size": size,
+        "memory_mb": memory / (1024 * 1024),
+        "adds_per_sec": size / add_seconds,
+        "hits_per_sec": (size // step) / hit_seconds,
+        "misses_per_sec": lookups / miss_seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10 ** 5, 10 ** 6, 10 ** 7])
+    parser.add_argument("--backends", nargs="+", default=["exact", "bloom"])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="seen_set_bench_")
+    try:
+        print(f"{'backend':<8} {'urls':>10} {'memory MB':>10} {'adds/s':>12} {'hits/s':>12} {'misses/s':>12}")
+        for size in args.sizes:
+            for backend in args.backends:
+                with multiprocessing.Pool(1) as pool:
+                    r = pool.apply(run, (backend, size, directory))
+                print(f"{r['backend']:<8} {r['size']:>10} {r['memory_mb']:>10.1f} "
+                      f"{r['adds_per_sec']:>12.0f} {r['hits_per_sec']:>12.0f} {r['misses_per_sec']:>12.0f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Benchmark sharded crawling: pages/second against the number of crawl processes.
+
+Serves a synthetic multi-host site from a separate process: every host is
+a local port, and every page carries filler text (to give the parse stage
+real work) and links to pages on the other hosts, so the site's hosts
+spread over the shards. The same site is crawled once per process count
+K, with the single-process Crawler for K=1 and ShardedCrawl otherwise,
+and the report shows the pages stored per second and the speedup over
+K=1. Per-host politeness limits are raised so that the crawler, not the
+rate limiter, is measured.
+
+Each run uses a throwaway SQLite database and cache directory. Speedups
+are bounded by the cores of the machine, which also runs the site.
+
+Usage:
+    python -m benchmarks.bench_sharded_crawl [--processes 1,2,4] [--hosts N] [--pages N] [--links N] [--page-kb N]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.request
+
+# A throwaway database, cache and politeness limits; set before the settings
+# are loaded, and inherited by the shard processes through the environment
+if "BENCH_SHARDED_CRAWL_DIR" not in os.environ:
+    os.environ["BENCH_SHARDED_CRAWL_DIR"] = tempfile.mkdtemp(prefix="bench-sharded-crawl-")
+WORK_DIR = os.environ["BENCH_SHARDED_CRAWL_DIR"]
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+os.environ["STORAGE_DIR"] = os.path.join(WORK_DIR, "storage")
+for name, value in (("DEBUG", "false"), ("LOG_LEVEL", "WARNING"),
+                    ("CRAWLER_HOST_RATE", "1000"), ("CRAWLER_HOST_BURST", "1000"),
+                    ("CRAWLER_HOST_MAX_RATE", "1000"), ("CRAWLER_HOST_CONCURRENCY", "8")):
+    os.environ[name] = value
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.body_writer import body_writer  # noqa: E402
+from app.core.crawl_shards import ShardedCrawl, shard_for  # noqa: E402
+from app.core.crawler import Crawler  # noqa: E402
+from app.core.database import SessionLocal, init_db  # noqa: E402
+from app.core.http_client import http_client  # noqa: E402
+from app.core.parse_worker import parse_pool  # noqa: E402
+from app.models.metadata import Metadata  # noqa: E402
+from app.models.resource import Resource  # noqa: E402
+
+HOST = "127.0.0.1"
+FIRST_PORT = 8870
+
+
+def run_site(ports, pages: int, links: int, page_kb: int):
+    """Serve the synthetic site on every port until the process is terminated."""
+    from aiohttp import web
+
+    filler = ("<p>" + "lorem ipsum dolor sit amet " * 40 + "</p>") * max(1, page_kb)
+
+    def make_app(host_index: int):
+        async def page(request):
+            number = int(request.match_info.get("number", "0"))
+            anchors = "".join(
+                f"<a href='http://{HOST}:{ports[(host_index + k) % len(ports)]}/p/{(number * links + k) % pages}'>"
+                f"page {k}</a>"
+                for k in range(1, links + 1)
+            )
+            body = f"<html><head><title>Host {host_index} page {number}</title></head><body>{anchors}{filler}</body></html>"
+            return web.Response(text=body, content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/", page)
+        app.router.add_get("/p/{number}", page)
+        return app
+
+    async def serve():
+        for index, port in enumerate(ports):
+            runner = web.AppRunner(make_app(index), access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, HOST, port).start()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def wait_for_site(port: int, timeout: float = 10.0):
+    """Wait until the site answers on `port`."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(f"http://{HOST}:{port}/", timeout=1).read()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+async def crawl(scan_id: str, start_url: str, processes: int, max_urls: int):
+    """Crawl the site with `processes` crawl processes; return (pages stored, seconds, shard report)."""
+    db = SessionLocal()
+    cache_path = os.path.join(os.environ["STORAGE_DIR"], scan_id)
+    db.add(Metadata(uuid=scan_id, original_url=start_url, normalized_url=start_url, scan_mode="full",
+                    status="running", config={}, cache_path=cache_path))
+    db.commit()
+
+    config = {
+        "max_urls": max_urls, "max_depth": 10, "follow_external_links": True,
+        "respect_robots_txt": False, "max_threads": 16, "mode": "full"
+    }
+    if processes > 1:
+        crawler = ShardedCrawl(scan_id, config, db, cache_path=cache_path, processes=processes)
+    else:
+        crawler = Crawler(scan_id, config, db, cache_path=cache_path)
+
+    started = time.perf_counter()
+    try:
+        await crawler.start(start_url)
+    finally:
+        await crawler.close()
+    elapsed = time.perf_counter() - started
+
+    stored = db.query(Resource).filter(Resource.uuid == scan_id, Resource.resource_type == "html").count()
+    shards = crawler.report().get("shards", [])
+    db.close()
+    return stored, elapsed, shards
+
+
+async def run(process_counts, start_url: str, max_urls: int):
+    results = []
+    for processes in process_counts:
+        results.append((processes,) + await crawl(f"bench-k{processes}", start_url, processes, max_urls))
+    await http_client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", default="1,2,4", help="comma-separated crawl process counts")
+    parser.add_argument("--hosts", type=int, default=8, help="hosts (local ports) of the site")
+    parser.add_argument("--pages", type=int, default=100, help="pages per host")
+    parser.add_argument("--links", type=int, default=8, help="links per page")
+    parser.add_argument("--page-kb", type=int, default=8, help="approximate filler text per page, in KB")
+    args = parser.parse_args()
+
+    process_counts = [int(count) for count in args.processes.split(",")]
+    ports = [FIRST_PORT + index for index in range(args.hosts)]
+    site = multiprocessing.Process(target=run_site, args=(ports, args.pages, args.links, args.page_kb), daemon=True)
+    site.start()
+    try:
+        for port in ports:
+            wait_for_site(port)
+        init_db()
+
+        max_urls = args.hosts * (args.pages + 1)
+        print(f"{args.hosts} hosts x {args.pages} pages, {args.links} links/page, ~{args.page_kb} KB/page, "
+              f"{os.cpu_count()} CPUs\n")
+        for processes in process_counts:
+            if processes > 1:
+                spread = [sum(1 for port in ports if shard_for(f"{HOST}:{port}", processes) == shard)
+                          for shard in range(processes)]
+                print(f"K={processes}: hosts per shard {spread}")
+        print()
+
+        results = asyncio.run(run(process_counts, f"http://{HOST}:{ports[0]}/", max_urls))
+        baseline = None
+        print(f"{'K':>3} {'pages':>7} {'seconds':>8} {'pages/s':>8} {'speedup':>8}  pages per shard")
+        for processes, stored, elapsed, shards in results:
+            rate = stored / elapsed if elapsed else 0.0
+            baseline = baseline or rate
+            per_shard = [shard["urls_crawled"] for shard in shards] or [stored]
+            print(f"{processes:>3} {stored:>7} {elapsed:>8.2f} {rate:>8.1f} {rate / baseline:>7.2f}x  {per_shard}")
+    finally:
+        site.terminate()
+        parse_pool.shutdown(wait=True)
+        body_writer.shutdown()
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark the precompiled URL filter against per-URL rule evaluation.
+
+Generates synthetic URLs (several hosts, nested paths, query strings and a
+mix of file extensions) and a rule set of include/exclude patterns, a path
+restriction and a REGEX-mode pattern. The naive filter evaluates each rule
+in turn the way Crawler.should_crawl_url used to, compiling patterns per
+call and scanning SKIP_EXTENSIONS linearly. Both filters must accept the
+same URLs.
+
+Usage:
+    python -m benchmarks.bench_url_filter [--urls N] [--excludes N] [--seed N]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.core.url_filter import UrlFilter  # noqa: E402
+
+BASE_DOMAIN = "www.example.com"
+HOSTS = [BASE_DOMAIN, "cdn.example.com", "other.org"]
+SECTIONS = ["blog", "docs", "shop", "news", "tag", "user", "search", "static"]
+EXTENSIONS = ["", "", "", ".html", ".php", ".pdf", ".jpg", ".zip", ".mp4", ".css"]
+
+
+def make_urls(count: int, rng: random.Random) -> list:
+    """Generate `count` synthetic URLs."""
+    urls = []
+    for _ in range(count):
+        host = rng.choice(HOSTS) if rng.random() < 0.2 else BASE_DOMAIN
+        depth = rng.randint(1, 4)
+        segments = [rng.choice(SECTIONS)] + [f"p{rng.randint(0, 5000)}" for _ in range(depth - 1)]
+        path = "/" + "/".join(segments) + rng.choice(EXTENSIONS)
+        query = f"?page={rng.randint(1, 50)}" if rng.random() < 0.3 else ""
+        urls.append(f"https://{host}{path}{query}")
+    return urls
+
+
+def make_config(excludes: int, rng: random.Random) -> dict:
+    """Build a scan configuration with anchored-literal and regex exclude patterns."""
+    exclude = []
+    for i in range(excludes):
+        if i % 2:
+            exclude.append(rf"^https://www\.example\.com/{rng.choice(SECTIONS)}/p{rng.randint(0, 5000)}/")
+        else:
+            exclude.append(rf"/{rng.choice(SECTIONS)}/p{rng.randint(0, 500)}\d*\b")
+    return {
+        "follow_external_links": False,
+        "path_restriction": "/",
+        "include_patterns": [r"^https://www\.example\.com/(blog|docs|shop|news)/", r"[?&]page=1\b"],
+        "exclude_patterns": exclude + [r"sessionid=", r"/search/"],
+        "regex_pattern": r"/p\d+",
+        "regex_is_inclusive": True,
+    }
+
+
+def naive_allows(url: str, config: dict) -> bool:
+    """Per-URL evaluation of every rule, as the crawler used to do."""
+    if not url.startswith(('http://', 'https://')):
+        return False
+    if not config.get("follow_external_links", False) and urllib.parse.urlparse(url).netloc.lower() != BASE_DOMAIN:
+        return False
+    path = urllib.parse.urlparse(url).path
+    if any(path.lower().endswith(ext) for ext in settings.SKIP_EXTENSIONS):
+        return False
+    if config.get("path_restriction"):
+        if not urllib.parse.urlparse(url).path.startswith(config["path_restriction"]):
+            return False
+    if any(re.compile(p).search(url) for p in config["exclude_patterns"]):
+        return False
+    if config["include_patterns"] and not any(re.compile(p).search(url) for p in config["include_patterns"]):
+        return False
+    if config.get("regex_pattern"):
+        matches = bool(re.compile(config["regex_pattern"]).search(url))
+        if matches != config.get("regex_is_inclusive", True):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=1_000_000, help="Number of synthetic URLs")
+    parser.add_argument("--excludes", type=int, default=50, help="Number of generated exclude patterns")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    urls = make_urls(args.urls, rng)
+    config = make_config(args.excludes, rng)
+    print(f"{len(urls)} URLs, {len(config['exclude_patterns'])} exclude and "
+          f"{len(config['include_patterns'])} include patterns\n")
+
+    started = time.perf_counter()
+    url_filter = UrlFilter.from_config(config, BASE_DOMAIN)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{'filter':<12} {'URLs/s':>12} {'accepted':>10}")
+    results = {}
+    for name, allows in (("naive", lambda u: naive_allows(u, config)), ("compiled", url_filter.allows)):
+        started = time.perf_counter()
+        accepted = [allows(url) for url in urls]
+        elapsed = time.perf_counter() - started
+        results[name] = accepted
+        print(f"{name:<12} {len(urls) / elapsed:>12,.0f} {sum(accepted):>10}")
+
+    print(f"\nCompiled filter built in {build_ms:.2f} ms "
+          f"({len(url_filter.exclude.trie)} literal prefixes in the trie)")
+    if results["naive"] != results["compiled"]:
+        mismatches = sum(a != b for a, b in zip(results["naive"], results["compiled"]))
+        print(f"WARNING: filters disagree on {mismatches} URLs")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import queue
+
+from app.core.crawl_shards import FINISH, STOP, URLS, ShardedCrawl, ShardLink, shard_for
+from app.core.scan_budget import MAX_TOTAL_BYTES
+
+
+def make_crawl(tmp_path, config=None, processes=2):
+    crawl = ShardedCrawl("s1", config or {}, None, cache_path=str(tmp_path), processes=processes)
+    crawl._inboxes = [queue.Queue() for _ in range(processes)]
+    return crawl
+
+
+def status(idle=True, sent=0, received=0, bytes_downloaded=0, urls_crawled=0, urls_queued=0):
+    return {"idle": idle, "sent": sent, "received": received, "bytes_downloaded": bytes_downloaded,
+            "pages_over_size": 0, "urls_crawled": urls_crawled, "urls_queued": urls_queued, "hosts": 1}
+
+
+def report_round(crawl, *statuses):
+    for index, shard_status in enumerate(statuses):
+        crawl._update_status(index, shard_status)
+
+
+def messages(crawl):
+    return [[inbox.get_nowait() for _ in range(inbox.qsize())] for inbox in crawl._inboxes]
+
+
+def test_finishes_after_two_identical_idle_rounds(tmp_path):
+    crawl = make_crawl(tmp_path)
+
+    report_round(crawl, status(sent=3, received=1), status(sent=1, received=3))
+    assert messages(crawl) == [[], []]
+
+    report_round(crawl, status(sent=3, received=1), status(sent=1, received=3))
+    assert messages(crawl) == [[(FINISH,)], [(FINISH,)]]
+
+    # Later reports do not finish the crawl twice
+    report_round(crawl, status(sent=3, received=1), status(sent=1, received=3))
+    assert messages(crawl) == [[], []]
+
+
+def test_urls_in_transit_keep_the_crawl_going(tmp_path):
+    crawl = make_crawl(tmp_path)
+
+    for _ in range(3):
+        report_round(crawl, status(sent=2), status(received=1))
+    assert messages(crawl) == [[], []]
+
+    # Once the URLs arrive, two idle rounds end the crawl
+    report_round(crawl, status(sent=2), status(received=2))
+    assert not crawl._finishing
+    report_round(crawl, status(sent=2), status(received=2))
+    assert messages(crawl) == [[(FINISH,)], [(FINISH,)]]
+
+
+def test_busy_shard_keeps_the_crawl_going(tmp_path):
+    crawl = make_crawl(tmp_path)
+
+    for _ in range(3):
+        report_round(crawl, status(), status(idle=False))
+    assert messages(crawl) == [[], []]
+    assert not crawl._finishing
+
+
+def test_partial_round_does_not_count(tmp_path):
+    crawl = make_crawl(tmp_path)
+
+    # The first shard reports repeatedly while the second stays silent
+    for _ in range(4):
+        crawl._update_status(0, status())
+    assert messages(crawl) == [[], []]
+
+    crawl._update_status(1, status())
+    assert not crawl._finishing
+    report_round(crawl, status(), status())
+    assert crawl._finishing
+
+
+def test_changed_counters_start_a_new_round(tmp_path):
+    crawl = make_crawl(tmp_path)
+
+    report_round(crawl, status(sent=1), status(received=1))
+    # A URL was exchanged between the two idle rounds
+    report_round(crawl, status(sent=2), status(received=2))
+    assert not crawl._finishing
+
+    report_round(crawl, status(sent=2), status(received=2))
+    assert crawl._finishing
+
+    # A busy round in between resets the count as well
+    crawl = make_crawl(tmp_path)
+    report_round(crawl, status(), status())
+    report_round(crawl, status(idle=False), status())
+    report_round(crawl, status(), status())
+    assert not crawl._finishing
+
+
+def test_exhausted_size_budget_stops_every_shard_once(tmp_path):
+    crawl = make_crawl(tmp_path, {MAX_TOTAL_BYTES: 1000})
+
+    report_round(crawl, status(idle=False, bytes_downloaded=400), status(idle=False, bytes_downloaded=500))
+    assert messages(crawl) == [[], []]
+
+    crawl._update_status(0, status(idle=False, bytes_downloaded=600))
+    crawl._update_status(1, status(idle=False, bytes_downloaded=700))
+    assert crawl.budget.exhausted == MAX_TOTAL_BYTES
+    assert crawl.budget.bytes_used == 1300
+    assert messages(crawl) == [[(STOP,)], [(STOP,)]]
+
+
+def test_progress_sums_the_shards(tmp_path):
+    crawl = make_crawl(tmp_path, processes=3)
+    report_round(crawl, status(urls_crawled=1, urls_queued=5, bytes_downloaded=10),
+                 status(urls_crawled=2, urls_queued=0, bytes_downloaded=20),
+                 status(urls_crawled=3, urls_queued=1, bytes_downloaded=30))
+
+    assert crawl.progress() == {"urls_crawled": 6, "urls_queued": 6, "bytes_downloaded": 60}
+
+
+def test_shard_for_is_stable_and_spreads_hosts():
+    hosts = [f"host{number}.example.com" for number in range(400)]
+    owners = [shard_for(host, 4) for host in hosts]
+
+    assert owners == [shard_for(host.upper(), 4) for host in hosts]
+    assert all(shard_for(host, 1) == 0 for host in hosts[:10])
+    assert all(70 < owners.count(index) < 130 for index in range(4))
+    # Adding a shard only moves the hosts the new shard takes over
+    moved = [host for host, owner in zip(hosts, owners) if shard_for(host, 5) not in (owner, 4)]
+    assert moved == []
+
+
+def test_link_forwards_each_foreign_url_once():
+    inboxes = [queue.Queue(), queue.Queue()]
+    urls = [f"https://host{number}.example.com/" for number in range(20)]
+    link = ShardLink(0, 2, inboxes, queue.Queue(), None)
+
+    own = link.forward(urls + urls, 1)
+    foreign = [url for url in urls if not link.owns(url)]
+
+    assert own == [url for url in urls + urls if link.owns(url)]
+    assert inboxes[0].empty()
+    assert inboxes[1].get_nowait() == (URLS, 1, foreign)
+    assert inboxes[1].empty()
+    assert link.sent == len(foreign)
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import sqlite3
+
+from aiohttp import web
+
+from app.core.config import settings
+from app.core.crawler import Crawler
+from app.core.frontier import FRONTIER_FILENAME, CrawlFrontier
+from app.core.http_client import http_client
+from app.core.scan_control import ScanControl
+from app.models.metadata import Metadata
+from app.models.resource import Resource
+
+PAGES = 12
+
+
+def test_load_host_returns_best_scored_unloaded_urls(tmp_path):
+    frontier = CrawlFrontier(str(tmp_path))
+    frontier.add("https://a.com/low", "a.com", 1, loaded=False, score=0.1)
+    frontier.add("https://a.com/high", "a.com", 1, loaded=False, score=0.9)
+    frontier.add("https://a.com/held", "a.com", 1, loaded=True, score=1.0)
+    frontier.add("https://b.com/", "b.com", 0, loaded=False)
+
+    assert frontier.load_host("a.com", 10) == [("https://a.com/high", 1), ("https://a.com/low", 1)]
+    assert frontier.load_host("a.com", 10) == []
+    assert dict(frontier.pending_counts()) == {"a.com": 3, "b.com": 1}
+    frontier.close()
+
+
+def test_state_survives_reopening(tmp_path):
+    frontier = CrawlFrontier(str(tmp_path))
+    assert not frontier.has_state()
+    for number in range(3):
+        frontier.add(f"https://a.com/{number}", "a.com", 1)
+    frontier.mark_done("https://a.com/0")
+    frontier.skip("https://a.com/2", "a.com", 1, "crawler_trap")
+    frontier.skip("https://a.com/never-queued", "a.com", 2, "template_limit")
+    assert frontier.check_fingerprint("hash", "https://a.com/0") is None
+    frontier.close()
+
+    reopened = CrawlFrontier(str(tmp_path))
+    assert reopened.has_state()
+    assert list(reopened.done_urls()) == ["https://a.com/0"]
+    assert list(reopened.pending_urls()) == ["https://a.com/1"]
+    assert sorted(reopened.skipped_urls()) == [("https://a.com/2", "crawler_trap"),
+                                               ("https://a.com/never-queued", "template_limit")]
+    assert reopened.check_fingerprint("hash", "https://a.com/3") == "https://a.com/0"
+
+    # URLs held in memory by the interrupted process are loaded again
+    assert reopened.load_host("a.com", 10) == []
+    reopened.reset_loaded()
+    assert reopened.load_host("a.com", 10) == [("https://a.com/1", 1)]
+    reopened.close()
+
+
+def test_frontier_written_before_scoring_is_migrated(tmp_path):
+    conn = sqlite3.connect(os.path.join(str(tmp_path), FRONTIER_FILENAME))
+    conn.executescript("""
+        CREATE TABLE frontier (url TEXT PRIMARY KEY, host TEXT NOT NULL, depth INTEGER NOT NULL,
+                               state TEXT NOT NULL, loaded INTEGER NOT NULL DEFAULT 0, added REAL NOT NULL);
+        INSERT INTO frontier VALUES ('https://a.com/', 'a.com', 0, 'pending', 1, 0);
+    """)
+    conn.close()
+
+    frontier = CrawlFrontier(str(tmp_path))
+    frontier.reset_loaded()
+    assert frontier.load_host("a.com", 10) == [("https://a.com/", 0)]
+    frontier.skip("https://a.com/", "a.com", 0, "crawler_trap")
+    assert list(frontier.skipped_urls()) == [("https://a.com/", "crawler_trap")]
+    frontier.close()
+
+
+def make_site():
+    async def page(request):
+        number = int(request.match_info.get("number", "0"))
+        links = "".join(f"<a href='/p/{(number + k) % PAGES}'>next</a>" for k in (1, 2, 3))
+        return web.Response(text=f"<html><body><p>Page {number} text {'x' * number}</p>{links}</body></html>",
+                            content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/", page)
+    app.router.add_get("/p/{number}", page)
+    return app
+
+
+async def crawl_with_pause(db, scan_id):
+    runner = web.AppRunner(make_site())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    start_url = f"http://127.0.0.1:{port}/"
+    config = {"max_depth": 10, "max_urls": 100, "respect_robots_txt": False, "max_threads": 2, "mode": "full"}
+    db.add(Metadata(uuid=scan_id, original_url=start_url, normalized_url=start_url, scan_mode="full",
+                    status="running", config=config, cache_path=os.path.join(settings.STORAGE_DIR, scan_id)))
+    db.commit()
+
+    try:
+        # Pause as soon as the first pages are stored
+        control = ScanControl()
+        crawler = Crawler(scan_id, config, db, control=control)
+        crawler.resource_writer.add_listener(lambda rows: control.pause())
+        crawler.resource_writer.batch_size = 3
+        await crawler.start(start_url)
+        await crawler.close()
+        paused = db.query(Resource).filter(Resource.uuid == scan_id).count()
+
+        resumed = Crawler(scan_id, config, db)
+        await resumed.start(start_url, resume=True)
+        await resumed.close()
+        return paused
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+def test_paused_crawl_resumes_without_refetching(db):
+    paused = asyncio.run(crawl_with_pause(db, "resume-scan"))
+
+    urls = [url for (url,) in db.query(Resource.normalized_url).filter(Resource.uuid == "resume-scan")]
+    assert 0 < paused < PAGES + 1
+    # The start page and every numbered page, each stored once
+    assert len(urls) == PAGES + 1
+    assert len(set(urls)) == len(urls)
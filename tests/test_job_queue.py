@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.core.job_queue import FINISHED, QUEUED, RUNNING, JobQueue
+from app.models.metadata import Metadata
+from app.models.scan_job import ScanJob
+
+
+def add_scan(db, uuid):
+    db.add(Metadata(uuid=uuid, original_url="http://example.com/", normalized_url="http://example.com/",
+                    scan_mode="full", status="queued", config={}, cache_path="/tmp/" + uuid))
+    db.commit()
+
+
+def expire(db, job):
+    db.query(ScanJob).filter(ScanJob.id == job.id).update(
+        {ScanJob.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+
+
+def test_enqueue_keeps_one_open_job_per_scan(db):
+    queue = JobQueue()
+    first = queue.enqueue(db, "s1")
+    second = queue.enqueue(db, "s1", priority=5)
+
+    assert second.id == first.id
+    assert db.query(ScanJob).count() == 1
+    assert queue.open_job(db, "s1").status == QUEUED
+
+
+def test_enqueue_notifies_listeners(db):
+    queue = JobQueue()
+    calls = []
+    queue.add_listener(lambda: calls.append(1))
+    queue.enqueue(db, "s1")
+
+    assert calls == [1]
+
+
+def test_claim_takes_highest_priority_then_oldest(db):
+    queue = JobQueue()
+    for uuid, priority in (("low", 0), ("high-old", 2), ("high-new", 2)):
+        queue.enqueue(db, uuid, priority=priority)
+
+    claimed = queue.claim(db, "w1", limit=2)
+
+    assert [job.scan_uuid for job in claimed] == ["high-old", "high-new"]
+    assert all(job.status == RUNNING and job.worker_id == "w1" and job.attempts == 1 for job in claimed)
+    assert all(job.lease_expires_at > datetime.utcnow() for job in claimed)
+    assert queue.queue_position(db, "low") == 1
+
+
+def test_claim_never_hands_a_job_to_two_workers(db):
+    queue = JobQueue()
+    queue.enqueue(db, "s1")
+
+    assert len(queue.claim(db, "w1", limit=5)) == 1
+    assert queue.claim(db, "w2", limit=5) == []
+    assert queue.claim(db, "w1", limit=0) == []
+
+
+def test_heartbeat_renews_only_the_workers_own_leases(db):
+    queue = JobQueue()
+    queue.enqueue(db, "s1")
+    job = queue.claim(db, "w1", limit=1)[0]
+    expire(db, job)
+
+    assert queue.heartbeat(db, "w2", [job.id]) == {}
+    assert queue.heartbeat(db, "w1", [job.id]) == {job.id: None}
+    db.expire_all()
+    assert db.get(ScanJob, job.id).lease_expires_at > datetime.utcnow()
+    assert queue.requeue_expired(db) == 0
+
+
+def test_expired_lease_is_queued_again_to_resume(db):
+    queue = JobQueue()
+    add_scan(db, "s1")
+    queue.enqueue(db, "s1")
+    job = queue.claim(db, "w1", limit=1)[0]
+    expire(db, job)
+
+    assert queue.requeue_expired(db) == 1
+    db.expire_all()
+    job = db.get(ScanJob, job.id)
+    assert job.status == QUEUED
+    assert job.resume
+    assert job.worker_id is None
+    # The worker that lost the lease no longer holds the job
+    assert queue.heartbeat(db, "w1", [job.id]) == {}
+
+    reclaimed = queue.claim(db, "w2", limit=1)[0]
+    assert reclaimed.id == job.id
+    assert reclaimed.attempts == 2
+
+
+def test_scan_fails_once_out_of_attempts(db, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 1)
+    queue = JobQueue()
+    add_scan(db, "s1")
+    queue.enqueue(db, "s1")
+    job = queue.claim(db, "w1", limit=1)[0]
+    expire(db, job)
+
+    assert queue.requeue_expired(db) == 0
+    db.expire_all()
+    assert db.get(ScanJob, job.id).status == FINISHED
+    assert db.query(Metadata).filter(Metadata.uuid == "s1").first().status == "failed"
+
+
+def test_release_hands_the_job_back_without_using_an_attempt(db):
+    queue = JobQueue()
+    queue.enqueue(db, "s1")
+    job = queue.claim(db, "w1", limit=1)[0]
+
+    queue.release(db, job.id, "w2")
+    db.expire_all()
+    assert db.get(ScanJob, job.id).status == RUNNING
+
+    queue.release(db, job.id, "w1")
+    db.expire_all()
+    job = db.get(ScanJob, job.id)
+    assert (job.status, job.resume, job.attempts) == (QUEUED, True, 0)
+
+
+def test_stop_closes_queued_jobs_and_flags_running_ones(db):
+    queue = JobQueue()
+    queue.enqueue(db, "running")
+    running = queue.claim(db, "w1", limit=1)[0]
+    queue.enqueue(db, "queued")
+
+    assert queue.request_stop(db, "queued", "cancelled") == QUEUED
+    assert queue.open_job(db, "queued") is None
+    assert queue.request_stop(db, "running", "paused") == RUNNING
+    assert queue.heartbeat(db, "w1", [running.id]) == {running.id: "paused"}
+    assert queue.request_stop(db, "missing", "paused") is None
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.models.scan import ScanConfig
+from app.core.near_duplicate import SIMHASH_BITS, NearDuplicateIndex, hamming_distance, simhash, visible_words
+
+
+def flip_bits(signature, count, rng):
+    for bit in rng.sample(range(SIMHASH_BITS), count):
+        signature ^= 1 << bit
+    return signature
+
+
+def test_visible_words_skip_markup_scripts_and_comments():
+    html = ("<html><head><style>p { color: red }</style><script>var hidden = 1;</script></head>"
+            "<body><!-- note --><p>Hello <b>World</b></p><template>nope</template></body></html>")
+
+    assert visible_words(html) == ["hello", "world"]
+
+
+def test_simhash_is_close_for_small_edits_and_far_for_other_text():
+    rng = random.Random(1)
+    vocabulary = [f"word{i}" for i in range(500)]
+    page = [rng.choice(vocabulary) for _ in range(400)]
+    edited = list(page)
+    edited[200] = "timestamp"
+    other = [rng.choice(vocabulary) for _ in range(400)]
+
+    assert simhash(page) == simhash(list(page))
+    assert hamming_distance(simhash(page), simhash(edited)) <= 3
+    assert hamming_distance(simhash(page), simhash(other)) > 16
+    assert 0 <= simhash(["short"]) < 2 ** SIMHASH_BITS
+
+
+@pytest.mark.parametrize("threshold", [0.9, 0.95, 1.0])
+def test_bands_cover_every_bit_once(threshold):
+    index = NearDuplicateIndex(threshold)
+    covered = 0
+    for shift, mask in index.bands:
+        band = mask << shift
+        assert covered & band == 0
+        covered |= band
+
+    assert covered == 2 ** SIMHASH_BITS - 1
+    assert len(index.bands) == index.max_distance + 1
+
+
+@pytest.mark.parametrize("threshold, max_distance", [(0.9, 6), (0.95, 3), (1.0, 0)])
+def test_index_finds_exactly_the_signatures_within_the_threshold(threshold, max_distance):
+    rng = random.Random(threshold)
+    index = NearDuplicateIndex(threshold)
+    assert index.max_distance == max_distance
+
+    originals = [rng.getrandbits(SIMHASH_BITS) for _ in range(200)]
+    for number, signature in enumerate(originals):
+        index.add(signature, f"page-{number}")
+
+    for number, signature in enumerate(originals[:50]):
+        for distance in range(max_distance + 4):
+            found = index.find(flip_bits(signature, distance, rng))
+            if distance <= max_distance:
+                assert found == f"page-{number}"
+            else:
+                # Random signatures are about 32 bits apart, so nothing else is this close
+                assert found is None
+
+
+def test_assign_groups_pages_under_the_first_one():
+    rng = random.Random(7)
+    index = NearDuplicateIndex(0.95)
+    signature = rng.getrandbits(SIMHASH_BITS)
+
+    assert index.assign(signature, "https://a.com/1") == ("https://a.com/1", False)
+    assert index.assign(flip_bits(signature, 2, rng), "https://a.com/2") == ("https://a.com/1", True)
+    assert index.assign(flip_bits(signature, 20, rng), "https://a.com/3") == ("https://a.com/3", False)
+    assert index.size == 2
+
+
+def test_detection_is_opt_in_with_a_bounded_threshold():
+    assert ScanConfig().near_duplicate_threshold is None
+    assert ScanConfig(near_duplicate_threshold=0.95).near_duplicate_threshold == 0.95
+    with pytest.raises(ValidationError):
+        ScanConfig(near_duplicate_threshold=0.5)
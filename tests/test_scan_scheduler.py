@@ -0,0 +1,103 @@
+import asyncio
+from collections import Counter
+
+from app.core.scan_scheduler import PRIORITY_WEIGHTS, FairShare, ScanScheduler
+
+
+async def contend(pool, waiters):
+    """Queue `waiters` (scan id -> count) behind a held slot, then grant them one at a time."""
+    order = []
+
+    async def request(scan_id):
+        await pool.acquire(scan_id)
+        order.append(scan_id)
+        await asyncio.sleep(0)
+        pool.release()
+
+    await pool.acquire("holder")
+    tasks = [asyncio.create_task(request(scan_id)) for scan_id, count in waiters.items() for _ in range(count)]
+    await asyncio.sleep(0)
+    pool.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_free_slots_are_granted_at_once():
+    async def run():
+        pool = FairShare("fetch", 2)
+        await pool.acquire("a")
+        await pool.acquire("b")
+        assert pool.in_use == 2
+        assert pool.granted == Counter({"a": 1, "b": 1})
+        pool.release()
+        assert pool.in_use == 1
+
+    asyncio.run(run())
+
+
+def test_busy_pool_is_shared_in_proportion_to_weight():
+    async def run():
+        pool = FairShare("fetch", 1)
+        pool.register("low", PRIORITY_WEIGHTS["low"])
+        pool.register("high", PRIORITY_WEIGHTS["high"])
+        order = await contend(pool, {"low": 40, "high": 40})
+        # While both have requests waiting, high gets four slots per slot of low
+        first = Counter(order[:25])
+        assert first["high"] == 20 and first["low"] == 5
+        assert Counter(order) == Counter({"low": 40, "high": 40})
+
+    asyncio.run(run())
+
+
+def test_many_waiters_do_not_buy_a_larger_share():
+    async def run():
+        pool = FairShare("fetch", 1)
+        order = await contend(pool, {"big": 60, "small": 10})
+        assert Counter(order[:20]) == Counter({"big": 10, "small": 10})
+
+    asyncio.run(run())
+
+
+def test_idle_scan_gets_no_credit_for_its_idle_time():
+    async def run():
+        pool = FairShare("fetch", 1)
+        await contend(pool, {"busy": 30})
+        order = await contend(pool, {"busy": 10, "returning": 10})
+        # Both start at the current virtual time and alternate
+        assert Counter(order[:10]) == Counter({"busy": 5, "returning": 5})
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    async def run():
+        pool = FairShare("fetch", 1)
+        await pool.acquire("a")
+        cancelled = asyncio.create_task(pool.acquire("b"))
+        waiting = asyncio.create_task(pool.acquire("c"))
+        await asyncio.sleep(0)
+        assert (pool.waiting, pool.waiting_for("b"), pool.waiting_for("c")) == (2, 1, 1)
+
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert pool.waiting_for("b") == 0
+        pool.release()
+        await waiting
+        assert pool.in_use == 1
+        assert pool.granted["c"] == 1 and pool.granted["b"] == 0
+
+    asyncio.run(run())
+
+
+def test_scheduler_limits_running_scans_and_forgets_finished_ones():
+    scheduler = ScanScheduler(max_running=2, fetch_concurrency=4, parse_concurrency=1)
+    scheduler.start("a", "high")
+    scheduler.start("b")
+    assert scheduler.free_slots() == 0
+    assert scheduler.stats()["running"] == {"a": "high", "b": "normal"}
+
+    scheduler.finish("a")
+    scheduler.finish("a")
+    assert scheduler.free_slots() == 1
+    assert "a" not in scheduler.fetch.granted
+    assert scheduler.stats()["fetch"]["capacity"] == 4
@@ -0,0 +1,120 @@
+import random
+import re
+
+import pytest
+
+from app.core.url_filter import PatternSet, PrefixTrie, UrlFilter, literal_prefix
+
+
+def test_prefix_trie_matches_stored_prefixes_only():
+    trie = PrefixTrie(["https://a.com/blog/", "https://a.com/b", "https://b.org/"])
+
+    assert trie.matches("https://a.com/blog/post")
+    assert trie.matches("https://a.com/bar")
+    assert trie.matches("https://b.org/")
+    assert not trie.matches("https://a.com/")
+    assert not trie.matches("https://b.org")
+    assert not PrefixTrie().matches("https://a.com/")
+    assert PrefixTrie([""]).matches("anything")
+
+
+def test_literal_prefix():
+    assert literal_prefix(r"^https://a\.com/docs/") == "https://a.com/docs/"
+    assert literal_prefix("^/plain") == "/plain"
+    assert literal_prefix("/not-anchored") is None
+    assert literal_prefix(r"^/x\d") is None
+    assert literal_prefix("^/a.b") is None
+
+
+PATTERNS = [
+    r"^https://a\.com/docs/",
+    r"^https://b\.org/",
+    r"\.pdf$",
+    r"/tag/[a-z]+",
+    r"(?i:/ADMIN)",
+    r"/(a)\1",
+    r"/x(b)\1",
+    r"/(?P<word>[a-z]+)-(?P=word)$",
+    r"[?&]page=\d+",
+]
+
+
+def random_url(rng):
+    host = rng.choice(["a.com", "b.org", "c.net"])
+    parts = [rng.choice(["docs", "tag", "admin", "Admin", "aa", "xbb", "xbc", "foo-foo", "foo-bar", "x"])
+             for _ in range(rng.randint(0, 3))]
+    url = f"https://{host}/" + "/".join(parts)
+    if rng.random() < 0.2:
+        url += rng.choice([".pdf", "?page=3", "&page=x", "/abc"])
+    return url
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pattern_set_agrees_with_searching_each_pattern(seed):
+    rng = random.Random(seed)
+    patterns = rng.sample(PATTERNS, rng.randint(1, len(PATTERNS)))
+    rng.shuffle(patterns)
+    pattern_set = PatternSet(patterns)
+    compiled = [re.compile(pattern) for pattern in patterns]
+
+    for _ in range(500):
+        url = random_url(rng)
+        assert pattern_set.matches(url) == any(regex.search(url) for regex in compiled), (patterns, url)
+
+
+def test_backreferences_survive_other_grouped_patterns():
+    pattern_set = PatternSet([r"/(a)\1", r"/x(b)\1"])
+
+    assert pattern_set.matches("/xbb")
+    assert pattern_set.matches("/aa")
+    assert not pattern_set.matches("/xbc")
+    # Only the patterns with references are matched one by one
+    assert len(pattern_set.fallback) == 2
+    assert pattern_set.regex is None
+    assert PatternSet([r"\.pdf$", r"/(a)\1"]).regex is not None
+
+
+def test_patterns_with_global_flags_fall_back_to_one_by_one():
+    pattern_set = PatternSet([r"\.pdf$", r"(?i)/ADMIN"])
+
+    assert pattern_set.regex is None
+    assert pattern_set.matches("https://a.com/admin")
+    assert pattern_set.matches("https://a.com/f.pdf")
+    assert not pattern_set.matches("https://a.com/f.PDF")
+
+
+def test_invalid_pattern_is_rejected():
+    with pytest.raises(ValueError):
+        PatternSet(["/valid", "/broken("])
+
+
+def test_empty_pattern_set_is_falsy():
+    assert not PatternSet([])
+    assert not PatternSet(["", None])
+
+
+def test_url_filter_checks():
+    url_filter = UrlFilter(
+        "a.com", skip_extensions=[".zip"], path_restriction="/docs",
+        include_patterns=[r"^https://a\.com/docs/"], exclude_patterns=[r"/private/"],
+        required_patterns=[r"\d"]
+    )
+
+    assert url_filter.allows("https://a.com/docs/v2/intro")
+    assert not url_filter.allows("mailto:someone@a.com")
+    assert not url_filter.allows("https://b.com/docs/v2/")
+    assert not url_filter.allows("https://a.com/docs/v2/file.ZIP")
+    assert not url_filter.allows("https://a.com/blog/2")
+    assert not url_filter.allows("https://a.com/docs/v2/private/x")
+    assert not url_filter.allows("https://a.com/docs/intro")
+
+
+def test_url_filter_from_config_regex_modes():
+    inclusive = UrlFilter.from_config({"regex_pattern": r"/shop/"}, "a.com")
+    exclusive = UrlFilter.from_config({"regex_pattern": r"/shop/", "regex_is_inclusive": False,
+                                       "follow_external_links": True}, "a.com")
+
+    assert inclusive.allows("https://a.com/shop/1")
+    assert not inclusive.allows("https://a.com/blog/1")
+    assert not exclusive.allows("https://a.com/shop/1")
+    assert exclusive.allows("https://b.com/blog/1")